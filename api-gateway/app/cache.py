@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_CACHE_ENABLED = os.getenv("GATEWAY_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+GATEWAY_CACHE_MAX_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long past its TTL an entry may still be served while it is refreshed.
+GATEWAY_CACHE_STALE_SECONDS = float(os.getenv("GATEWAY_CACHE_STALE_SECONDS", "30"))
+# event-catalog-service publishes here after every write.
+INVALIDATION_CHANNEL = os.getenv("CATALOG_INVALIDATION_CHANNEL", "catalog:invalidations")
+
+LIST_TAG = "events"
+
+# Public catalog reads, most specific first: (path pattern, TTL seconds).
+CACHE_RULES = [
+    (re.compile(r"^/events/search/?$"), float(os.getenv("GATEWAY_CACHE_TTL_EVENT_SEARCH", "10"))),
+    (re.compile(r"^/events/?$"), float(os.getenv("GATEWAY_CACHE_TTL_EVENT_LIST", "5"))),
+    (re.compile(r"^/events/(?P<event_id>[^/]+)/?$"), float(os.getenv("GATEWAY_CACHE_TTL_EVENT", "30"))),
+]
+
+_WRITE_PATH = re.compile(r"^/events(?:/(?P<event_id>[^/]+))?(?:/capacity)?/?$")
+
+# Upstream headers that describe the hop or the original encoding rather
+# than the cached body.
+_DROPPED_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding", "date", "server", "age", "cache-control", "vary"}
+
+
+def match_rule(path: str):
+    """Return (ttl, tag) for a cacheable path, or None."""
+    for pattern, ttl in CACHE_RULES:
+        m = pattern.match(path)
+        if m:
+            event_id = m.groupdict().get("event_id")
+            return ttl, f"event:{event_id}" if event_id else LIST_TAG
+    return None
+
+def cache_key(path: str, query_params) -> str:
+    return path.rstrip("/") + "?" + "&".join(f"{k}={v}" for k, v in sorted(query_params.multi_items()))
+
+
+class CacheEntry:
+    __slots__ = ("status_code", "headers", "body", "encoded", "etag", "stored_at", "ttl", "tag", "size")
+
+    def __init__(self, status_code: int, headers: dict, body: bytes, ttl: float, tag: str, encoded: dict = None):
+        self.status_code = status_code
+        self.headers = {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+        self.body = body
+        # The same body already compressed, per content-coding, so hits never compress.
+        self.encoded = encoded or {}
+        self.etag = self.headers.pop("etag", None) or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+        self.tag = tag
+        self.size = (
+            len(body) + sum(len(b) for b in self.encoded.values())
+            + sum(len(k) + len(v) for k, v in self.headers.items()) + 200
+        )
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    def is_fresh(self) -> bool:
+        return self.age() < self.ttl
+
+    def is_usable(self) -> bool:
+        return self.age() < self.ttl + GATEWAY_CACHE_STALE_SECONDS
+
+
+class ResponseCache:
+    """
+    In-memory response cache for the gateway, bounded by total bytes and
+    evicted least-recently-used first. Concurrent misses for the same key
+    share one upstream request, and entries past their TTL are served while a
+    single background refresh runs (stale-while-revalidate).
+    """
+
+    def __init__(self, max_bytes: int = GATEWAY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshes: set[asyncio.Task] = set()
+        # Bumped by every purge so a load that raced with a write is not stored.
+        self._generation = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.is_usable():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._tags.setdefault(entry.tag, set()).add(key)
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        keys = self._tags.get(entry.tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry.tag]
+
+    def purge_tag(self, tag: str) -> int:
+        self._generation += 1
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def purge_event(self, event_id: str) -> int:
+        """Drop one event's detail entry and every list/search page it may appear on."""
+        return self.purge_tag(f"event:{event_id}") + self.purge_tag(LIST_TAG)
+
+    def purge_path(self, path: str) -> int:
+        """Purge whatever a successful write to this catalog path may have changed."""
+        m = _WRITE_PATH.match(path)
+        if m is None:
+            return 0
+        if m.group("event_id"):
+            return self.purge_event(m.group("event_id"))
+        return self.purge_tag(LIST_TAG)
+
+    def purge_all(self):
+        self._generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    async def fetch(self, key: str, loader):
+        """
+        Run `loader` for a key unless an identical request is already in
+        flight, in which case wait for that one. The loader returns a
+        CacheEntry to store, or any other response to pass through uncached.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            result = await loader()
+            if isinstance(result, CacheEntry) and generation == self._generation:
+                self.put(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't let the exception go unretrieved.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def refresh(self, key: str, loader):
+        """Revalidate a stale entry in the background, at most once at a time."""
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(self.fetch(key, loader))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Background cache refresh failed: {task.exception()}")
+
+
+class InvalidationListener:
+    """
+    Subscribes to the catalog's invalidation channel so that writes made
+    through any gateway instance, or directly against the catalog (e.g. the
+    capacity sync), evict the affected entries everywhere.
+    """
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+        self._redis = None
+        self._task = None
+
+    def start(self):
+        self._redis = get_redis_client()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Listening for catalog invalidations on {INVALIDATION_CHANNEL}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Anything published while we were not subscribed is lost.
+                    self.cache.purge_all()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Catalog invalidation listener failed: {e}; retrying")
+                await asyncio.sleep(1)
+
+    def handle(self, data: str):
+        payload = json.loads(data)
+        if payload.get("all"):
+            self.cache.purge_all()
+            return
+        for event_id in payload.get("event_ids", []):
+            self.cache.purge_event(event_id)
@@ -0,0 +1,104 @@
+import os
+import time
+import zlib
+import asyncio
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Cached bodies are compressed once when stored; smaller ones are kept as they are.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Above this 1-minute load average per CPU, the fastest level is used instead.
+COMPRESSION_BUSY_LOAD = float(os.getenv("COMPRESSION_BUSY_LOAD", "0.75"))
+# Bodies at least this large are compressed on a thread; zlib and brotli
+# release the GIL, so the event loop keeps serving meanwhile.
+COMPRESSION_THREAD_BYTES = int(os.getenv("COMPRESSION_THREAD_BYTES", str(256 * 1024)))
+
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+# Server preference when the client weighs several encodings the same.
+_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+_load = (0.0, False)  # (checked_at, busy)
+
+def _busy() -> bool:
+    """Whether the host is loaded enough to trade ratio for speed; read at most once a second."""
+    global _load
+    now = time.monotonic()
+    if now - _load[0] >= 1:
+        try:
+            busy = os.getloadavg()[0] / (os.cpu_count() or 1) > COMPRESSION_BUSY_LOAD
+        except OSError:
+            busy = False
+        _load = (now, busy)
+    return _load[1]
+
+def negotiate(accept_encoding: str):
+    """The encoding to answer an Accept-Encoding header with, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in _ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    busy = _busy()
+    if encoding == "br":
+        return brotli.compress(body, quality=1 if busy else COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(1 if busy else COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+async def compress_async(body: bytes, encoding: str) -> bytes:
+    if len(body) >= COMPRESSION_THREAD_BYTES:
+        return await asyncio.to_thread(compress, body, encoding)
+    return compress(body, encoding)
+
+async def variants(body: bytes, content_type: str) -> dict[str, bytes]:
+    """The body in every encoding on offer, or nothing if it is not worth compressing."""
+    if not COMPRESSION_ENABLED or len(body) < COMPRESSION_MIN_BYTES or not compressible(content_type):
+        return {}
+    return {encoding: await compress_async(body, encoding) for encoding in _ENCODINGS}
+
+def compressible(content_type: str) -> bool:
+    return content_type.startswith(_COMPRESSIBLE)
+
+def etag_for(body: bytes) -> str:
+    """Strong validator of an uncompressed body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def encoded_etag(etag: str, encoding) -> str:
+    # A strong ETag names one representation, so each encoding gets its own.
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match against the body's ETag, whichever encoding the client's copy was in."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/").strip('"')
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == wanted or tag.rsplit("-", 1)[0] == wanted:
+            return True
+    return False
+
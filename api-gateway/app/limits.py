@@ -0,0 +1,285 @@
+import os
+import math
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+
+from .metrics import REJECTED_REQUESTS, CONCURRENCY_LIMIT
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_RATE_LIMIT_ENABLED = os.getenv("GATEWAY_RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+# redis: buckets shared by every gateway instance; local: per-instance buckets only
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "redis")
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "50"))  # tokens per second
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "100"))
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "10"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "20"))
+# Only enable behind a proxy that overwrites X-Forwarded-For, or clients can pick their own bucket.
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_LOCAL_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_KEYS", "100000"))
+
+GATEWAY_LOAD_SHEDDING_ENABLED = os.getenv("GATEWAY_LOAD_SHEDDING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Latency above which a route's concurrency limit starts shrinking.
+SHED_TARGET_LATENCY = float(os.getenv("SHED_TARGET_LATENCY_MS", "500")) / 1000
+SHED_MIN_CONCURRENCY = int(os.getenv("SHED_MIN_CONCURRENCY", "4"))
+SHED_BACKOFF = float(os.getenv("SHED_BACKOFF", "0.9"))
+
+# Upper bound on requests in flight per upstream route prefix.
+ROUTE_CONCURRENCY = {
+    "/auth": int(os.getenv("GATEWAY_MAX_CONCURRENCY_AUTH", "100")),
+    "/users": int(os.getenv("GATEWAY_MAX_CONCURRENCY_USERS", "100")),
+    "/events": int(os.getenv("GATEWAY_MAX_CONCURRENCY_EVENTS", "400")),
+    "/bookings": int(os.getenv("GATEWAY_MAX_CONCURRENCY_BOOKINGS", "200")),
+    "/notifications": int(os.getenv("GATEWAY_MAX_CONCURRENCY_NOTIFICATIONS", "100")),
+}
+
+EXEMPT_PATHS = {"/health", "/health/live", "/health/ready", "/metrics"}
+
+
+def is_stream(path: str) -> bool:
+    """Long-lived server-sent event streams, e.g. /bookings/availability/stream."""
+    return path.rstrip("/").endswith("/stream")
+
+# Atomically refill every bucket in KEYS from the Redis clock and take one
+# token from each, but only if all of them have one. ARGV holds a rate and a
+# burst per key. Returns the seconds until each bucket has a token ("0" for
+# buckets that had one); numbers are returned as strings so Lua does not
+# truncate them.
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+local waits = {}
+local denied = false
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    level = math.min(burst, level + math.max(0, now - ts) * rate)
+    tokens[i] = level
+    if level < 1 then
+        denied = true
+        waits[i] = tostring((1 - level) / rate)
+    else
+        waits[i] = '0'
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local level = tokens[i]
+    if not denied then
+        level = level - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(level), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return waits
+"""
+
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _route(path: str):
+    for prefix in ROUTE_CONCURRENCY:
+        if path.startswith(prefix):
+            return prefix
+    return None
+
+
+class RateLimiter:
+    """
+    Token buckets per client IP and per bearer token. Each instance keeps its
+    own buckets as a fast path: a client that has emptied its bucket here, or
+    that Redis recently refused, is rejected without a network call. Requests
+    that pass locally are then charged against the shared buckets in Redis.
+    If Redis is unavailable the local decision stands.
+    """
+
+    def __init__(self):
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._blocked_until: dict[str, float] = {}
+        self._script = None
+        self._last_error_log = 0.0
+
+    def _limits(self, scope) -> list[tuple[str, float, float]]:
+        ip = scope["client"][0] if scope.get("client") else "unknown"
+        if RATE_LIMIT_TRUST_FORWARDED_FOR:
+            forwarded = _header(scope, b"x-forwarded-for")
+            if forwarded:
+                ip = forwarded.split(",")[0].strip()
+        limits = [(f"ratelimit:ip:{ip}", RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST)]
+        authorization = _header(scope, b"authorization")
+        if authorization and authorization.lower().startswith("bearer "):
+            # The gateway does not verify tokens, so key on the token itself
+            # rather than a claim a client could forge to drain another
+            # user's bucket.
+            token_id = hashlib.blake2b(authorization[7:].encode(), digest_size=12).hexdigest()
+            limits.append((f"ratelimit:user:{token_id}", RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST))
+        return limits
+
+    def _take_local(self, key: str, rate: float, burst: float, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > RATE_LIMIT_LOCAL_KEYS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        level = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if level < 1:
+            bucket[0] = level
+            return (1 - level) / rate
+        bucket[0] = level - 1
+        return 0.0
+
+    async def check(self, scope) -> float:
+        """Return 0 if the request may proceed, otherwise seconds until it may retry."""
+        now = time.monotonic()
+        limits = self._limits(scope)
+        for key, _, _ in limits:
+            until = self._blocked_until.get(key)
+            if until is not None:
+                if until > now:
+                    return until - now
+                del self._blocked_until[key]
+
+        wait = max(self._take_local(key, rate, burst, now) for key, rate, burst in limits)
+        if wait or RATE_LIMIT_BACKEND != "redis":
+            return wait
+
+        if self._script is None:
+            self._script = get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+        args = [value for _, rate, burst in limits for value in (rate, burst)]
+        try:
+            waits = [float(w) for w in await self._script(keys=[key for key, _, _ in limits], args=args)]
+        except Exception as e:
+            if now - self._last_error_log > 10:
+                self._last_error_log = now
+                logger.warning(f"Shared rate limit check failed, using local buckets only: {e}")
+            return 0.0
+        for (key, _, _), key_wait in zip(limits, waits):
+            if key_wait:
+                self._blocked_until[key] = now + key_wait
+        if len(self._blocked_until) > RATE_LIMIT_LOCAL_KEYS:
+            self._blocked_until.clear()
+        return max(waits)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for one upstream route, adjusted AIMD-style from
+    observed latency: it grows by about one per limit's worth of fast
+    responses and is cut by SHED_BACKOFF, at most once per target-latency
+    interval, when responses are slow or the upstream fails. Requests over
+    the limit are shed immediately instead of queueing.
+    """
+
+    def __init__(self, route: str, max_limit: int):
+        self.route = route
+        self.max_limit = max_limit
+        self.min_limit = min(SHED_MIN_CONCURRENCY, max_limit)
+        self.limit = float(max_limit)
+        self.inflight = 0
+        self._last_decrease = 0.0
+        CONCURRENCY_LIMIT.labels(route).set(self.limit)
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float, overloaded: bool):
+        self.inflight -= 1
+        now = time.monotonic()
+        if overloaded or latency > SHED_TARGET_LATENCY:
+            if now - self._last_decrease >= SHED_TARGET_LATENCY:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * SHED_BACKOFF)
+                CONCURRENCY_LIMIT.labels(self.route).set(self.limit)
+        elif self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            CONCURRENCY_LIMIT.labels(self.route).set(self.limit)
+
+
+def _rejection(status_code: int, detail: bytes, retry_after: float):
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(detail)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    return {"type": "http.response.start", "status": status_code, "headers": headers}, {"type": "http.response.body", "body": detail}
+
+_TOO_MANY_REQUESTS = b'{"detail":"Too many requests"}'
+_OVERLOADED = b'{"detail":"Service overloaded, retry shortly"}'
+
+
+class TrafficControlMiddleware:
+    """
+    Plain ASGI middleware that applies the rate limits and per-route
+    concurrency limits before the request body is read or any upstream is
+    contacted, answering 429 or 503 with Retry-After.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.rate_limiter = RateLimiter()
+        self.route_limiters = {route: AdaptiveLimiter(route, cap) for route, cap in ROUTE_CONCURRENCY.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        route = _route(scope["path"])
+        if GATEWAY_RATE_LIMIT_ENABLED:
+            wait = await self.rate_limiter.check(scope)
+            if wait:
+                REJECTED_REQUESTS.labels("rate_limited", route or "<unmatched>").inc()
+                for message in _rejection(429, _TOO_MANY_REQUESTS, wait):
+                    await send(message)
+                return
+
+        # A stream would hold its slot for as long as the client stays
+        # connected, so streams are rate limited but not counted.
+        limiter = None
+        if GATEWAY_LOAD_SHEDDING_ENABLED and not is_stream(scope["path"]):
+            limiter = self.route_limiters.get(route)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not limiter.try_acquire():
+            REJECTED_REQUESTS.labels("shed", route).inc()
+            for message in _rejection(503, _OVERLOADED, 1):
+                await send(message)
+            return
+
+        start = time.perf_counter()
+        latency = None
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal latency, status_code
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - start
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if latency is None:
+                latency = time.perf_counter() - start
+            limiter.release(latency, overloaded=status_code in (500, 502, 503, 504))
@@ -1,17 +1,53 @@
 import os
+import logging
 from fastapi import FastAPI, Request, Response, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import httpx
-from dotenv import load_dotenv
 
-load_dotenv()
+from .metrics import instrument_app, HTTPX_EVENT_HOOKS, CACHE_LOOKUPS
+from .tracing import setup_tracing
+from .cache import GATEWAY_CACHE_ENABLED, ResponseCache, CacheEntry, InvalidationListener, match_rule, cache_key
+from .limits import TrafficControlMiddleware, is_stream
+from .redis_client import close_redis
+from . import compression
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 AUTH_URL = os.getenv("AUTH_URL", "http://auth-service:8000")
 EVENT_URL = os.getenv("EVENT_URL", "http://event-catalog-service:8001")
 BOOK_URL = os.getenv("BOOK_URL", "http://booking-service:8002")
 NOTIF_URL = os.getenv("NOTIF_URL", "http://notification-service:8003")
+UPSTREAM_TIMEOUT = float(os.getenv("GATEWAY_UPSTREAM_TIMEOUT", "30"))
 
 app = FastAPI(title="EventFlow API Gateway")
+# Added before the metrics middleware so rejected requests are still measured.
+app.add_middleware(TrafficControlMiddleware)
+instrument_app(app)
+setup_tracing(app, "api-gateway")
+
+response_cache = ResponseCache()
+invalidation_listener = InvalidationListener(response_cache)
+
+# Conditional and encoding headers are handled by the cache, not upstream, so
+# cached loads always fetch a full identity-encoded body; the cache keeps
+# compressed copies of it made once per load.
+_CACHE_LOAD_DROPPED_HEADERS = {"if-none-match", "if-modified-since", "accept-encoding", "cache-control"}
+
+@app.on_event("startup")
+async def startup_event():
+    if not GATEWAY_CACHE_ENABLED:
+        return
+    try:
+        invalidation_listener.start()
+    except Exception as e:
+        logger.error(f"Failed to start cache invalidation listener: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if GATEWAY_CACHE_ENABLED:
+        await invalidation_listener.stop()
+    await close_redis()
 
 PROXY_MAP = {
     "/auth": AUTH_URL,
@@ -21,6 +57,19 @@ PROXY_MAP = {
     "/notifications": NOTIF_URL,
 }
 
+@app.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    The gateway has no backend it cannot serve without: Redis only backs
+    the response cache and the shared rate limits, and both fall back to
+    local state when it is down.
+    """
+    return {"status": "ready"}
+
 @app.api_route("/{full_path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy(full_path: str, request: Request):
     path = "/" + full_path
@@ -31,15 +80,111 @@ async def proxy(full_path: str, request: Request):
     else:
         return JSONResponse({"detail": "Not found"}, status_code=404)
 
-
     method = request.method
     headers = dict(request.headers)
+    # Bodies are passed through as the upstream encoded them, so only ask for
+    # what the client accepts; httpx would otherwise ask for gzip by default.
+    headers.setdefault("accept-encoding", "identity")
+    if GATEWAY_CACHE_ENABLED and method == "GET":
+        rule = match_rule(path)
+        if rule is not None:
+            return await _cached_get(request, path, url, headers, *rule)
+
+    if method == "GET" and is_stream(path):
+        return await _stream(url, headers, dict(request.query_params))
+
     body = await request.body()
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS) as client:
         try:
-            resp = await client.request(
-                method, url, headers=headers, content=body, params=dict(request.query_params), timeout=30.0
-            )
+            # Read the body as sent, so a compressed one is passed on without
+            # being decoded here and encoded again by nobody.
+            resp = await client.send(client.build_request(
+                method, url, headers=headers, content=body, params=dict(request.query_params), timeout=UPSTREAM_TIMEOUT
+            ), stream=True)
+            try:
+                content = b"".join([chunk async for chunk in resp.aiter_raw()])
+            finally:
+                await resp.aclose()
         except httpx.RequestError as e:
             return JSONResponse({"detail": f"Upstream error: {str(e)}"}, status_code=502)
-    return Response(content=resp.content, status_code=resp.status_code, headers=resp.headers)
+    if GATEWAY_CACHE_ENABLED and method != "GET" and resp.status_code < 400:
+        # Read-your-writes through this instance; the catalog's invalidation
+        # message covers the other gateway instances.
+        response_cache.purge_path(path)
+    return Response(content=content, status_code=resp.status_code, headers=resp.headers)
+
+
+async def _stream(url: str, headers: dict, params: dict):
+    """Relay a server-sent event stream chunk by chunk instead of buffering it."""
+    # No read timeout: a quiet stream is only sent a keepalive now and then.
+    client = httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=httpx.Timeout(UPSTREAM_TIMEOUT, read=None))
+    try:
+        resp = await client.send(client.build_request("GET", url, headers=headers, params=params), stream=True)
+    except httpx.RequestError as e:
+        await client.aclose()
+        return JSONResponse({"detail": f"Upstream error: {str(e)}"}, status_code=502)
+    if resp.status_code != 200:
+        await resp.aread()
+        await resp.aclose()
+        await client.aclose()
+        return Response(content=resp.content, status_code=resp.status_code, headers=resp.headers)
+
+    async def relay():
+        try:
+            async for chunk in resp.aiter_raw():
+                yield chunk
+        finally:
+            await resp.aclose()
+            await client.aclose()
+
+    return StreamingResponse(relay(), status_code=200, headers={
+        k: v for k, v in resp.headers.items() if k.lower() not in ("content-length", "transfer-encoding", "connection")
+    })
+
+async def _cached_get(request: Request, path: str, url: str, headers: dict, ttl: float, tag: str):
+    key = cache_key(path, request.query_params)
+    params = dict(request.query_params)
+    upstream_headers = {k: v for k, v in headers.items() if k.lower() not in _CACHE_LOAD_DROPPED_HEADERS}
+    upstream_headers["accept-encoding"] = "identity"
+
+    async def load():
+        async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS) as client:
+            try:
+                resp = await client.request("GET", url, headers=upstream_headers, params=params, timeout=UPSTREAM_TIMEOUT)
+            except httpx.RequestError as e:
+                return JSONResponse({"detail": f"Upstream error: {str(e)}"}, status_code=502)
+        if resp.status_code != 200:
+            return Response(content=resp.content, status_code=resp.status_code, headers=resp.headers)
+        encoded = await compression.variants(resp.content, resp.headers.get("content-type", ""))
+        return CacheEntry(resp.status_code, dict(resp.headers), resp.content, ttl, tag, encoded)
+
+    entry = response_cache.get(key)
+    if entry is None:
+        result = "miss"
+        entry = await response_cache.fetch(key, load)
+        if not isinstance(entry, CacheEntry):
+            CACHE_LOOKUPS.labels(result).inc()
+            return entry
+    elif entry.is_fresh():
+        result = "hit"
+    else:
+        result = "stale"
+        response_cache.refresh(key, load)
+
+    encoding = compression.negotiate(request.headers.get("accept-encoding", "")) if entry.encoded else None
+    cache_headers = {
+        "ETag": compression.encoded_etag(entry.etag, encoding),
+        "Age": str(int(entry.age())),
+        "Cache-Control": f"public, max-age={max(int(entry.ttl - entry.age()), 0)}",
+        "X-Cache": result.upper(),
+    }
+    if entry.encoded:
+        cache_headers["Vary"] = "Accept-Encoding"
+    if compression.etag_matches(request.headers.get("if-none-match"), entry.etag):
+        CACHE_LOOKUPS.labels("not_modified").inc()
+        return Response(status_code=304, headers=cache_headers)
+    CACHE_LOOKUPS.labels(result).inc()
+    if encoding in entry.encoded:
+        cache_headers["Content-Encoding"] = encoding
+        return Response(content=entry.encoded[encoding], status_code=entry.status_code, headers={**entry.headers, **cache_headers})
+    return Response(content=entry.body, status_code=entry.status_code, headers={**entry.headers, **cache_headers})
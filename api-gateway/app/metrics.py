@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+from fastapi import FastAPI, Response
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DOWNSTREAM_LATENCY = Histogram(
+    "downstream_call_duration_seconds",
+    "Latency of calls to backends and other services",
+    ["backend", "operation", "outcome"],
+)
+CACHE_LOOKUPS = Counter(
+    "gateway_cache_lookups_total",
+    "Response cache lookups by result (hit, stale, miss, not_modified)",
+    ["result"],
+)
+REJECTED_REQUESTS = Counter(
+    "gateway_rejected_requests_total",
+    "Requests answered by the gateway without contacting an upstream (rate_limited, shed)",
+    ["reason", "route"],
+)
+CONCURRENCY_LIMIT = Gauge(
+    "gateway_concurrency_limit",
+    "Current adaptive concurrency limit per upstream route",
+    ["route"],
+)
+
+
+class PrometheusMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task overhead) recording
+    latency per route template, so /events/{event_id} is one series rather
+    than one per id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # The router stores the matched route in the shared scope.
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(time.perf_counter() - start)
+
+
+async def metrics_endpoint():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Under gunicorn.conf.py every worker writes its samples to this
+        # directory; aggregate them so one scrape covers the whole instance.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def instrument_app(app: FastAPI):
+    """Add the metrics middleware and the /metrics route. Call before other routes are declared."""
+    app.add_middleware(PrometheusMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+@contextmanager
+def observe(backend: str, operation: str):
+    """Time a downstream call: `with observe("redis", "incr"): ...`"""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        DOWNSTREAM_LATENCY.labels(backend, operation, outcome).observe(time.perf_counter() - start)
+
+
+async def _httpx_request_started(request):
+    request.extensions["metrics_start"] = time.perf_counter()
+
+async def _httpx_response_received(response):
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if start is not None:
+        outcome = "ok" if response.status_code < 500 else "error"
+        DOWNSTREAM_LATENCY.labels("http", f"{request.method} {request.url.host}", outcome).observe(time.perf_counter() - start)
+
+# Pass as `httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS)` to time outgoing calls.
+HTTPX_EVENT_HOOKS = {"request": [_httpx_request_started], "response": [_httpx_response_received]}
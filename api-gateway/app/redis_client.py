@@ -0,0 +1,21 @@
+import os
+
+import redis.asyncio as aioredis
+
+REDIS_URL = os.getenv("REDIS_URL", f"redis://{os.getenv('REDIS_HOST', 'redis_booking')}:{os.getenv('REDIS_PORT', '6379')}/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+_redis = None
+
+def get_redis_client():
+    """The gateway's one Redis client, shared by the response cache and the rate limiter."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(REDIS_URL, decode_responses=True, max_connections=REDIS_MAX_CONNECTIONS)
+    return _redis
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
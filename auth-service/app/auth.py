@@ -1,17 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import os
-from dotenv import load_dotenv
+import uuid
+import hashlib
 
 from . import models, schemas
 from .database import get_db
-from .crud import get_user_by_email
-
-load_dotenv()
+from .crud import get_user_by_email, is_token_revoked
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key")
@@ -19,7 +18,6 @@ ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-revoked_tokens: set[str] = set()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -27,21 +25,33 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # The jti is what logout revokes.
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_id(payload: dict, token: str) -> str:
+    # Tokens issued before jti was added are revoked by their hash.
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+def token_expiry(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+
+def decode_token(token: str) -> dict:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
-    if token in revoked_tokens:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -55,7 +65,14 @@ async def get_current_user(
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    
+
+    if is_token_revoked(db, token_id(payload, token)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     user = get_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
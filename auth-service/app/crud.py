@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from . import models, schemas
 from passlib.context import CryptContext
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -62,4 +63,14 @@ def update_user(db: Session, user_id: str, user_update: schemas.UserUpdate):
     db_user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def revoke_token(db: Session, jti: str, expires_at: datetime):
+    # Shared by every worker and replica; rows are only needed until the
+    # token expires, so expired ones are cleared on the way.
+    db.query(models.RevokedToken).filter(models.RevokedToken.expires_at < datetime.now(timezone.utc)).delete()
+    db.execute(insert(models.RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing())
+    db.commit()
+
+def is_token_revoked(db: Session, jti: str):
+    return db.get(models.RevokedToken, jti) is not None
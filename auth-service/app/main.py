@@ -1,7 +1,9 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+import asyncio
+from fastapi import FastAPI, Depends, HTTPException, Response, status, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
@@ -10,36 +12,58 @@ import logging
 from .database import get_db, engine
 from . import models, schemas, crud
 from .auth import create_access_token, get_current_user
-from .auth import oauth2_scheme, revoked_tokens
+from .auth import oauth2_scheme, decode_token, token_id, token_expiry
 from .consul_client import ConsulClient
+from .metrics import instrument_app, instrument_sqlalchemy
+from .tracing import setup_tracing
+from .readiness import Readiness
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-models.Base.metadata.create_all(bind=engine)
+instrument_sqlalchemy(engine)
 
 app = FastAPI(title="Authentication Service")
+instrument_app(app)
+setup_tracing(app, "auth-service")
 
 INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secure-api-key")
 
 consul_client = ConsulClient()
+readiness = Readiness()
+
+async def _create_tables():
+    # Runs after startup rather than at import, so importing the app (and the
+    # gunicorn master with PRELOAD_APP) never opens a database connection.
+    await asyncio.to_thread(models.Base.metadata.create_all, bind=engine)
+
+def _select_one():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+async def _ping_postgres():
+    await asyncio.to_thread(_select_one)
 
 @app.on_event("startup")
 async def startup_event():
-    try:
-        consul_client.register_service()
-        logger.info("Service registered with Consul")
-    except Exception as e:
-        logger.error(f"Failed to register service with Consul: {str(e)}")
+    if consul_client.register_in_app:
+        try:
+            consul_client.register_service()
+            logger.info("Service registered with Consul")
+        except Exception as e:
+            logger.error(f"Failed to register service with Consul: {str(e)}")
+    readiness.start([("postgres", _create_tables)], checks=[("postgres", _ping_postgres)])
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    try:
-        consul_client.deregister_service()
-        logger.info("Service deregistered from Consul")
-    except Exception as e:
-        logger.error(f"Failed to deregister service from Consul: {str(e)}")
+    await readiness.stop()
+    if consul_client.register_in_app:
+        try:
+            consul_client.deregister_service()
+            logger.info("Service deregistered from Consul")
+        except Exception as e:
+            logger.error(f"Failed to deregister service from Consul: {str(e)}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -62,9 +86,21 @@ def update_current_user(
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for Consul"""
+    """Basic health check; Consul uses /health/ready"""
     return {"status": "healthy"}
 
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and its event loop is answering; says nothing about backends."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Consul's health check: 503 until startup has finished and while any backend ping fails."""
+    if not await readiness.check():
+        response.status_code = 503
+    return readiness.status()
+
 @app.post("/auth/register", response_model=schemas.User)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=user.email)
@@ -89,8 +125,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/auth/logout")
-def logout(token: str = Depends(oauth2_scheme)):
-    revoked_tokens.add(token)
+def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    payload = decode_token(token)
+    crud.revoke_token(db, token_id(payload, token), token_expiry(payload))
     return {"msg": "Token has been revoked; you have been logged out"}
 
 @app.get("/users/me", response_model=schemas.User)
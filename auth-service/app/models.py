@@ -12,4 +12,11 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
+
+class RevokedToken(Base):
+    """A logged-out access token, kept until it would have expired anyway."""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
@@ -0,0 +1,43 @@
+import os
+import logging
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+
+logger = logging.getLogger(__name__)
+
+# otlp: send to OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318)
+# file: append one JSON span per line to OTEL_TRACES_FILE for offline analysis
+# none: create and propagate spans but export nothing
+TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "none")
+TRACES_FILE = os.getenv("OTEL_TRACES_FILE", "/tmp/traces.jsonl")
+
+tracer = trace.get_tracer("eventflow")
+
+def _build_exporter():
+    if TRACES_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if TRACES_EXPORTER == "file":
+        out = open(TRACES_FILE, "a", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + os.linesep)
+    return None
+
+def setup_tracing(app: FastAPI, service_name: str):
+    """
+    Install a tracer provider, create a server span per request and propagate
+    W3C traceparent on every outgoing httpx call.
+    """
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    exporter = _build_exporter()
+    if exporter:
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+    HTTPXClientInstrumentor().instrument()
+    logger.info(f"Tracing enabled for {service_name} (exporter: {TRACES_EXPORTER})")
@@ -0,0 +1,111 @@
+import os
+import asyncio
+import logging
+
+from cassandra import ConsistencyLevel
+from cassandra.query import SimpleStatement, PreparedStatement
+
+logger = logging.getLogger(__name__)
+
+# Names from cassandra.ConsistencyLevel, e.g. ONE, LOCAL_ONE, LOCAL_QUORUM.
+READ_CONSISTENCY = ConsistencyLevel.name_to_value[os.getenv("CASSANDRA_READ_CONSISTENCY", "LOCAL_ONE")]
+WRITE_CONSISTENCY = ConsistencyLevel.name_to_value[os.getenv("CASSANDRA_WRITE_CONSISTENCY", "LOCAL_QUORUM")]
+# Reads that a write decision depends on (duplicate-booking check, ownership
+# checks before cancel/confirm); with quorum writes this reads its own writes.
+CHECK_CONSISTENCY = ConsistencyLevel.name_to_value[os.getenv("CASSANDRA_CHECK_CONSISTENCY", "LOCAL_QUORUM")]
+CASSANDRA_CONCURRENCY = int(os.getenv("CASSANDRA_CONCURRENCY", "100"))
+
+
+class AsyncResult(list):
+    """All rows of a query, with the `one()` accessor of the driver's ResultSet."""
+
+    def one(self):
+        return self[0] if self else None
+
+
+class AsyncSession:
+    """
+    Coroutine front for a cassandra-driver Session. Statements go out with
+    `execute_async` and the driver's ResponseFuture callbacks, which fire on
+    the driver's own threads, resolve an asyncio future on the caller's loop,
+    so a slow query only suspends the request that issued it. Every page of
+    the result is fetched before the coroutine returns.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._prepared: dict[str, PreparedStatement] = {}
+
+    @property
+    def keyspace(self):
+        return self.session.keyspace
+
+    async def prepare(self, query: str) -> PreparedStatement:
+        """Prepare a statement once per process; later calls hit the cache."""
+        prepared = self._prepared.get(query)
+        if prepared is None:
+            prepared = await asyncio.to_thread(self.session.prepare, query)
+            self._prepared[query] = prepared
+        return prepared
+
+    async def execute(self, query, parameters=None, consistency_level=None) -> AsyncResult:
+        """
+        Run one statement. `consistency_level` overrides the session default
+        for this statement only; pass one of READ_CONSISTENCY,
+        WRITE_CONSISTENCY or CHECK_CONSISTENCY.
+        """
+        if consistency_level is not None:
+            if isinstance(query, str):
+                query = SimpleStatement(query, consistency_level=consistency_level)
+            elif isinstance(query, PreparedStatement):
+                query = query.bind(parameters or ())
+                query.consistency_level = consistency_level
+                parameters = None
+            else:
+                query.consistency_level = consistency_level
+
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        rows = AsyncResult()
+        response = self.session.execute_async(query, parameters)
+
+        def resolve(result, error):
+            if not done.done():
+                if error is not None:
+                    done.set_exception(error)
+                else:
+                    done.set_result(result)
+
+        def on_page(page):
+            rows.extend(page)
+            if response.has_more_pages:
+                response.start_fetching_next_page()
+            else:
+                loop.call_soon_threadsafe(resolve, rows, None)
+
+        def on_error(error):
+            loop.call_soon_threadsafe(resolve, None, error)
+
+        response.add_callbacks(on_page, on_error)
+        return await done
+
+    async def execute_concurrent(self, query, parameter_sets, consistency_level=None, concurrency: int = CASSANDRA_CONCURRENCY):
+        """
+        Run one statement for many parameter sets with at most `concurrency`
+        in flight. Returns (success, result_or_exception) per parameter set,
+        in order, like cassandra.concurrent.execute_concurrent_with_args with
+        raise_on_first_error=False.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(parameters):
+            async with semaphore:
+                try:
+                    return True, await self.execute(query, parameters, consistency_level)
+                except Exception as e:
+                    return False, e
+
+        return await asyncio.gather(*(run(p) for p in parameter_sets))
+
+    def shutdown(self):
+        self.session.shutdown()
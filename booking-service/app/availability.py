@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+from .database import get_redis_client
+from .event_client import get_event_details
+
+logger = logging.getLogger(__name__)
+
+# A client gets at most one update per event every this many seconds; changes
+# in between are folded into the next one.
+AVAILABILITY_MIN_INTERVAL = float(os.getenv("AVAILABILITY_MIN_INTERVAL", "0.25"))
+AVAILABILITY_HEARTBEAT_SECONDS = float(os.getenv("AVAILABILITY_HEARTBEAT_SECONDS", "15"))
+AVAILABILITY_MAX_EVENTS = int(os.getenv("AVAILABILITY_MAX_EVENTS", "50"))
+# How long an event's capacity from the catalog is reused by every stream in the process.
+AVAILABILITY_CAPACITY_TTL = float(os.getenv("AVAILABILITY_CAPACITY_TTL", "30"))
+
+CHANNEL_PREFIX = "availability:"
+
+def channel(event_id: str) -> str:
+    """Pub/sub channel the seat-counter scripts publish an event's new count on."""
+    return f"{CHANNEL_PREFIX}{event_id}"
+
+def _counter_key(event_id: str) -> str:
+    return f"booking_count:{event_id}"
+
+
+class Subscription:
+    """
+    One client's view of a set of events. The hub overwrites the latest seat
+    count per event; the stream takes whatever is pending at most once per
+    AVAILABILITY_MIN_INTERVAL, so a hot event costs a client a few updates a
+    second however fast its seats go.
+    """
+
+    def __init__(self, event_ids: list[str]):
+        self.event_ids = event_ids
+        self.pending: dict[str, int] = {}
+        self.changed = asyncio.Event()
+        self.closed = False
+
+    def update(self, event_id: str, booked: int):
+        self.pending[event_id] = booked
+        self.changed.set()
+
+    def take(self) -> dict[str, int]:
+        pending, self.pending = self.pending, {}
+        self.changed.clear()
+        return pending
+
+
+class AvailabilityHub:
+    """
+    Fans seat-count changes out to the streams open in this process. The
+    booking scripts PUBLISH the new count on `availability:{event_id}` in the
+    same call that changes it, so messages arrive in counter order. Each
+    process holds a single pattern subscription for all events, whatever the
+    number of open streams, and drops messages for events nobody here watches.
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._task = None
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._capacities: dict[str, tuple[float, int]] = {}
+        self._capacity_loads: dict[str, asyncio.Task] = {}
+
+    def start(self):
+        self._redis = get_redis_client()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Availability hub started")
+
+    async def stop(self):
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.closed = True
+                subscription.changed.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Availability hub stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    # Changes published while we were not subscribed are lost;
+                    # send every open stream the current counts instead.
+                    await self._resync()
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Availability subscription failed: {e}; retrying")
+                await asyncio.sleep(1)
+
+    def _dispatch(self, raw_channel: bytes, data: bytes):
+        event_id = raw_channel.decode()[len(CHANNEL_PREFIX):]
+        subscriptions = self._subscribers.get(event_id)
+        if not subscriptions:
+            return
+        booked = int(data)
+        for subscription in subscriptions:
+            subscription.update(event_id, booked)
+
+    async def _resync(self):
+        event_ids = list(self._subscribers)
+        if not event_ids:
+            return
+        for event_id, booked in zip(event_ids, await self._counts(event_ids)):
+            for subscription in self._subscribers.get(event_id, ()):
+                subscription.update(event_id, booked)
+
+    async def _counts(self, event_ids: list[str]) -> list[int]:
+        values = await get_redis_client().mget([_counter_key(e) for e in event_ids])
+        return [int(v or 0) for v in values]
+
+    async def subscribe(self, event_ids: list[str]) -> Subscription:
+        """Register a stream and queue the current count of each event as its first update."""
+        subscription = Subscription(event_ids)
+        for event_id in event_ids:
+            self._subscribers.setdefault(event_id, set()).add(subscription)
+        # Read after registering, so no change falls between the two.
+        try:
+            counts = await self._counts(event_ids)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+        for event_id, booked in zip(event_ids, counts):
+            subscription.update(event_id, booked)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for event_id in subscription.event_ids:
+            subscriptions = self._subscribers.get(event_id)
+            if subscriptions is None:
+                continue
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[event_id]
+                self._capacities.pop(event_id, None)
+
+    async def capacity(self, event_id: str):
+        """The event's capacity from the catalog, shared by every stream here for AVAILABILITY_CAPACITY_TTL."""
+        cached = self._capacities.get(event_id)
+        if cached and time.monotonic() - cached[0] < AVAILABILITY_CAPACITY_TTL:
+            return cached[1]
+        load = self._capacity_loads.get(event_id)
+        if load is None:
+            load = asyncio.create_task(get_event_details(event_id, stale_ok=True))
+            self._capacity_loads[event_id] = load
+            load.add_done_callback(lambda _: self._capacity_loads.pop(event_id, None))
+        event = await asyncio.shield(load)
+        if not event or event.get("capacity") is None:
+            return cached[1] if cached else None
+        self._capacities[event_id] = (time.monotonic(), event["capacity"])
+        return event["capacity"]
+
+    async def stream(self, subscription: Subscription):
+        """Server-sent events for one subscription, until the client goes away or the hub stops."""
+        try:
+            while not subscription.closed:
+                try:
+                    await asyncio.wait_for(subscription.changed.wait(), AVAILABILITY_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.closed:
+                    break
+                for event_id, booked in subscription.take().items():
+                    capacity = await self.capacity(event_id)
+                    payload = {
+                        "event_id": event_id,
+                        "booked": booked,
+                        "capacity": capacity,
+                        "available": None if capacity is None else max(capacity - booked, 0),
+                    }
+                    yield f"event: availability\ndata: {json.dumps(payload)}\n\n"
+                await asyncio.sleep(AVAILABILITY_MIN_INTERVAL)
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,141 @@
+"""
+One-off jobs that fill in data for bookings made before the code that
+maintains it was deployed. Run from the booking-service directory against
+the same Cassandra and Redis the service uses:
+
+    python -m app.backfill                    # every job
+    python -m app.backfill bookings_by_user event_stats
+
+bookings_by_user is safe to run while the service is taking bookings, and
+to run again: every row is written with the write time of the `bookings`
+row it came from, so a newer change made by the service in the meantime
+always wins.
+
+event_stats adds the bookings and cancellations made before the service
+started counting (`stats:since`) to each event's counters; everything after
+that is counted live. It runs once and then refuses, since running it twice
+would count those bookings twice; pass --force to run it again anyway.
+A reverted reservation looks like a cancelled booking in `bookings` and is
+counted as one.
+"""
+import os
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from cassandra.query import SimpleStatement
+from cassandra.concurrent import execute_concurrent_with_args
+
+from . import stats
+from .schemas import BookingStatus
+from .database import connect_cassandra, get_redis_client, close_redis
+from .async_cassandra import CASSANDRA_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_PAGE_SIZE = int(os.getenv("BACKFILL_PAGE_SIZE", "1000"))
+
+BOOKINGS_SCAN_CQL = (
+    "SELECT id, event_id, user_id, status, created_at, updated_at, WRITETIME(status) AS written FROM bookings"
+)
+BY_USER_BACKFILL_CQL = (
+    "INSERT INTO bookings_by_user (user_id, event_id, booking_id, status, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?) USING TIMESTAMP ?"
+)
+
+
+def _pages(session, query: str):
+    """Rows of a full-table scan, one driver page at a time."""
+    result = session.execute(SimpleStatement(query, fetch_size=BACKFILL_PAGE_SIZE))
+    while True:
+        yield list(result.current_rows)
+        if not result.has_more_pages:
+            return
+        result.fetch_next_page()
+
+def backfill_bookings_by_user(session) -> int:
+    insert = session.prepare(BY_USER_BACKFILL_CQL)
+    copied = 0
+    for rows in _pages(session, BOOKINGS_SCAN_CQL):
+        params = [
+            (row.user_id, row.event_id, row.id, row.status, row.created_at, row.updated_at, row.written)
+            for row in rows
+            if row.user_id and row.event_id and row.written
+        ]
+        for success, result in execute_concurrent_with_args(
+            session, insert, params, concurrency=CASSANDRA_CONCURRENCY, raise_on_first_error=False
+        ):
+            if not success:
+                raise result
+        copied += len(params)
+        logger.info(f"Copied {copied} bookings into bookings_by_user")
+    return copied
+
+
+def _count(counts, metric: str, ts: datetime):
+    counts[metric]["hourly"][stats.hour_of(ts)] += 1
+    counts[metric]["daily"][stats.day_of(ts)] += 1
+
+async def _add_event_stats(session, force: bool) -> int:
+    redis_client = get_redis_client()
+    try:
+        since = await redis_client.get(stats.SINCE_KEY)
+        if since is None:
+            raise SystemExit("No booking-service instance has started counting event stats yet; deploy it first")
+        if await redis_client.get(stats.BACKFILLED_KEY) and not force:
+            raise SystemExit("Event stats were already backfilled; pass --force to add the counts again")
+        since = datetime.fromisoformat(since.decode())
+
+        per_event = defaultdict(lambda: {
+            metric: {"hourly": defaultdict(int), "daily": defaultdict(int)} for metric in stats.METRICS
+        })
+        # The scan is synchronous; run it off the loop so Redis stays responsive.
+        def scan():
+            for rows in _pages(session, BOOKINGS_SCAN_CQL):
+                for row in rows:
+                    if not row.event_id or not row.created_at or row.created_at >= since:
+                        continue
+                    _count(per_event[row.event_id], stats.BOOKINGS, row.created_at)
+                    if row.status == BookingStatus.CANCELLED.value and row.updated_at and row.updated_at < since:
+                        _count(per_event[row.event_id], stats.CANCELLATIONS, row.updated_at)
+        await asyncio.to_thread(scan)
+
+        for event_id, counts in per_event.items():
+            await stats.add(redis_client, event_id, counts)
+        await redis_client.set(stats.BACKFILLED_KEY, datetime.utcnow().isoformat())
+        logger.info(f"Added stats from before {since.isoformat()} for {len(per_event)} events")
+        return len(per_event)
+    finally:
+        await close_redis()
+
+def backfill_event_stats(session, force: bool = False) -> int:
+    return asyncio.run(_add_event_stats(session, force))
+
+
+JOBS = {
+    "bookings_by_user": lambda session, args: backfill_bookings_by_user(session),
+    "event_stats": lambda session, args: backfill_event_stats(session, args.force),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill booking-service tables and counters")
+    parser.add_argument("jobs", nargs="*", help=f"Jobs to run, of {', '.join(JOBS)} (default: all)")
+    parser.add_argument("--force", action="store_true", help="Run event_stats even if it already ran")
+    args = parser.parse_args()
+    unknown = [job for job in args.jobs if job not in JOBS]
+    if unknown:
+        parser.error(f"unknown jobs: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO)
+    cluster, session = connect_cassandra()
+    try:
+        for job in args.jobs or list(JOBS):
+            JOBS[job](session, args)
+    finally:
+        cluster.shutdown()
+
+
+if __name__ == "__main__":
+    main()
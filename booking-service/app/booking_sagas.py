@@ -0,0 +1,175 @@
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from . import schemas, waiting_room, waitlist, holds, ledger, availability
+from .saga import SagaStep, SagaDefinition, marker_key, SAGA_RETENTION
+from .capacity_sync import publish_capacity_delta
+from .event_client import get_event_details
+from .metrics import RESERVATIONS
+from .notification import send_booking_notification
+from .user_client import get_user_info
+
+logger = logging.getLogger(__name__)
+
+def _counter_key(event_id: str) -> str:
+    return f"booking_count:{event_id}"
+
+# Take a seat at most once per saga: the marker key records that this saga
+# already holds one, so a replayed action neither double-counts nor fails.
+# Every script that moves the counter publishes the new count on the event's
+# availability channel (ARGV[3] here) for the availability streams.
+RESERVE_SEAT_LUA = """
+if not redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[2]) then
+    return 0
+end
+local booked = redis.call('INCR', KEYS[1])
+if booked > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    redis.call('DEL', KEYS[2])
+    return -1
+end
+redis.call('PUBLISH', ARGV[3], booked)
+return booked
+"""
+
+# Give the seat back only if this saga still holds it.
+RETURN_SEAT_LUA = """
+if redis.call('DEL', KEYS[2]) == 1 then
+    local booked = redis.call('DECR', KEYS[1])
+    redis.call('PUBLISH', ARGV[1], booked)
+    return booked
+end
+return -1
+"""
+
+def _booking(ctx) -> dict:
+    return {
+        "id": ctx["booking_id"],
+        "event_id": ctx["event_id"],
+        "user_id": ctx["user_id"],
+        "status": ctx["status"],
+        "created_at": datetime.fromisoformat(ctx["created_at"]),
+    }
+
+
+# ——— create_booking ———
+
+async def reserve_seat(orchestrator, ctx):
+    script = orchestrator.redis.register_script(RESERVE_SEAT_LUA)
+    booked = await script(
+        keys=[_counter_key(ctx["event_id"]), marker_key(ctx["saga_id"], "seat")],
+        args=[ctx["capacity"], SAGA_RETENTION, availability.channel(ctx["event_id"])],
+    )
+    if booked == -1:
+        RESERVATIONS.labels("rejected_full").inc()
+        await waiting_room.mark_sold_out(orchestrator.redis, ctx["event_id"])
+        logger.warning(f"Event is full: {ctx['event_id']}. Capacity: {ctx['capacity']}")
+        raise HTTPException(status_code=400, detail="Event is full")
+
+async def return_seat(orchestrator, ctx):
+    script = orchestrator.redis.register_script(RETURN_SEAT_LUA)
+    returned = await script(
+        keys=[_counter_key(ctx["event_id"]), marker_key(ctx["saga_id"], "seat")],
+        args=[availability.channel(ctx["event_id"])],
+    )
+    if returned != -1:
+        RESERVATIONS.labels("rolled_back").inc()
+
+async def record_reservation(orchestrator, ctx):
+    booking = _booking(ctx)
+    await ledger.record(orchestrator.session, ledger.RESERVED, booking, booking["created_at"])
+    logger.info(f"Booking {ctx['booking_id']} created successfully for event_id={ctx['event_id']}")
+
+async def revert_reservation(orchestrator, ctx):
+    await ledger.record(orchestrator.session, ledger.REVERTED, _booking(ctx), datetime.utcnow())
+
+async def place_hold(orchestrator, ctx):
+    if ctx["status"] == schemas.BookingStatus.PENDING.value:
+        ctx["expires_at"] = await holds.place(orchestrator.redis, ctx["booking_id"], ctx["event_id"])
+
+async def drop_hold(orchestrator, ctx):
+    if ctx["status"] == schemas.BookingStatus.PENDING.value:
+        await holds.discard(orchestrator.redis, ctx["booking_id"], ctx["event_id"])
+
+async def take_catalog_seat(orchestrator, ctx):
+    await publish_capacity_delta(
+        orchestrator.redis, ctx["event_id"], -1, marker_key(ctx["saga_id"], "catalog"), SAGA_RETENTION
+    )
+
+async def notify_confirmed(orchestrator, ctx):
+    if ctx["status"] != schemas.BookingStatus.CONFIRMED.value:
+        return
+    await _notify(ctx, ctx.get("event_title", ""), "confirmed")
+
+
+# ——— cancel_booking ———
+
+async def record_cancellation(orchestrator, ctx):
+    await ledger.record(
+        orchestrator.session, ledger.CANCELLED, _booking(ctx), datetime.fromisoformat(ctx["cancelled_at"])
+    )
+
+async def restore_booking(orchestrator, ctx):
+    booking = _booking(ctx)
+    # Lets the event's stats take the cancellation back from the hour it was counted in.
+    booking["cancelled_at"] = datetime.fromisoformat(ctx["cancelled_at"])
+    await ledger.record(orchestrator.session, ledger.RESTORED, booking, datetime.utcnow())
+    if ctx["status"] == schemas.BookingStatus.PENDING.value:
+        await holds.place(orchestrator.redis, ctx["booking_id"], ctx["event_id"])
+
+async def release_seat(orchestrator, ctx):
+    # Last critical step, so it never needs compensating; the guard keeps a
+    # replay from releasing the seat twice.
+    released = await waitlist.release_seat(
+        orchestrator.redis, ctx["event_id"], marker_key(ctx["saga_id"], "released"), SAGA_RETENTION
+    )
+    if released != -1:
+        ctx["seat_transferred"] = bool(released)
+    if ctx.get("seat_transferred"):
+        logger.info(f"Seat from cancelled booking {ctx['booking_id']} handed to the waitlist of event {ctx['event_id']}")
+
+async def return_catalog_seat(orchestrator, ctx):
+    # A seat handed to the waitlist stays taken in the catalog.
+    if ctx.get("seat_transferred"):
+        return
+    await waiting_room.clear_sold_out(orchestrator.redis, ctx["event_id"])
+    await publish_capacity_delta(
+        orchestrator.redis, ctx["event_id"], 1, marker_key(ctx["saga_id"], "catalog"), SAGA_RETENTION
+    )
+
+async def notify_cancelled(orchestrator, ctx):
+    event_info = await get_event_details(ctx["event_id"])
+    await _notify(ctx, event_info.get("title") if event_info else "", "cancelled")
+
+
+async def _notify(ctx, event_title: str, booking_status: str):
+    user_info = await get_user_info(ctx["user_id"])
+    sent = await send_booking_notification(
+        user_info["email"] if user_info else ctx["user_id"],
+        user_info.get("full_name") if user_info else "",
+        event_title,
+        ctx["booking_id"],
+        booking_status
+    )
+    if not sent:
+        raise RuntimeError(f"notification for booking {ctx['booking_id']} not sent")
+
+
+# Step names are stored with in-flight sagas, so they stay as they were when
+# bookings were still deleted on cancellation.
+CREATE_BOOKING = SagaDefinition("create_booking", [
+    SagaStep("reserve_seat", reserve_seat, compensation=return_seat),
+    SagaStep("insert_booking", record_reservation, compensation=revert_reservation),
+    SagaStep("place_hold", place_hold, compensation=drop_hold),
+    SagaStep("catalog_sync", take_catalog_seat, deferred=True, retries=5, backoff=0.5),
+    SagaStep("notify", notify_confirmed, deferred=True, retries=5, backoff=0.5),
+])
+
+CANCEL_BOOKING = SagaDefinition("cancel_booking", [
+    SagaStep("delete_booking", record_cancellation, compensation=restore_booking),
+    SagaStep("release_seat", release_seat),
+    SagaStep("catalog_sync", return_catalog_seat, deferred=True, retries=5, backoff=0.5),
+    SagaStep("notify", notify_cancelled, deferred=True, retries=5, backoff=0.5),
+])
@@ -0,0 +1,39 @@
+import os
+import logging
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# Consumed by event-catalog-service, which coalesces the deltas per event and
+# applies them to Mongo in bulk.
+CAPACITY_STREAM = os.getenv("CAPACITY_STREAM", "catalog:capacity_deltas")
+CAPACITY_STREAM_MAXLEN = int(os.getenv("CAPACITY_STREAM_MAXLEN", "1000000"))
+
+# Publish at most once per guard key so saga replays don't double-count.
+PUBLISH_ONCE_LUA = """
+if not redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[4]) then
+    return false
+end
+return redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[3], '*', 'event_id', ARGV[1], 'delta', ARGV[2])
+"""
+
+async def publish_capacity_delta(redis_client: aioredis.Redis, event_id: str, delta: int, guard_key: str = None, guard_ttl: int = 86400):
+    """
+    Record a change in an event's remaining capacity: -1 for every seat taken,
+    +1 for every seat given back. With a guard key the delta is published at
+    most once for that key.
+    """
+    if delta == 0:
+        return
+    if guard_key:
+        script = redis_client.register_script(PUBLISH_ONCE_LUA)
+        await script(keys=[CAPACITY_STREAM, guard_key], args=[event_id, delta, CAPACITY_STREAM_MAXLEN, guard_ttl])
+    else:
+        await redis_client.xadd(
+            CAPACITY_STREAM,
+            {"event_id": event_id, "delta": delta},
+            maxlen=CAPACITY_STREAM_MAXLEN,
+            approximate=True,
+        )
+    logger.debug(f"Published capacity delta {delta:+d} for event {event_id}")
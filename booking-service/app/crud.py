@@ -1,22 +1,23 @@
-from cassandra.cqlengine.connection import get_session
 from .models import BookingModelCassandra # Assuming you rename/create this
 from .schemas import Booking as BookingSchema, BookingStatus
 from datetime import datetime
 import logging
 import os
 import httpx
+from .metrics import HTTPX_EVENT_HOOKS
+from .async_cassandra import AsyncSession, READ_CONSISTENCY, WRITE_CONSISTENCY
 
 logger = logging.getLogger(__name__)
 NOTIFICATION_SERVICE_URL = "http://notification-service:8003"
 
-async def create_booking(session, booking_data: BookingSchema):
+async def create_booking(session: AsyncSession, booking_data: BookingSchema):
     logger.debug(f"Attempting to create booking in Cassandra: {booking_data}")
     try:
-        insert_statement = session.prepare(
+        insert_statement = await session.prepare(
             f"INSERT INTO {session.keyspace}.bookings (id, event_id, user_id, status, created_at, updated_at) "
             "VALUES (?, ?, ?, ?, ?, ?)"
         )
-        session.execute(
+        await session.execute(
             insert_statement,
             (
                 booking_data.id,
@@ -26,6 +27,7 @@ async def create_booking(session, booking_data: BookingSchema):
                 booking_data.created_at,
                 booking_data.updated_at,
             ),
+            WRITE_CONSISTENCY,
         )
         logger.info(f"Successfully created booking {booking_data.id} in Cassandra.")
         # Send notification to notification service
@@ -41,11 +43,11 @@ async def create_booking(session, booking_data: BookingSchema):
         logger.error(f"Error creating booking in Cassandra: {e}")
         raise
 
-async def get_booking_by_id(session, booking_id: str) -> BookingSchema | None:
+async def get_booking_by_id(session: AsyncSession, booking_id: str) -> BookingSchema | None:
     logger.debug(f"Fetching booking by ID: {booking_id} from Cassandra.")
     try:
-        select_statement = session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE id = ?")
-        row = session.execute(select_statement, (booking_id,)).one()
+        select_statement = await session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE id = ?")
+        row = (await session.execute(select_statement, (booking_id,), READ_CONSISTENCY)).one()
         if row:
             return BookingSchema(**row._asdict()) # Convert Row to dict then to Pydantic model
         return None
@@ -53,33 +55,33 @@ async def get_booking_by_id(session, booking_id: str) -> BookingSchema | None:
         logger.error(f"Error fetching booking by ID {booking_id} from Cassandra: {e}")
         raise
 
-async def get_bookings_by_user(session, user_id: str) -> list[BookingSchema]:
+async def get_bookings_by_user(session: AsyncSession, user_id: str) -> list[BookingSchema]:
     logger.debug(f"Fetching bookings for user_id: {user_id} from Cassandra.")
     try:
-        select_statement = session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE user_id = ?")
-        rows = session.execute(select_statement, (user_id,))
+        select_statement = await session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE user_id = ?")
+        rows = await session.execute(select_statement, (user_id,), READ_CONSISTENCY)
         return [BookingSchema(**row._asdict()) for row in rows]
     except Exception as e:
         logger.error(f"Error fetching bookings for user {user_id} from Cassandra: {e}")
         raise
 
-async def get_bookings_by_event(session, event_id: str) -> list[BookingSchema]:
+async def get_bookings_by_event(session: AsyncSession, event_id: str) -> list[BookingSchema]:
     logger.debug(f"Fetching bookings for event_id: {event_id} from Cassandra.")
     try:
-        select_statement = session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE event_id = ?")
-        rows = session.execute(select_statement, (event_id,))
+        select_statement = await session.prepare(f"SELECT * FROM {session.keyspace}.bookings WHERE event_id = ?")
+        rows = await session.execute(select_statement, (event_id,), READ_CONSISTENCY)
         return [BookingSchema(**row._asdict()) for row in rows]
     except Exception as e:
         logger.error(f"Error fetching bookings for event {event_id} from Cassandra: {e}")
         raise
 
-async def get_booking_by_user_and_event(session, user_id: str, event_id: str) -> BookingSchema | None:
+async def get_booking_by_user_and_event(session: AsyncSession, user_id: str, event_id: str) -> BookingSchema | None:
     logger.debug(f"Fetching booking for user_id: {user_id} and event_id: {event_id}")
     try:
-        select_statement = session.prepare(
+        select_statement = await session.prepare(
             f"SELECT * FROM {session.keyspace}.bookings WHERE user_id = ? AND event_id = ? ALLOW FILTERING"
         )
-        row = session.execute(select_statement, (user_id, event_id)).one()
+        row = (await session.execute(select_statement, (user_id, event_id), READ_CONSISTENCY)).one()
         if row:
             return BookingSchema(**row._asdict())
         return None
@@ -87,7 +89,7 @@ async def get_booking_by_user_and_event(session, user_id: str, event_id: str) ->
         logger.error(f"Error fetching booking for user {user_id} and event {event_id}: {e}")
         raise
 
-async def update_booking_status(session, booking_id: str, status: BookingStatus) -> BookingSchema | None:
+async def update_booking_status(session: AsyncSession, booking_id: str, status: BookingStatus) -> BookingSchema | None:
     logger.debug(f"Updating booking {booking_id} to status {status.value}")
     try:
         # First, fetch the booking to ensure it exists and to get its current state
@@ -96,11 +98,11 @@ async def update_booking_status(session, booking_id: str, status: BookingStatus)
             logger.warning(f"Booking {booking_id} not found for status update.")
             return None
 
-        update_statement = session.prepare(
+        update_statement = await session.prepare(
             f"UPDATE {session.keyspace}.bookings SET status = ?, updated_at = ? WHERE id = ?"
         )
         updated_at_time = datetime.utcnow()
-        session.execute(update_statement, (status.value, updated_at_time, booking_id))
+        await session.execute(update_statement, (status.value, updated_at_time, booking_id), WRITE_CONSISTENCY)
         # Return the updated booking data
         current_booking.status = status
         current_booking.updated_at = updated_at_time
@@ -126,7 +128,7 @@ async def send_notification_to_service(user_id, event_id, booking_id, status, ac
         "content": f"Booking {booking_id} for event {event_id} has been {action} with status {status}."
     }
     try:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS) as client:
             await client.post(f"{NOTIFICATION_SERVICE_URL}/notifications/send", json=payload)
     except Exception as e:
         logger.error(f"Failed to send notification to notification service: {e}")
@@ -1,34 +1,69 @@
 from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
-import redis
+import redis.asyncio as aioredis
+from redis.asyncio.sentinel import Sentinel
+from fastapi import HTTPException, status
 import os
-from dotenv import load_dotenv
 import logging
+import threading
 
-logging.basicConfig(level=logging.INFO)
-
-load_dotenv()
+from .metrics import instrument_cassandra, instrument_redis
+from .async_cassandra import AsyncSession
+from . import ledger
 
 REDIS_URL = os.getenv("REDIS_URL", f"redis://{os.getenv('REDIS_HOST', 'redis_booking')}:{os.getenv('REDIS_PORT', '6379')}/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "200"))
+# Comma-separated host:port list; when set, the master is discovered through
+# Sentinel instead of connecting to REDIS_URL directly.
+REDIS_SENTINELS = os.getenv("REDIS_SENTINELS", "")
+REDIS_SENTINEL_MASTER = os.getenv("REDIS_SENTINEL_MASTER", "mymaster")
 
 CASSANDRA_HOSTS = os.getenv("CASSANDRA_HOSTS", "cassandra_booking").split(",")
 CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "bookingkeyspace") # Added from compose
+# Set to false on replicas whose schema is managed elsewhere to skip the DDL round trips at startup.
+CASSANDRA_MANAGE_SCHEMA = os.getenv("CASSANDRA_MANAGE_SCHEMA", "true").lower() in ("1", "true", "yes")
 
-def get_redis():
-    redis_client = redis.from_url(REDIS_URL)
-    try:
-        yield redis_client
-    finally:
-        redis_client.close()
+_redis_client = None
+
+def _create_redis():
+    if REDIS_SENTINELS:
+        sentinels = [(host, int(port)) for host, port in (s.strip().rsplit(":", 1) for s in REDIS_SENTINELS.split(","))]
+        logging.info(f"Connecting to Redis master '{REDIS_SENTINEL_MASTER}' via Sentinel at {sentinels}")
+        return Sentinel(sentinels).master_for(REDIS_SENTINEL_MASTER, max_connections=REDIS_MAX_CONNECTIONS)
+    logging.info(f"Connecting to Redis at {REDIS_URL}")
+    return aioredis.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+
+def get_redis_client() -> aioredis.Redis:
+    """The process-wide async Redis client; every caller shares its connection pool."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = instrument_redis(_create_redis())
+    return _redis_client
 
-def get_cassandra():
+async def get_redis():
+    return get_redis_client()
+
+async def close_redis():
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+
+def connect_cassandra():
+    """Open a cluster connection and make sure the keyspace and tables exist."""
     logging.info(f"Connecting to Cassandra at hosts: {CASSANDRA_HOSTS}")
     
     cluster = Cluster(CASSANDRA_HOSTS)
     session = cluster.connect()
+    instrument_cassandra(session)
     
     logging.info("Connected to Cassandra cluster")
-    
+
+    if not CASSANDRA_MANAGE_SCHEMA:
+        session.set_keyspace(CASSANDRA_KEYSPACE)
+        logging.info(f"Using keyspace: {CASSANDRA_KEYSPACE}")
+        return cluster, session
+
     session.execute(f"""
         CREATE KEYSPACE IF NOT EXISTS {CASSANDRA_KEYSPACE}
         WITH replication = {{'class': 'SimpleStrategy', 'replication_factor': '1'}}
@@ -49,6 +84,43 @@ def get_cassandra():
         )
     """)
     logging.info("Ensured bookings table exists")
+
+    # Append-only history behind the bookings table. Each partition holds one
+    # event's entries for one bucket of LEDGER_BUCKET_HOURS, and TWCS compacts
+    # in windows of the same width, so a window is written once and left alone.
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CASSANDRA_KEYSPACE}.booking_ledger (
+            event_id text,
+            bucket int,
+            recorded_at timestamp,
+            booking_id text,
+            action text,
+            user_id text,
+            status text,
+            PRIMARY KEY ((event_id, bucket), recorded_at, booking_id, action)
+        ) WITH compaction = {{
+            'class': 'TimeWindowCompactionStrategy',
+            'compaction_window_unit': 'HOURS',
+            'compaction_window_size': {ledger.LEDGER_BUCKET_HOURS}
+        }}
+    """)
+    logging.info("Ensured booking_ledger table exists")
+
+    # The bookings table again, partitioned by user, so a user's bookings for
+    # any set of events come from one partition. Rows written before it
+    # existed are copied in by `python -m app.backfill`.
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CASSANDRA_KEYSPACE}.bookings_by_user (
+            user_id text,
+            event_id text,
+            booking_id text,
+            status text,
+            created_at timestamp,
+            updated_at timestamp,
+            PRIMARY KEY ((user_id), event_id, booking_id)
+        )
+    """)
+    logging.info("Ensured bookings_by_user table exists")
     
     try:
         session.execute(f"""
@@ -61,9 +133,43 @@ def get_cassandra():
     except Exception as e:
         logging.warning(f"Index creation warning (can be ignored if indexes already exist): {str(e)}")
     
-    try:
-        yield session
-    finally:
+    return cluster, session
+
+_cassandra = None
+# Held while connecting, so concurrent first callers share one Cluster
+# instead of each building (and leaking) their own.
+_cassandra_lock = threading.Lock()
+
+def get_cassandra_session() -> AsyncSession:
+    """
+    The process-wide Cassandra session, connected on first use and shared by
+    every caller. Connecting blocks (it includes the schema DDL), so call it
+    off the event loop until the session exists; the readiness step does.
+    """
+    global _cassandra
+    if _cassandra is None:
+        with _cassandra_lock:
+            if _cassandra is None:
+                cluster, session = connect_cassandra()
+                _cassandra = (cluster, AsyncSession(session))
+    return _cassandra[1]
+
+async def get_cassandra():
+    # Requests never connect on the event loop; until the readiness step has
+    # connected, they are turned away like an unready replica would be.
+    if _cassandra is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cassandra is not connected yet",
+            headers={"Retry-After": "1"},
+        )
+    return _cassandra[1]
+
+def close_cassandra():
+    global _cassandra
+    if _cassandra is not None:
+        cluster, session = _cassandra
         logging.info("Closing Cassandra connection")
         session.shutdown()
-        cluster.shutdown()
\ No newline at end of file
+        cluster.shutdown()
+        _cassandra = None
\ No newline at end of file
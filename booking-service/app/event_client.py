@@ -1,79 +1,101 @@
+import os
 import httpx
 import logging
+from collections import OrderedDict
 from .consul_client import ConsulClient
+from .metrics import HTTPX_EVENT_HOOKS
+from .resilience import get_upstream, UpstreamUnavailable, UPSTREAM_TIMEOUT
 
-logging.basicConfig(level=logging.INFO)
 consul_client = ConsulClient()
+event_catalog = get_upstream("event-catalog-service")
 
-async def get_event_details(event_id: str):
-    """Get event details (just to read capacity)."""
-    service = consul_client.get_service("event-catalog-service")
-    if not service:
-        logging.error("Event Catalog service unavailable")
-        return None
+# Last good copy of each event, served by read endpoints while the catalog is unavailable.
+EVENT_FALLBACK_CACHE_SIZE = int(os.getenv("EVENT_FALLBACK_CACHE_SIZE", "10000"))
+_last_known: OrderedDict[str, dict] = OrderedDict()
+
+def _remember(event_id: str, event: dict):
+    _last_known[event_id] = event
+    _last_known.move_to_end(event_id)
+    if len(_last_known) > EVENT_FALLBACK_CACHE_SIZE:
+        _last_known.popitem(last=False)
 
-    url = f"http://{service['host']}:{service['port']}/events/{event_id}"
-    async with httpx.AsyncClient() as client:
-        try:
-            r = await client.get(url)
-            if r.status_code == 200:
-                return r.json()
-            logging.error(f"GET /events/{event_id} → {r.status_code}")
-        except httpx.RequestError as e:
-            logging.error(f"Could not reach Event Catalog: {e}")
+async def get_event_details(event_id: str, stale_ok: bool = False):
+    """
+    Get event details (just to read capacity). With `stale_ok`, fall back to
+    the last copy seen if the catalog is failing or its circuit is open;
+    leave it off where the answer feeds a booking decision.
+    """
+    try:
+        async with event_catalog.call():
+            service = consul_client.get_service("event-catalog-service")
+            if not service:
+                raise UpstreamUnavailable("Event Catalog service unavailable")
+            url = f"http://{service['host']}:{service['port']}/events/{event_id}"
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                r = await client.get(url)
+            if r.status_code >= 500:
+                raise UpstreamUnavailable(f"GET /events/{event_id} → {r.status_code}")
+        if r.status_code == 200:
+            event = r.json()
+            _remember(event_id, event)
+            return event
+        logging.error(f"GET /events/{event_id} → {r.status_code}")
+        return None
+    except (UpstreamUnavailable, httpx.RequestError) as e:
+        logging.error(f"Could not reach Event Catalog: {e}")
+    if stale_ok and event_id in _last_known:
+        logging.warning(f"Serving last known details for event {event_id}")
+        return _last_known[event_id]
     return None
 
+async def get_organizer_events(organizer_id: str):
+    """
+    The organizer's events from the catalog's summary projection, soonest
+    first, or None if the catalog could not answer.
+    """
+    try:
+        async with event_catalog.call():
+            service = consul_client.get_service("event-catalog-service")
+            if not service:
+                raise UpstreamUnavailable("Event Catalog service unavailable")
+            url = f"http://{service['host']}:{service['port']}/events/organizer/{organizer_id}/summary"
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                r = await client.get(url)
+            if r.status_code >= 500:
+                raise UpstreamUnavailable(f"GET /events/organizer/{organizer_id}/summary → {r.status_code}")
+    except (UpstreamUnavailable, httpx.RequestError) as e:
+        logging.error(f"Could not reach Event Catalog: {e}")
+        return None
+    if r.status_code != 200:
+        logging.error(f"GET /events/organizer/{organizer_id}/summary → {r.status_code}")
+        return None
+    return r.json()
+
 async def book_event(event_id: str, jwt_token: str) -> bool:
     """
     Ask the Event Catalog Service to atomically book a seat.
     Pass the user's JWT in the Authorization header so the
     /events/{id}/book endpoint can authenticate & authorize.
     """
-    event_service = consul_client.get_service("event-catalog-service")
-    if not event_service:
-        logging.error("Event Catalog Service not available")
-        return False
-
-    url = f"http://{event_service['host']}:{event_service['port']}/events/{event_id}/book"
     headers = {"Authorization": f"Bearer {jwt_token}"}
+    try:
+        async with event_catalog.call():
+            event_service = consul_client.get_service("event-catalog-service")
+            if not event_service:
+                raise UpstreamUnavailable("Event Catalog Service not available")
+            url = f"http://{event_service['host']}:{event_service['port']}/events/{event_id}/book"
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                response = await client.post(url, headers=headers)
+            if response.status_code >= 500:
+                raise UpstreamUnavailable(f"POST /events/{event_id}/book → {response.status_code}")
+    except (UpstreamUnavailable, httpx.RequestError) as e:
+        logging.error(f"Failed to call book endpoint: {str(e)}")
+        return False
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers)
-            payload = response.json()
-            if response.status_code == 200:
-                logging.info(f"Success: {payload.get('message')}")
-            else:
-                logging.info(f"Failed: {payload.get('message')}")
-
-            return response.status_code == 200
-        except httpx.RequestError as e:
-            logging.error(f"Failed to call book endpoint: {str(e)}")
-            return False
-
+    payload = response.json()
+    if response.status_code == 200:
+        logging.info(f"Success: {payload.get('message')}")
+    else:
+        logging.info(f"Failed: {payload.get('message')}")
+    return response.status_code == 200
 
-async def update_event_capacity_in_catalog(event_id: str, increment: bool = True):
-    """Calls the Event Catalog Service to update event capacity."""
-    event_catalog_service = consul_client.get_service("event-catalog-service")
-    if not event_catalog_service:
-        logging.error("Event Catalog service is not available for capacity update.")
-        return False # Indicate failure
-    
-    service_host = event_catalog_service['host']
-    service_port = event_catalog_service['port']
-    capacity_url = f"http://{service_host}:{service_port}/events/{event_id}/capacity"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            payload = {"increment": increment}
-            response = await client.put(capacity_url, json=payload)
-            
-            if response.status_code == 200:
-                logging.info(f"Successfully updated capacity for event {event_id} (increment: {increment}). Response: {response.json()}")
-                return True # Indicate success
-            else:
-                logging.error(f"Failed to update capacity for event {event_id}. Status: {response.status_code}, Response: {response.text}")
-                return False # Indicate failure
-        except httpx.RequestError as e:
-            logging.error(f"Could not connect to Event Catalog service at {capacity_url} for capacity update: {str(e)}")
-            return False # Indicate failure
@@ -0,0 +1,151 @@
+import os
+import time
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+
+import redis.asyncio as aioredis
+
+from . import schemas, waiting_room, waitlist, ledger
+from .database import get_redis_client, get_cassandra_session
+from .async_cassandra import CHECK_CONSISTENCY
+from .capacity_sync import publish_capacity_delta
+
+logger = logging.getLogger(__name__)
+
+HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", "600"))
+SWEEP_BATCH_SIZE = int(os.getenv("SEAT_HOLD_SWEEP_BATCH_SIZE", "1000"))
+SWEEP_INTERVAL = float(os.getenv("SEAT_HOLD_SWEEP_INTERVAL", "1.0"))
+
+# One sorted set for every live hold, scored by its expiry timestamp, so the
+# sweeper only ever touches holds that are actually due.
+HOLDS_KEY = "holds:expiry"
+
+# Claim up to ARGV[2] holds due at or before ARGV[1]. Claiming and removing in
+# one script keeps several booking-service instances from releasing the same
+# seat twice, and races cleanly with confirm().
+CLAIM_EXPIRED_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+def _member(booking_id: str, event_id: str) -> str:
+    return f"{booking_id}:{event_id}"
+
+
+async def place(redis_client: aioredis.Redis, booking_id: str, event_id: str) -> float:
+    """Start the expiry clock for a held seat; returns the expiry as a Unix timestamp."""
+    expires_at = time.time() + HOLD_TTL_SECONDS
+    await redis_client.zadd(HOLDS_KEY, {_member(booking_id, event_id): expires_at})
+    return expires_at
+
+async def confirm(redis_client: aioredis.Redis, booking_id: str, event_id: str) -> bool:
+    """
+    Take a hold off the expiry clock. Returns False when the sweeper already
+    claimed it, i.e. the hold has expired and its seat was released.
+    """
+    return await redis_client.zrem(HOLDS_KEY, _member(booking_id, event_id)) > 0
+
+# Cancelling a held seat has the same race with the sweeper as confirming it.
+discard = confirm
+
+
+class HoldSweeper:
+    """
+    Background task that releases expired seat holds. Each pass claims a
+    batch of due holds in one script call, records their bookings as
+    expired with concurrent Cassandra writes and hands the seats back with
+    one script call per event.
+    """
+
+    def __init__(self):
+        self._task = None
+        self._redis = None
+        self._session = None
+
+    def start(self):
+        self._redis = get_redis_client()
+        self._session = get_cassandra_session()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Seat hold sweeper started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Seat hold sweeper stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                released = await self.sweep()
+            except Exception as e:
+                logger.error(f"Seat hold sweep failed: {e}")
+                released = 0
+            # A full batch means there is probably more due; go again at once.
+            if released < SWEEP_BATCH_SIZE:
+                await asyncio.sleep(SWEEP_INTERVAL)
+
+    async def sweep(self) -> int:
+        script = self._redis.register_script(CLAIM_EXPIRED_LUA)
+        due = await script(keys=[HOLDS_KEY], args=[time.time(), SWEEP_BATCH_SIZE])
+        if not due:
+            return 0
+
+        expired = [m.decode().split(":", 1) for m in due]
+        # Holds only carry the booking and event; the owner is needed to
+        # update the user's copy of the booking as well.
+        owners = await self._session.execute_concurrent(
+            await self._session.prepare("SELECT user_id FROM bookings WHERE id = ?"),
+            [(booking_id,) for booking_id, _ in expired],
+            CHECK_CONSISTENCY,
+        )
+        resolved, failed = [], []
+        for (booking_id, event_id), (success, owner) in zip(expired, owners):
+            row = owner.one() if success else None
+            if row is None:
+                # Recording the expiry without the owner would leave the
+                # user's copy of the booking pending; try it again later.
+                failed.append((booking_id, event_id))
+            else:
+                resolved.append((booking_id, event_id, row.user_id))
+        results = await ledger.record_many(
+            self._session,
+            ledger.EXPIRED,
+            [
+                {
+                    "id": booking_id,
+                    "event_id": event_id,
+                    "user_id": user_id,
+                    "status": schemas.BookingStatus.PENDING.value,
+                }
+                for booking_id, event_id, user_id in resolved
+            ],
+            datetime.utcnow(),
+        )
+        recorded = []
+        for (booking_id, event_id, _), (success, _) in zip(resolved, results):
+            (recorded if success else failed).append((booking_id, event_id))
+        if failed:
+            # Their bookings still show as pending, which blocks the user from
+            # booking again, so their seats must not be resold yet. Put them
+            # back on the clock, due at once, for the next sweep to retry.
+            await self._redis.zadd(HOLDS_KEY, {_member(booking_id, event_id): time.time() for booking_id, event_id in failed})
+            logger.error(f"Failed to look up or record {len(failed)} expired seat holds; re-queued for the next sweep")
+
+        for event_id, seats in Counter(event_id for _, event_id in recorded).items():
+            _, returned = await waitlist.release_seats(self._redis, event_id, seats)
+            if returned:
+                await waiting_room.clear_sold_out(self._redis, event_id)
+                await publish_capacity_delta(self._redis, event_id, returned)
+
+        logger.info(f"Released {len(recorded)} expired seat holds")
+        # Failures are not counted, so a batch that keeps failing waits for the next interval.
+        return len(recorded)
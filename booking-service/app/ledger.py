@@ -0,0 +1,180 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+
+from cassandra.query import BatchStatement, BatchType, UNSET_VALUE
+
+from .async_cassandra import AsyncSession, READ_CONSISTENCY, WRITE_CONSISTENCY, CHECK_CONSISTENCY, CASSANDRA_CONCURRENCY
+from .schemas import BookingStatus
+from . import stats
+
+logger = logging.getLogger(__name__)
+
+# Width of one ledger partition per event, and of one TWCS compaction window.
+LEDGER_BUCKET_HOURS = int(os.getenv("LEDGER_BUCKET_HOURS", "24"))
+# A history read touches at most this many partitions.
+LEDGER_MAX_SCAN_BUCKETS = int(os.getenv("LEDGER_MAX_SCAN_BUCKETS", "92"))
+
+# What happened to a booking. Every change to a booking is appended to the
+# ledger as one of these, and the `bookings` table is its current state.
+RESERVED = "reserved"
+CONFIRMED = "confirmed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"    # a seat hold ran out before it was confirmed
+REVERTED = "reverted"  # a reservation undone because its saga failed
+RESTORED = "restored"  # a cancellation undone because its saga failed
+
+# Status a booking has after each action; the others keep the status they carry.
+_STATUS_AFTER = {
+    CONFIRMED: BookingStatus.CONFIRMED.value,
+    CANCELLED: BookingStatus.CANCELLED.value,
+    EXPIRED: BookingStatus.CANCELLED.value,
+    REVERTED: BookingStatus.CANCELLED.value,
+}
+
+LEDGER_INSERT_CQL = (
+    "INSERT INTO booking_ledger (event_id, bucket, recorded_at, booking_id, action, user_id, status) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+VIEW_INSERT_CQL = (
+    "INSERT INTO bookings (id, event_id, user_id, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)"
+)
+VIEW_UPDATE_CQL = "UPDATE bookings SET status = ?, updated_at = ? WHERE id = ?"
+VIEW_EXISTS_CQL = "SELECT id FROM bookings WHERE id = ?"
+BY_USER_INSERT_CQL = (
+    "INSERT INTO bookings_by_user (user_id, event_id, booking_id, status, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+BY_USER_UPDATE_CQL = (
+    "UPDATE bookings_by_user SET status = ?, updated_at = ? WHERE user_id = ? AND event_id = ? AND booking_id = ?"
+)
+BY_USER_STATUS_CQL = (
+    "SELECT event_id, booking_id, status, created_at, updated_at FROM bookings_by_user "
+    "WHERE user_id = ? AND event_id IN ?"
+)
+HISTORY_CQL = (
+    "SELECT recorded_at, booking_id, action, user_id, status FROM booking_ledger "
+    "WHERE event_id = ? AND bucket = ? AND recorded_at >= ? AND recorded_at < ?"
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+def bucket_for(ts: datetime) -> int:
+    """Ledger partition of a (naive UTC) timestamp."""
+    return int((ts - _EPOCH).total_seconds() // (LEDGER_BUCKET_HOURS * 3600))
+
+
+async def record(session: AsyncSession, action: str, booking: dict, at: datetime):
+    """
+    Append one entry for `booking` (id, event_id, status, and user_id and
+    created_at where known) and apply it to the `bookings` view and, when
+    the user is known, to `bookings_by_user`, in one logged batch so they
+    cannot disagree. Nothing is ever deleted:
+    cancelling overwrites the status, which leaves no tombstones behind.
+
+    Entries are keyed by (recorded_at, booking_id, action), so a saga step
+    replayed with the timestamp from its context rewrites the same entry.
+    Reverting a booking that was never recorded writes nothing, so a saga
+    may compensate a reservation step whether or not it got as far as the
+    write. The event's counters in `stats` are updated once the batch is
+    written.
+    """
+    if action == REVERTED and not await _exists(session, booking["id"]):
+        # The reservation being undone was never written (its step failed
+        # first); the UPDATE below would upsert a partial `bookings` row.
+        logger.info(f"Nothing to revert for booking {booking['id']}: it was never recorded")
+        return
+    status = _STATUS_AFTER.get(action, booking["status"])
+    user_id = booking.get("user_id")
+    batch = BatchStatement(batch_type=BatchType.LOGGED)
+    batch.add(await session.prepare(LEDGER_INSERT_CQL), (
+        booking["event_id"], bucket_for(at), at, booking["id"], action,
+        UNSET_VALUE if user_id is None else user_id, status,
+    ))
+    if action in (RESERVED, RESTORED):
+        batch.add(await session.prepare(VIEW_INSERT_CQL), (
+            booking["id"], booking["event_id"], user_id, status, booking["created_at"], at,
+        ))
+        batch.add(await session.prepare(BY_USER_INSERT_CQL), (
+            user_id, booking["event_id"], booking["id"], status, booking["created_at"], at,
+        ))
+    else:
+        batch.add(await session.prepare(VIEW_UPDATE_CQL), (status, at, booking["id"]))
+        if user_id is not None:
+            batch.add(await session.prepare(BY_USER_UPDATE_CQL), (
+                status, at, user_id, booking["event_id"], booking["id"],
+            ))
+    await session.execute(batch, None, WRITE_CONSISTENCY)
+    await stats.record(action, booking, at)
+
+async def _exists(session: AsyncSession, booking_id: str) -> bool:
+    rows = await session.execute(await session.prepare(VIEW_EXISTS_CQL), (booking_id,), CHECK_CONSISTENCY)
+    return rows.one() is not None
+
+async def record_many(session: AsyncSession, action: str, bookings: list[dict], at: datetime):
+    """
+    `record` for several bookings with at most CASSANDRA_CONCURRENCY in
+    flight. Returns (success, result_or_exception) per booking, in order.
+    """
+    semaphore = asyncio.Semaphore(CASSANDRA_CONCURRENCY)
+
+    async def run(booking):
+        async with semaphore:
+            try:
+                return True, await record(session, action, booking, at)
+            except Exception as e:
+                return False, e
+
+    return await asyncio.gather(*(run(b) for b in bookings))
+
+
+async def history(session: AsyncSession, event_id: str, since: datetime, until: datetime) -> list[dict]:
+    """
+    Entries recorded for an event in [since, until), oldest first. Reads one
+    partition per bucket in the range, all in flight together.
+    """
+    first, last = bucket_for(since), bucket_for(until)
+    if last - first + 1 > LEDGER_MAX_SCAN_BUCKETS:
+        raise ValueError(
+            f"History range spans {last - first + 1} buckets of {LEDGER_BUCKET_HOURS}h; "
+            f"at most {LEDGER_MAX_SCAN_BUCKETS} may be read at once"
+        )
+    select = await session.prepare(HISTORY_CQL)
+    pages = await asyncio.gather(*(
+        session.execute(select, (event_id, bucket, since, until), READ_CONSISTENCY)
+        for bucket in range(first, last + 1)
+    ))
+    return [
+        {
+            "event_id": event_id,
+            "booking_id": row.booking_id,
+            "user_id": row.user_id,
+            "action": row.action,
+            "status": row.status,
+            "recorded_at": row.recorded_at,
+        }
+        for rows in pages for row in rows
+    ]
+
+async def user_statuses(session: AsyncSession, user_id: str, event_ids: list[str]) -> dict:
+    """
+    The user's active booking for each of `event_ids`, or None, from a single
+    read of the user's `bookings_by_user` partition.
+    """
+    rows = await session.execute(await session.prepare(BY_USER_STATUS_CQL), (user_id, event_ids), READ_CONSISTENCY)
+    statuses = dict.fromkeys(event_ids)
+    for row in rows:
+        if is_active(row):
+            statuses[row.event_id] = {
+                "id": row.booking_id,
+                "event_id": row.event_id,
+                "status": row.status,
+                "created_at": row.created_at,
+                "updated_at": row.updated_at,
+            }
+    return statuses
+
+def is_active(row) -> bool:
+    """Whether a `bookings` row is a live booking rather than the record of a cancelled one."""
+    return row.status != BookingStatus.CANCELLED.value
@@ -1,42 +1,113 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from typing import List, Optional
-from datetime import datetime
-import redis
+from typing import List, Optional, Dict
+from datetime import datetime, timedelta, timezone
+import redis.asyncio as aioredis
 import uuid
 import logging
 import os
-import httpx
+import asyncio
 
-from . import schemas
-from .database import get_redis, get_cassandra
+from . import schemas, waiting_room, waitlist, holds, booking_sagas, ledger, availability, stats
+from .database import get_redis, get_redis_client, get_cassandra, get_cassandra_session, close_redis, close_cassandra
+from .async_cassandra import AsyncSession, READ_CONSISTENCY, CHECK_CONSISTENCY
 from .auth import get_current_user, oauth2_scheme
 from .notification import send_booking_notification
-from .event_client import get_event_details, update_event_capacity_in_catalog
+from .event_client import get_event_details, get_organizer_events
+from .user_client import get_user_info
 from .consul_client import ConsulClient
+from .saga import SagaOrchestrator
+from .metrics import instrument_app, RESERVATIONS
+from .responses import fast_json
+from .tracing import setup_tracing
+from .readiness import Readiness
+from .compression import CompressionMiddleware
 
 app = FastAPI(title="Booking Service")
+instrument_app(app)
+setup_tracing(app, "booking-service")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Most event ids a single booking-status lookup may ask about.
+BOOKING_STATUS_MAX_EVENTS = int(os.getenv("BOOKING_STATUS_MAX_EVENTS", "200"))
+
 consul_client = ConsulClient()
+promotion_worker = waitlist.PromotionWorker()
+hold_sweeper = holds.HoldSweeper()
+availability_hub = availability.AvailabilityHub()
+saga_orchestrator = SagaOrchestrator()
+saga_orchestrator.register(booking_sagas.CREATE_BOOKING)
+saga_orchestrator.register(booking_sagas.CANCEL_BOOKING)
+readiness = Readiness()
 
-@app.on_event("startup")
-async def startup_event():
+async def _connect_cassandra():
+    # Connecting (and the schema check) blocks; keep the event loop free meanwhile.
+    await asyncio.to_thread(get_cassandra_session)
+
+async def _ping_redis():
+    await get_redis_client().ping()
+
+async def _ping_cassandra():
+    await get_cassandra_session().execute("SELECT release_version FROM system.local")
+
+async def _start_workers():
     try:
-        consul_client.register_service()
-        logger.info("Booking Service registered with Consul")
+        saga_orchestrator.start()
     except Exception as e:
-        logger.error(f"Failed to register Booking Service: {e}")
+        logger.error(f"Failed to start saga orchestrator: {e}")
+    try:
+        promotion_worker.start()
+    except Exception as e:
+        logger.error(f"Failed to start waitlist promotion worker: {e}")
+    try:
+        hold_sweeper.start()
+    except Exception as e:
+        logger.error(f"Failed to start seat hold sweeper: {e}")
+    try:
+        availability_hub.start()
+    except Exception as e:
+        logger.error(f"Failed to start availability hub: {e}")
+    try:
+        await stats.mark_since(get_redis_client())
+    except Exception as e:
+        logger.error(f"Failed to mark the start of event stats: {e}")
+
+@app.on_event("startup")
+async def startup_event():
+    if consul_client.register_in_app:
+        try:
+            consul_client.register_service()
+            logger.info("Booking Service registered with Consul")
+        except Exception as e:
+            logger.error(f"Failed to register Booking Service: {e}")
+    # Backends are connected in the background; /health/ready reports when they are warm.
+    readiness.start([
+        ("cassandra", _connect_cassandra),
+        ("redis", _ping_redis),
+        ("workers", _start_workers),
+    ], checks=[
+        ("cassandra", _ping_cassandra),
+        ("redis", _ping_redis),
+    ])
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    try:
-        consul_client.deregister_service()
-        logger.info("Booking Service deregistered from Consul")
-    except Exception as e:
-        logger.error(f"Failed to deregister Booking Service: {e}")
+    await readiness.stop()
+    await availability_hub.stop()
+    await promotion_worker.stop()
+    await hold_sweeper.stop()
+    await saga_orchestrator.stop()
+    await close_redis()
+    close_cassandra()
+    if consul_client.register_in_app:
+        try:
+            consul_client.deregister_service()
+            logger.info("Booking Service deregistered from Consul")
+        except Exception as e:
+            logger.error(f"Failed to deregister Booking Service: {e}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,23 +116,182 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
-@app.post("/bookings", response_model=schemas.Booking)
-async def create_booking(
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and its event loop is answering; says nothing about backends."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Consul's health check: 503 until startup has finished and while any backend ping fails."""
+    if not await readiness.check():
+        response.status_code = 503
+    return readiness.status()
+
+@app.post("/bookings/queue/{event_id}/open")
+async def open_waiting_room(
+    event_id: str,
+    config: schemas.WaitingRoomConfig,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    event = await get_event_details(event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.get("organizer_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this event")
+    await waiting_room.open_room(
+        redis_client,
+        event_id,
+        config.admission_rate or waiting_room.WAITING_ROOM_ADMISSION_RATE,
+        config.burst if config.burst is not None else waiting_room.WAITING_ROOM_BURST,
+    )
+    return {"message": "Waiting room opened"}
+
+@app.delete("/bookings/queue/{event_id}")
+async def close_waiting_room(
+    event_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    event = await get_event_details(event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.get("organizer_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this event")
+    await waiting_room.close_room(redis_client, event_id)
+    return {"message": "Waiting room closed"}
+
+@app.post("/bookings/queue/{event_id}/join", response_model=schemas.QueueTicket)
+async def join_waiting_room(
+    event_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    if await waiting_room.is_sold_out(redis_client, event_id):
+        raise HTTPException(status_code=400, detail="Event is full")
+    ticket = await waiting_room.join(redis_client, event_id, current_user["id"])
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="No waiting room is open for this event")
+    return ticket
+
+@app.get("/bookings/queue/{event_id}/position", response_model=schemas.QueuePosition)
+async def get_queue_position(
+    event_id: str,
+    token: str,
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    # Polled by every waiting client, so deliberately unauthenticated: the
+    # token itself is the capability and the lookup is a single pipeline.
+    position = await waiting_room.get_position(redis_client, event_id, token)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Queue token not found")
+    return position
+
+@app.get("/bookings/availability/stream")
+async def stream_availability(event_ids: str):
+    """
+    Server-sent events with the seat count of each event in the
+    comma-separated `event_ids`: the current count right away, then every
+    change, coalesced per client. Unauthenticated, like the event listing.
+    """
+    ids = list(dict.fromkeys(e.strip() for e in event_ids.split(",") if e.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="event_ids is required")
+    if len(ids) > availability.AVAILABILITY_MAX_EVENTS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {availability.AVAILABILITY_MAX_EVENTS} events per stream"
+        )
+    subscription = await availability_hub.subscribe(ids)
+    return StreamingResponse(
+        availability_hub.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/bookings/waitlist", response_model=schemas.WaitlistEntry)
+async def join_waitlist(
     booking: schemas.BookingCreate,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
-    token: str = Depends(oauth2_scheme),
-    redis_client: redis.Redis = Depends(get_redis),
-    cassandra_session = Depends(get_cassandra)
+    redis_client: aioredis.Redis = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra)
+):
+    event, booked, existing = await asyncio.gather(
+        get_event_details(booking.event_id),
+        redis_client.get(f"booking_count:{booking.event_id}"),
+        _find_user_booking(cassandra_session, current_user["id"], booking.event_id),
+    )
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if int(booked or 0) < event.get("capacity", 0):
+        raise HTTPException(status_code=400, detail="Event still has free seats; book it directly")
+
+    if existing:
+        raise HTTPException(status_code=400, detail="You have already booked this event.")
+
+    position = await waitlist.join(redis_client, booking.event_id, current_user["id"])
+    logger.info(f"User {current_user['id']} joined waitlist for event {booking.event_id} at position {position}")
+    return {"event_id": booking.event_id, "user_id": current_user["id"], "position": position}
+
+@app.get("/bookings/waitlist/{event_id}", response_model=schemas.WaitlistEntry)
+async def get_waitlist_position(
+    event_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    position = await waitlist.get_position(redis_client, event_id, current_user["id"])
+    if position is None:
+        raise HTTPException(status_code=404, detail="Not on the waitlist for this event")
+    return {"event_id": event_id, "user_id": current_user["id"], "position": position}
+
+@app.delete("/bookings/waitlist/{event_id}")
+async def leave_waitlist(
+    event_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    if not await waitlist.leave(redis_client, event_id, current_user["id"]):
+        raise HTTPException(status_code=404, detail="Not on the waitlist for this event")
+    return {"message": "Removed from waitlist"}
+
+async def _find_user_booking(cassandra_session: AsyncSession, user_id: str, event_id: str):
+    rows = await cassandra_session.execute(
+        "SELECT id, status FROM bookings WHERE user_id = %s AND event_id = %s ALLOW FILTERING",
+        (user_id, event_id),
+        CHECK_CONSISTENCY
+    )
+    return next((row for row in rows if ledger.is_active(row)), None)
+
+async def _reserve_seat(
+    booking: schemas.BookingCreate,
+    current_user: dict,
+    redis_client: aioredis.Redis,
+    cassandra_session: AsyncSession,
+    queue_token: Optional[str],
+    booking_status: schemas.BookingStatus
 ):
+    """
+    Take a seat for the user through the create_booking saga. Shared by direct
+    bookings and seat holds; catalog sync and notification run off the
+    request path as deferred saga steps.
+    """
     logger.info(f"Attempting to create booking for event_id={booking.event_id} by user_id={current_user['id']}")
+    RESERVATIONS.labels("attempted").inc()
+
+    await waiting_room.admit(redis_client, booking.event_id, current_user["id"], queue_token)
 
-    event = await get_event_details(booking.event_id)
+    # The catalog lookup and the double-booking check are independent.
+    event, existing_booking = await asyncio.gather(
+        get_event_details(booking.event_id),
+        _find_user_booking(cassandra_session, current_user["id"], booking.event_id),
+    )
     if not event:
         logger.warning(f"Event not found: {booking.event_id}")
         raise HTTPException(status_code=404, detail="Event not found")
@@ -71,214 +301,277 @@ async def create_booking(
         logger.error(f"Event capacity not available for event_id={booking.event_id}")
         raise HTTPException(status_code=500, detail="Event capacity information is missing")
 
-    key = f"booking_count:{booking.event_id}"
-    current_booking_count = redis_client.incr(key)
-
-    if current_booking_count > event_capacity:
-        redis_client.decr(key)  # Rollback Redis increment
-        logger.warning(f"Event is full: {booking.event_id}. Current bookings: {current_booking_count-1}, Capacity: {event_capacity}")
-        raise HTTPException(status_code=400, detail="Event is full")
-
     # Prevent double-booking: check if user already has a booking for this event
-    existing_booking = cassandra_session.execute(
-        "SELECT id FROM bookings WHERE user_id = %s AND event_id = %s ALLOW FILTERING",
-        (current_user["id"], booking.event_id)
-    ).one()
     if existing_booking:
-        redis_client.decr(key)  # Rollback Redis increment
         logger.warning(f"User {current_user['id']} already booked event {booking.event_id}")
         raise HTTPException(status_code=400, detail="You have already booked this event.")
 
-    booking_id = str(uuid.uuid4())
-    new_booking_data = {
-        "id": booking_id,
+    created_at = datetime.utcnow()
+    ctx = await saga_orchestrator.execute("create_booking", {
+        "booking_id": str(uuid.uuid4()),
         "event_id": booking.event_id,
         "user_id": current_user["id"],
-        "status": schemas.BookingStatus.CONFIRMED,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "status": booking_status.value,
+        "capacity": event_capacity,
+        "created_at": created_at.isoformat(),
+        "event_title": event.get("title", ""),
+    })
+    RESERVATIONS.labels("committed").inc()
+
+    # Post-booking cleanup in one round trip.
+    pipe = redis_client.pipeline(transaction=False)
+    waiting_room.consume_token(pipe, booking.event_id, queue_token)
+    waitlist.discard(pipe, booking.event_id, current_user["id"])
+    await pipe.execute()
+    return {
+        "id": ctx["booking_id"],
+        "event_id": booking.event_id,
+        "user_id": current_user["id"],
+        "status": booking_status,
+        "created_at": created_at,
+        "updated_at": created_at,
+        **({"expires_at": datetime.utcfromtimestamp(ctx["expires_at"])} if "expires_at" in ctx else {}),
     }
 
-    try:
-        cassandra_session.execute(
-            """
-            INSERT INTO bookings (id, event_id, user_id, status, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (
-                new_booking_data["id"],
-                new_booking_data["event_id"],
-                new_booking_data["user_id"],
-                new_booking_data["status"].value,
-                new_booking_data["created_at"],
-                new_booking_data["updated_at"]
-            )
-        )
-        logger.info(f"Booking {booking_id} created successfully for event_id={booking.event_id}")
-    except Exception as e:
-        redis_client.decr(key)  # Rollback Redis increment if Cassandra insert fails
-        logger.error(f"Failed to insert booking into Cassandra for event_id={booking.event_id}: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create booking")
+@app.post("/bookings", response_model=schemas.Booking)
+async def create_booking(
+    booking: schemas.BookingCreate,
+    _sold_out_guard: None = Depends(waiting_room.reject_if_sold_out),
+    current_user: dict = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+    redis_client: aioredis.Redis = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra),
+    queue_token: Optional[str] = Header(None, alias="X-Queue-Token")
+):
+    return await _reserve_seat(
+        booking, current_user, redis_client, cassandra_session, queue_token, schemas.BookingStatus.CONFIRMED
+    )
 
-    update_success = await update_event_capacity_in_catalog(booking.event_id, increment=False)
-    if not update_success:
-        redis_client.decr(key)
-        cassandra_session.execute(
-            "DELETE FROM bookings WHERE id = %s",
-            (booking_id,)
-        )
-        logger.error(f"Failed to update event capacity in event-catalog-service for event_id={booking.event_id}. Booking rolled back.")
-        raise HTTPException(status_code=500, detail="Failed to update event capacity. Booking rolled back.")
-
-    AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
-    INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secure-api-key")
-    user_info = None
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{AUTH_SERVICE_URL}/users/{new_booking_data['user_id']}", headers={"X-Internal-API-Key": INTERNAL_API_KEY})
-        if resp.status_code == 200:
-            user_info = resp.json()
-    event_info = event
-    user_email = user_info["email"] if user_info else new_booking_data["user_id"]
-    user_full_name = user_info.get("full_name") if user_info else ""
-    event_title = event_info.get("title") if event_info else ""
+@app.post("/bookings/holds", response_model=schemas.SeatHold)
+async def create_seat_hold(
+    booking: schemas.BookingCreate,
+    _sold_out_guard: None = Depends(waiting_room.reject_if_sold_out),
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra),
+    queue_token: Optional[str] = Header(None, alias="X-Queue-Token")
+):
+    """Reserve a seat as a pending booking that must be confirmed before it expires."""
+    hold = await _reserve_seat(
+        booking, current_user, redis_client, cassandra_session, queue_token, schemas.BookingStatus.PENDING
+    )
+    logger.info(f"Seat held by booking {hold['id']} until {hold['expires_at']}")
+    return hold
+
+@app.post("/bookings/{booking_id}/confirm", response_model=schemas.Booking)
+async def confirm_seat_hold(
+    booking_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra)
+):
+    row = (await cassandra_session.execute(
+        "SELECT id, event_id, user_id, status, created_at FROM bookings WHERE id = %s",
+        (booking_id,),
+        CHECK_CONSISTENCY
+    )).one()
+    if not row or not ledger.is_active(row):
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if row.user_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to confirm this booking")
+    if row.status != schemas.BookingStatus.PENDING.value:
+        raise HTTPException(status_code=400, detail="Booking is not awaiting confirmation")
 
+    if not await holds.confirm(redis_client, booking_id, row.event_id):
+        raise HTTPException(status_code=410, detail="Seat hold has expired")
+
+    updated_at = datetime.utcnow()
+    await ledger.record(cassandra_session, ledger.CONFIRMED, {
+        "id": booking_id,
+        "event_id": row.event_id,
+        "user_id": row.user_id,
+        "status": row.status,
+    }, updated_at)
+    logger.info(f"Seat hold {booking_id} confirmed for event_id={row.event_id}")
+
+    user_info, event_info = await asyncio.gather(get_user_info(row.user_id), get_event_details(str(row.event_id)))
     background_tasks.add_task(
         send_booking_notification,
-        user_email,
-        user_full_name,
-        event_title,
-        new_booking_data["id"],
+        user_info["email"] if user_info else row.user_id,
+        user_info.get("full_name") if user_info else "",
+        event_info.get("title") if event_info else "",
+        booking_id,
         "confirmed"
     )
 
-    return new_booking_data
+    return {
+        "id": booking_id,
+        "event_id": row.event_id,
+        "user_id": row.user_id,
+        "status": schemas.BookingStatus.CONFIRMED,
+        "created_at": row.created_at,
+        "updated_at": updated_at
+    }
+
+def _booking_response(row, event_details: Optional[dict]) -> dict:
+    # Plain dicts in the shape of schemas.BookingResponse: validated once by
+    # the response_model, or written out as-is on the fast JSON path.
+    return {
+        "id": str(row.id),
+        "event_id": str(row.event_id),
+        "user_id": str(row.user_id),
+        "status": row.status,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "event_details": event_details,
+    }
 
 @app.get("/bookings/user/{user_id}", response_model=List[schemas.BookingResponse])
 async def get_user_bookings(
     user_id: str,
     current_user: dict = Depends(get_current_user),
-    cassandra_session = Depends(get_cassandra)
+    cassandra_session: AsyncSession = Depends(get_cassandra)
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to view these bookings")
 
-    rows = cassandra_session.execute(
+    rows = await cassandra_session.execute(
         "SELECT id, event_id, user_id, status, created_at, updated_at FROM bookings WHERE user_id = %s",
-        (user_id,)
+        (user_id,),
+        READ_CONSISTENCY
     )
 
-    result = []
-    for row in rows:
-        event_details = None
-        try:
-            event_details = await get_event_details(str(row.event_id))
-            if event_details is None:
-                logger.warning(f"Could not retrieve details for event_id: {row.event_id} while fetching bookings for user_id: {user_id}")
-        except Exception as e:
-            logger.error(f"Error fetching event details for event_id {row.event_id}: {e}")
-
-        booking_response = schemas.BookingResponse(
-            id=str(row.id),
-            event_id=str(row.event_id),
-            user_id=str(row.user_id),
-            status=row.status,
-            created_at=row.created_at,
-            updated_at=row.updated_at,
-            event_details=event_details
-        )
-        result.append(booking_response)
+    # Cancelled bookings stay in the table with their final status.
+    rows = [row for row in rows if ledger.is_active(row)]
+
+    # One catalog lookup per distinct event, all in flight together.
+    event_ids = list({str(row.event_id) for row in rows})
+    details = await asyncio.gather(*(get_event_details(eid, stale_ok=True) for eid in event_ids), return_exceptions=True)
+    events = {}
+    for eid, event_details in zip(event_ids, details):
+        if isinstance(event_details, Exception):
+            logger.error(f"Error fetching event details for event_id {eid}: {event_details}")
+            event_details = None
+        elif event_details is None:
+            logger.warning(f"Could not retrieve details for event_id: {eid} while fetching bookings for user_id: {user_id}")
+        events[eid] = event_details
 
-    return result
+    return fast_json([_booking_response(row, events[str(row.event_id)]) for row in rows])
 
 @app.get("/bookings/event/{event_id}", response_model=List[schemas.BookingResponse])
 async def get_event_bookings(
     event_id: str,
     current_user: dict = Depends(get_current_user),
-    cassandra_session = Depends(get_cassandra)
+    cassandra_session: AsyncSession = Depends(get_cassandra)
 ):
-    event = await get_event_details(str(event_id))
+    event, rows = await asyncio.gather(
+        get_event_details(str(event_id), stale_ok=True),
+        cassandra_session.execute(
+            "SELECT id, event_id, user_id, status, created_at, updated_at FROM bookings WHERE event_id = %s",
+            (event_id,),
+            READ_CONSISTENCY
+        ),
+    )
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.get("organizer_id") != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to view these bookings")
 
-    rows = cassandra_session.execute(
-        "SELECT id, event_id, user_id, status, created_at, updated_at FROM bookings WHERE event_id = %s",
-        (event_id,)
-    )
+    return fast_json([_booking_response(row, event) for row in rows if ledger.is_active(row)])
 
-    result = []
-    for row in rows:
-        booking_response = schemas.BookingResponse(
-            id=str(row.id),
-            event_id=str(row.event_id),
-            user_id=str(row.user_id),
-            status=row.status,
-            created_at=row.created_at,
-            updated_at=row.updated_at,
-            event_details=event
-        )
-        result.append(booking_response)
+def _naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC, like datetime.utcnow().
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+@app.get("/bookings/event/{event_id}/history", response_model=List[schemas.LedgerEntry])
+async def get_event_booking_history(
+    event_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+    cassandra_session: AsyncSession = Depends(get_cassandra)
+):
+    """Every booking change for an event from `since` (default: a week ago) up to `until` (default: now), in UTC."""
+    event = await get_event_details(str(event_id), stale_ok=True)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.get("organizer_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this history")
+
+    until = _naive_utc(until) if until else datetime.utcnow()
+    since = _naive_utc(since) if since else until - timedelta(days=7)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    try:
+        return await ledger.history(cassandra_session, event_id, since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/bookings/event/{event_id}/stats", response_model=schemas.EventStats)
+async def get_event_booking_stats(
+    event_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    """Booking and cancellation counts for an event, in total and per hour and day (UTC)."""
+    event, event_stats = await asyncio.gather(
+        get_event_details(str(event_id), stale_ok=True),
+        stats.read(redis_client, event_id),
+    )
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.get("organizer_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view these stats")
+    return event_stats
 
-    return result
+@app.get("/bookings/organizer/{organizer_id}/overview")
+async def get_organizer_overview(
+    organizer_id: str,
+    current_user: dict = Depends(get_current_user),
+    redis_client: aioredis.Redis = Depends(get_redis)
+):
+    """
+    Every event of the organizer with its seat count and booking stats, as
+    newline-delimited JSON streamed in the catalog's order (soonest first).
+    """
+    if organizer_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this overview")
+    events = await get_organizer_events(organizer_id)
+    if events is None:
+        raise HTTPException(status_code=503, detail="Event catalog unavailable")
+    return StreamingResponse(stats.overview(redis_client, events), media_type="application/x-ndjson")
 
 @app.delete("/bookings/{booking_id}")
 async def cancel_booking(
     booking_id: str,
-    background_tasks: BackgroundTasks,
     current_user: dict          = Depends(get_current_user),
-    redis_client: redis.Redis   = Depends(get_redis),
-    cassandra_session           = Depends(get_cassandra),
+    redis_client: aioredis.Redis   = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra),
 ):
-    row = cassandra_session.execute(
-        "SELECT event_id, user_id FROM bookings WHERE id = %s",
-        (booking_id,)
-    ).one()
-    if not row:
+    row = (await cassandra_session.execute(
+        "SELECT event_id, user_id, status, created_at FROM bookings WHERE id = %s",
+        (booking_id,),
+        CHECK_CONSISTENCY
+    )).one()
+    if not row or not ledger.is_active(row):
         raise HTTPException(status_code=404, detail="Booking not found")
 
     if row.user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete this booking")
 
-    cassandra_session.execute(
-        "DELETE FROM bookings WHERE id = %s",
-        (booking_id,)
-    )
-
-    key = f"booking_count:{row.event_id}"
-    redis_client.decr(key)
+    # If the sweeper got to a pending hold first, the seat is already released.
+    if row.status == schemas.BookingStatus.PENDING.value and not await holds.discard(redis_client, booking_id, row.event_id):
+        raise HTTPException(status_code=410, detail="Seat hold has already expired")
 
-    update_success = await update_event_capacity_in_catalog(row.event_id, increment=True)
-    if not update_success:
-        redis_client.incr(key)
-        cassandra_session.execute(
-            "INSERT INTO bookings (id, event_id, user_id, status, created_at, updated_at) VALUES (%s, %s, %s, %s, toTimestamp(now()), toTimestamp(now()))",
-            (booking_id, row.event_id, row.user_id, 'confirmed')
-        )
-        logger.error(f"Failed to update event capacity in event-catalog-service for event_id={row.event_id}. Booking cancellation rolled back.")
-        raise HTTPException(status_code=500, detail="Failed to update event capacity. Booking cancellation rolled back.")
-
-    AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
-    INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secure-api-key")
-    user_info = None
-    event_info = None
-    async with httpx.AsyncClient() as client:
-        user_resp = await client.get(f"{AUTH_SERVICE_URL}/users/{row.user_id}", headers={"X-Internal-API-Key": INTERNAL_API_KEY})
-        if user_resp.status_code == 200:
-            user_info = user_resp.json()
-    event_info = await get_event_details(str(row.event_id))
-    user_email = user_info["email"] if user_info else row.user_id
-    user_full_name = user_info.get("full_name") if user_info else ""
-    event_title = event_info.get("title") if event_info else ""
-
-    background_tasks.add_task(
-        send_booking_notification,
-        user_email,
-        user_full_name,
-        event_title,
-        booking_id,
-        "cancelled"
-    )
+    await saga_orchestrator.execute("cancel_booking", {
+        "booking_id": booking_id,
+        "event_id": row.event_id,
+        "user_id": row.user_id,
+        "status": row.status,
+        "created_at": row.created_at.isoformat(),
+        "cancelled_at": datetime.utcnow().isoformat(),
+    })
 
     return {"message": "Booking deleted successfully"}
 
@@ -287,17 +580,21 @@ async def check_user_booking_for_event(
     user_id: str,
     event_id: str,
     current_user: dict = Depends(get_current_user),
-    cassandra_session = Depends(get_cassandra)
+    cassandra_session: AsyncSession = Depends(get_cassandra)
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
-    row = cassandra_session.execute(
-        "SELECT id, event_id, user_id, status, created_at, updated_at FROM bookings WHERE user_id = %s AND event_id = %s ALLOW FILTERING",
-        (user_id, event_id)
-    ).one()
+    result, event_details = await asyncio.gather(
+        cassandra_session.execute(
+            "SELECT id, event_id, user_id, status, created_at, updated_at FROM bookings WHERE user_id = %s AND event_id = %s ALLOW FILTERING",
+            (user_id, event_id),
+            READ_CONSISTENCY
+        ),
+        get_event_details(str(event_id), stale_ok=True),
+    )
+    row = next((row for row in result if ledger.is_active(row)), None)
     if not row:
         return None
-    event_details = await get_event_details(str(row.event_id))
     return schemas.BookingResponse(
         id=str(row.id),
         event_id=str(row.event_id),
@@ -308,23 +605,34 @@ async def check_user_booking_for_event(
         event_details=event_details
     )
 
+@app.post("/bookings/user/{user_id}/status", response_model=Dict[str, Optional[schemas.UserEventBooking]])
+async def get_user_booking_statuses(
+    user_id: str,
+    query: schemas.BookingStatusQuery,
+    current_user: dict = Depends(get_current_user),
+    cassandra_session: AsyncSession = Depends(get_cassandra)
+):
+    """The caller's active booking for each of the given events, or null, keyed by event id."""
+    if user_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view these bookings")
+    event_ids = list(dict.fromkeys(query.event_ids))
+    if len(event_ids) > BOOKING_STATUS_MAX_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {BOOKING_STATUS_MAX_EVENTS} events per request")
+    return await ledger.user_statuses(cassandra_session, user_id, event_ids)
+
 @app.delete("/bookings/user/{user_id}/event/{event_id}")
 async def delete_user_booking_for_event(
     user_id: str,
     event_id: str,
     current_user: dict = Depends(get_current_user),
-    redis_client: redis.Redis = Depends(get_redis),
-    cassandra_session = Depends(get_cassandra),
-    background_tasks: BackgroundTasks = None
+    redis_client: aioredis.Redis = Depends(get_redis),
+    cassandra_session: AsyncSession = Depends(get_cassandra),
 ):
     if user_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete this booking")
-    row = cassandra_session.execute(
-        "SELECT id FROM bookings WHERE user_id = %s AND event_id = %s ALLOW FILTERING",
-        (user_id, event_id)
-    ).one()
+    row = await _find_user_booking(cassandra_session, user_id, event_id)
     if not row:
         raise HTTPException(status_code=404, detail="Booking not found")
     booking_id = str(row.id)
     # Reuse existing cancel logic
-    return await cancel_booking(booking_id, background_tasks, current_user, redis_client, cassandra_session)
+    return await cancel_booking(booking_id, current_user, redis_client, cassandra_session)
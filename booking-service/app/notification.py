@@ -1,17 +1,62 @@
 import os
-from dotenv import load_dotenv
+import asyncio
 import logging
-import pika
 import json
 from datetime import datetime
 
-load_dotenv()
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+
+from .metrics import observe
+from .tracing import tracer
 
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
 RABBITMQ_PORT = os.getenv("RABBITMQ_PORT", "5672")
 RABBITMQ_USER = os.getenv("RABBITMQ_USER", "guest")
 RABBITMQ_PASS = os.getenv("RABBITMQ_PASS", "guest")
 
+def _message(user_email: str, user_full_name: str, event_title: str, booking_id: str, booking_status: str) -> dict:
+    return {
+        "user_id": user_email,
+        "user_email": user_email,
+        "type": f"booking_{booking_status}",
+        "content": f"Dear {user_full_name or 'Valued Customer'}, your booking for event '{event_title}' (Booking ID: {booking_id}) has been {booking_status}.",
+        "status": "PENDING",
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+def _publish(messages: list[dict]):
+    """Publish over one blocking connection and channel; run it off the event loop."""
+    # Imported on first publish rather than at startup; only this path needs it.
+    import pika
+
+    mq_url = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
+    params = pika.URLParameters(mq_url)
+    with tracer.start_as_current_span("notifications publish", kind=SpanKind.PRODUCER) as span, observe("amqp", "publish"):
+        span.set_attribute("messaging.system", "rabbitmq")
+        span.set_attribute("messaging.destination.name", "notifications")
+        span.set_attribute("messaging.batch.message_count", len(messages))
+        # traceparent travels in the AMQP headers to the consumer
+        headers = {}
+        propagate.inject(headers)
+
+        connection = pika.BlockingConnection(params)
+        try:
+            channel = connection.channel()
+            channel.queue_declare(queue="notifications", durable=True)
+            for message in messages:
+                channel.basic_publish(
+                    exchange="",
+                    routing_key="notifications",
+                    body=json.dumps(message),
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,
+                        headers=headers,
+                    )
+                )
+        finally:
+            connection.close()
+
 async def send_booking_notification(
     user_email: str,
     user_full_name: str,
@@ -22,35 +67,27 @@ async def send_booking_notification(
     """
     Send a structured notification directly to the message queue.
     """
-    message_for_mq = {
-        "user_id": user_email,
-        "user_email": user_email,
-        "type": f"booking_{booking_status}",
-        "content": f"Dear {user_full_name or 'Valued Customer'}, your booking for event '{event_title}' (Booking ID: {booking_id}) has been {booking_status}.",
-        "status": "PENDING",
-        "created_at": datetime.utcnow().isoformat()
-    }
-
     try:
-        mq_url = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
-        logging.info(f"Attempting to send notification for booking {booking_id} to RabbitMQ at {mq_url}")
-        params = pika.URLParameters(mq_url)
-        connection = pika.BlockingConnection(params)
-        channel = connection.channel()
-      
-        channel.queue_declare(queue="notifications", durable=True)
-
-        channel.basic_publish(
-            exchange="",
-            routing_key="notifications",
-            body=json.dumps(message_for_mq),
-            properties=pika.BasicProperties(
-                delivery_mode=2,
-            )
-        )
-        connection.close()
+        logging.info(f"Attempting to send notification for booking {booking_id} to RabbitMQ at {RABBITMQ_HOST}:{RABBITMQ_PORT}")
+        # pika blocks; the thread keeps the event loop serving meanwhile.
+        await asyncio.to_thread(_publish, [_message(user_email, user_full_name, event_title, booking_id, booking_status)])
         logging.info(f"Successfully sent booking_{booking_status} notification for booking {booking_id} (User: {user_email}) to message queue.")
         return True
     except Exception as e:
         logging.error(f"Failed to send notification for booking {booking_id} to message queue: {e}")
-        return False
\ No newline at end of file
+        return False
+
+async def send_booking_notifications(notifications: list[tuple]):
+    """
+    Send many notifications, each a (user_email, user_full_name, event_title,
+    booking_id, booking_status) tuple, over a single connection.
+    """
+    if not notifications:
+        return True
+    try:
+        await asyncio.to_thread(_publish, [_message(*n) for n in notifications])
+        logging.info(f"Successfully sent {len(notifications)} booking notifications to message queue.")
+        return True
+    except Exception as e:
+        logging.error(f"Failed to send {len(notifications)} booking notifications to message queue: {e}")
+        return False
@@ -0,0 +1,110 @@
+import os
+import time
+import asyncio
+import logging
+
+from . import STARTED_AT
+
+logger = logging.getLogger(__name__)
+
+READINESS_RETRY_MAX = float(os.getenv("READINESS_RETRY_MAX", "10"))  # seconds between retries of a failed step, at most
+# Once ready, /health/ready pings each backend at most this often; probes in
+# between get the last result, so frequent health checks add no load.
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+
+class Readiness:
+    """
+    Warms up a process's backends after startup without holding up the
+    server. Steps run in order in a background task, each retried with
+    backoff until it succeeds; only when all have succeeded does `ready`
+    turn true. `/health` answers as soon as the process is up, while
+    `/health/ready` waits for this, so traffic only goes to replicas whose
+    pools are warm. The time each step took is kept as a startup profile.
+
+    After that, `check()` pings each backend through the process's own
+    pools and reports the process unhealthy while any ping fails, so that
+    Consul stops routing to it until the backend is reachable again.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.healthy = False
+        self.phases: dict[str, float] = {}
+        self.backends: dict[str, str] = {}
+        self._checks = []
+        self._checked_at = None
+        self._check_lock = asyncio.Lock()
+        self._task = None
+
+    def start(self, steps, checks=()):
+        """
+        `steps` and `checks` are lists of (name, coroutine function) pairs:
+        steps run once at startup, checks on every health check round.
+        """
+        self.phases["boot"] = round(time.monotonic() - STARTED_AT, 3)
+        self._checks = list(checks)
+        self._task = asyncio.create_task(self._run(steps))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, steps):
+        for name, step in steps:
+            start = time.perf_counter()
+            delay = 0.5
+            while True:
+                try:
+                    await step()
+                    break
+                except Exception as e:
+                    logger.warning(f"Startup step {name} failed ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, READINESS_RETRY_MAX)
+            self.phases[name] = round(time.perf_counter() - start, 3)
+        self.ready = True
+        self.healthy = True
+        self._checked_at = time.monotonic()
+        self.backends = {name: "ok" for name, _ in self._checks}
+        profile = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.phases.items())
+        logger.info(f"Ready {time.monotonic() - STARTED_AT:.2f}s after import ({profile})")
+
+    async def check(self) -> bool:
+        """Whether this process can serve traffic, pinging its backends if the last round is stale."""
+        if not self.ready:
+            return False
+        if time.monotonic() - self._checked_at < HEALTH_CHECK_INTERVAL:
+            return self.healthy
+        async with self._check_lock:
+            # Probes that queued behind the lock reuse the round that just ran.
+            if time.monotonic() - self._checked_at >= HEALTH_CHECK_INTERVAL:
+                results = await asyncio.gather(*(self._ping(name, ping) for name, ping in self._checks))
+                self.backends = dict(results)
+                healthy = all(result == "ok" for result in self.backends.values())
+                if healthy != self.healthy:
+                    logger.warning(f"Backends {'recovered' if healthy else 'unavailable'}: {self.backends}")
+                self.healthy = healthy
+                self._checked_at = time.monotonic()
+        return self.healthy
+
+    async def _ping(self, name: str, ping):
+        try:
+            await asyncio.wait_for(ping(), HEALTH_CHECK_TIMEOUT)
+            return name, "ok"
+        except asyncio.TimeoutError:
+            return name, "timeout"
+        except Exception as e:
+            return name, f"error: {e}"
+
+    def status(self) -> dict:
+        if not self.ready:
+            status = "starting"
+        else:
+            status = "ready" if self.healthy else "unavailable"
+        return {"status": status, "backends": self.backends, "startup_seconds": self.phases}
@@ -0,0 +1,170 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+
+from .metrics import CIRCUIT_STATE, UPSTREAM_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Timeout for every call to another service, connect through last byte.
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "5"))
+# The breaker opens once at least CIRCUIT_MIN_CALLS calls fall inside the
+# rolling window and either the failure rate or the slow-call rate reaches
+# its threshold. After CIRCUIT_OPEN_SECONDS it lets CIRCUIT_HALF_OPEN_CALLS
+# probes through; all must succeed for it to close again.
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "30"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "2"))
+CIRCUIT_SLOW_CALL_RATE = float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.8"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "10"))
+CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "3"))
+# At most BULKHEAD_MAX_CONCURRENT calls per upstream at once; a caller waits
+# up to BULKHEAD_MAX_WAIT seconds for a slot before being turned away. Either
+# can be set for one upstream by suffixing its name, e.g.
+# BULKHEAD_MAX_CONCURRENT_AUTH_SERVICE; that wins over the default passed to
+# get_upstream, which wins over these.
+BULKHEAD_MAX_CONCURRENT = int(os.getenv("BULKHEAD_MAX_CONCURRENT", "50"))
+BULKHEAD_MAX_WAIT = float(os.getenv("BULKHEAD_MAX_WAIT", "0.1"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream could not be used: unreachable, failing, or refused by a breaker or bulkhead."""
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+class BulkheadFullError(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._calls: deque[tuple[float, bool, bool]] = deque()  # (finished_at, failed, slow)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        CIRCUIT_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuit for {self.name} {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < CIRCUIT_OPEN_SECONDS:
+                return False
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+            self._probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= CIRCUIT_HALF_OPEN_CALLS:
+                return False
+            self._probes += 1
+        return True
+
+    def release_probe(self):
+        """Hand back a half-open probe that ended without an outcome."""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record(self, duration: float, failed: bool):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open(now)
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= CIRCUIT_HALF_OPEN_CALLS:
+                    self._calls.clear()
+                    self._set_state(CLOSED)
+            return
+        if self.state == OPEN:
+            return
+
+        self._calls.append((now, failed, duration >= CIRCUIT_SLOW_CALL_SECONDS))
+        while self._calls and self._calls[0][0] < now - CIRCUIT_WINDOW_SECONDS:
+            self._calls.popleft()
+        total = len(self._calls)
+        if total < CIRCUIT_MIN_CALLS:
+            return
+        failures = sum(1 for _, f, _ in self._calls if f)
+        slow = sum(1 for _, _, s in self._calls if s)
+        if failures / total >= CIRCUIT_FAILURE_RATE or slow / total >= CIRCUIT_SLOW_CALL_RATE:
+            self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._calls.clear()
+        self._set_state(OPEN)
+
+    def retry_after(self) -> int:
+        return max(1, int(CIRCUIT_OPEN_SECONDS - (time.monotonic() - self._opened_at)) + 1)
+
+
+def _upstream_setting(setting: str, upstream: str, default):
+    return os.getenv(f"{setting}_{upstream.upper().replace('-', '_')}", default)
+
+
+class Upstream:
+    """
+    Circuit breaker and bulkhead for one downstream service. Wrap each call,
+    including its Consul lookup, in `async with upstream.call():`. Any
+    exception raised inside counts as a failure; raise UpstreamUnavailable
+    for responses that mean the service is unhealthy (e.g. 5xx) and let
+    ordinary answers such as 404 return normally.
+    """
+
+    def __init__(self, name: str, max_concurrent: int = None, max_wait: float = None):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.max_concurrent = int(_upstream_setting("BULKHEAD_MAX_CONCURRENT", name, max_concurrent or BULKHEAD_MAX_CONCURRENT))
+        self.max_wait = float(_upstream_setting("BULKHEAD_MAX_WAIT", name, max_wait if max_wait is not None else BULKHEAD_MAX_WAIT))
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+
+    @asynccontextmanager
+    async def call(self):
+        if not self.breaker.allow():
+            UPSTREAM_REJECTIONS.labels(self.name, "circuit_open").inc()
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            UPSTREAM_REJECTIONS.labels(self.name, "bulkhead_full").inc()
+            self.breaker.release_probe()
+            raise BulkheadFullError(f"Too many concurrent calls to {self.name}")
+
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.breaker.record(time.perf_counter() - start, failed=True)
+            raise
+        except BaseException:
+            # Cancelled by our caller; says nothing about the upstream.
+            self.breaker.release_probe()
+            raise
+        else:
+            self.breaker.record(time.perf_counter() - start, failed=False)
+        finally:
+            self._slots.release()
+
+
+_upstreams: dict[str, Upstream] = {}
+
+def get_upstream(name: str, max_concurrent: int = None, max_wait: float = None) -> Upstream:
+    """The process's one Upstream for `name`; the bulkhead sizes only apply when it is first created."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        upstream = _upstreams[name] = Upstream(name, max_concurrent, max_wait)
+    return upstream
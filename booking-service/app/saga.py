@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+
+from fastapi import HTTPException
+
+from .database import get_redis_client, get_cassandra_session
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+SAGA_LOCK_TTL = int(os.getenv("SAGA_LOCK_TTL", "60"))  # seconds without progress before a saga counts as orphaned
+SAGA_RECOVERY_INTERVAL = float(os.getenv("SAGA_RECOVERY_INTERVAL", "10"))
+SAGA_RECOVERY_BATCH = int(os.getenv("SAGA_RECOVERY_BATCH", "100"))
+SAGA_RETENTION = int(os.getenv("SAGA_RETENTION", "86400"))
+SAGA_LOG_MAXLEN = int(os.getenv("SAGA_LOG_MAXLEN", "100000"))
+
+INFLIGHT_KEY = "saga:inflight"
+LOG_STREAM = "saga:log"
+
+def _saga_key(saga_id: str) -> str:
+    return f"saga:{saga_id}"
+
+def _lock_key(saga_id: str) -> str:
+    return f"saga:{saga_id}:lock"
+
+def marker_key(saga_id: str, name: str) -> str:
+    """Per-saga key that steps use to make their Redis side effects idempotent."""
+    return f"saga:{saga_id}:{name}"
+
+
+class SagaStep:
+    """
+    One unit of work in a saga. Critical steps run on the request path and are
+    compensated in reverse order if a later critical step fails; deferred
+    steps run in the background once the critical phase has committed and are
+    retried until they succeed. Both actions and compensations must be safe
+    to run more than once, since recovery may replay them after a crash.
+    """
+
+    def __init__(self, name, action, compensation=None, deferred=False, retries=2, backoff=0.05):
+        self.name = name
+        self.action = action
+        self.compensation = compensation
+        self.deferred = deferred
+        self.retries = retries
+        self.backoff = backoff
+
+class SagaDefinition:
+    def __init__(self, name: str, steps: list[SagaStep]):
+        self.name = name
+        self.critical = [s for s in steps if not s.deferred]
+        self.deferred = [s for s in steps if s.deferred]
+
+
+class SagaOrchestrator:
+    """
+    Runs sagas against the shared Redis and Cassandra clients and keeps a
+    durable step log in Redis: a hash per saga holding its phase, progress and
+    context, the `saga:inflight` sorted set scored by last progress, and an
+    append-only `saga:log` stream of every transition. A recovery loop picks
+    up sagas whose owner stopped making progress, compensating those that
+    died in the critical phase and resuming the deferred steps of the rest.
+    """
+
+    def __init__(self):
+        self.definitions: dict[str, SagaDefinition] = {}
+        self.instance_id = None
+        self.redis = None
+        self.session = None
+        self._recovery_task = None
+        self._background: set[asyncio.Task] = set()
+
+    def register(self, definition: SagaDefinition):
+        self.definitions[definition.name] = definition
+
+    def start(self):
+        # Named here rather than in __init__ so each forked worker gets its own.
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.redis = get_redis_client()
+        self.session = get_cassandra_session()
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+        logger.info(f"Saga orchestrator started as {self.instance_id}")
+
+    async def stop(self):
+        tasks = [t for t in (self._recovery_task, *self._background) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Saga orchestrator stopped")
+
+    async def execute(self, name: str, ctx: dict) -> dict:
+        """
+        Run the critical steps of a saga and return its context. Deferred
+        steps are scheduled in the background. HTTPExceptions raised by a step
+        are business rejections: they are not retried, but everything done so
+        far is compensated before the exception propagates.
+        """
+        definition = self.definitions[name]
+        saga = {
+            "id": str(uuid.uuid4()),
+            "definition": name,
+            "phase": "critical",
+            "state": "running",
+            "started": [],
+            "ctx": ctx,
+        }
+        ctx["saga_id"] = saga["id"]
+        await self._persist(saga, event="begin")
+
+        for step in definition.critical:
+            saga["started"].append(step.name)
+            await self._persist(saga, event=f"start:{step.name}")
+            try:
+                await self._with_retries(saga, step, step.action, step.retries)
+            except Exception as e:
+                logger.error(f"Saga {saga['id']} ({name}) failed at {step.name}: {e}")
+                await self._compensate(saga, definition)
+                if isinstance(e, HTTPException):
+                    raise
+                raise HTTPException(status_code=500, detail=f"Failed to complete {name.replace('_', ' ')}")
+
+        saga["phase"] = "deferred"
+        await self._persist(saga, event="commit")
+        task = asyncio.create_task(self._run_deferred(saga, definition))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return saga["ctx"]
+
+    async def _run_deferred(self, saga: dict, definition: SagaDefinition):
+        for step in definition.deferred:
+            if step.name in saga["started"]:
+                continue
+            try:
+                await self._with_retries(saga, step, step.action, step.retries)
+            except Exception as e:
+                # Leave the saga in flight and let the lock lapse; the
+                # recovery loop will resume from this step later.
+                logger.error(f"Saga {saga['id']} deferred step {step.name} gave up for now: {e}")
+                saga["state"] = "retrying"
+                await self._persist(saga, event=f"stalled:{step.name}", release_lock=True)
+                return
+            saga["started"].append(step.name)
+            await self._persist(saga, event=f"done:{step.name}")
+        saga["state"] = "completed"
+        await self._finish(saga)
+
+    async def _compensate(self, saga: dict, definition: SagaDefinition):
+        saga["state"] = "compensating"
+        await self._persist(saga, event="compensate")
+        steps = {s.name: s for s in definition.critical}
+        for name in reversed(saga["started"]):
+            step = steps.get(name)
+            if step is None or step.compensation is None:
+                continue
+            try:
+                await self._with_retries(saga, step, step.compensation, retries=5)
+            except Exception as e:
+                # Compensations are idempotent, so the recovery loop can safely
+                # try the whole chain again.
+                logger.error(f"Saga {saga['id']} compensation {name} failed: {e}")
+                await self._persist(saga, event=f"compensate_failed:{name}", release_lock=True)
+                return
+        saga["state"] = "compensated"
+        await self._finish(saga)
+
+    async def _with_retries(self, saga: dict, step: SagaStep, fn, retries: int):
+        attempt = 0
+        while True:
+            try:
+                with tracer.start_as_current_span(f"saga {saga['definition']}.{step.name}") as span:
+                    span.set_attribute("saga.id", saga["id"])
+                    span.set_attribute("saga.attempt", attempt)
+                    return await fn(self, saga["ctx"])
+            except HTTPException:
+                raise
+            except Exception as e:
+                if attempt >= retries:
+                    raise
+                delay = step.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+                attempt += 1
+                logger.warning(f"Saga {saga['id']} step {step.name} attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+                await self._heartbeat(saga["id"])
+                await asyncio.sleep(delay)
+
+    async def _persist(self, saga: dict, event: str, release_lock: bool = False):
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(_saga_key(saga["id"]), mapping={
+            "definition": saga["definition"],
+            "phase": saga["phase"],
+            "state": saga["state"],
+            "started": json.dumps(saga["started"]),
+            "ctx": json.dumps(saga["ctx"]),
+            "updated_at": now,
+        })
+        pipe.zadd(INFLIGHT_KEY, {saga["id"]: now})
+        if release_lock:
+            pipe.delete(_lock_key(saga["id"]))
+        else:
+            pipe.set(_lock_key(saga["id"]), self.instance_id, ex=SAGA_LOCK_TTL)
+        pipe.xadd(LOG_STREAM, {"saga_id": saga["id"], "definition": saga["definition"], "event": event},
+                  maxlen=SAGA_LOG_MAXLEN, approximate=True)
+        await pipe.execute()
+
+    async def _heartbeat(self, saga_id: str):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(INFLIGHT_KEY, {saga_id: time.time()})
+        pipe.expire(_lock_key(saga_id), SAGA_LOCK_TTL)
+        await pipe.execute()
+
+    async def _finish(self, saga: dict):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(_saga_key(saga["id"]), mapping={"state": saga["state"], "updated_at": time.time()})
+        pipe.expire(_saga_key(saga["id"]), SAGA_RETENTION)
+        pipe.zrem(INFLIGHT_KEY, saga["id"])
+        pipe.delete(_lock_key(saga["id"]))
+        pipe.xadd(LOG_STREAM, {"saga_id": saga["id"], "definition": saga["definition"], "event": saga["state"]},
+                  maxlen=SAGA_LOG_MAXLEN, approximate=True)
+        await pipe.execute()
+
+    async def _recovery_loop(self):
+        while True:
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Saga recovery pass failed: {e}")
+            await asyncio.sleep(SAGA_RECOVERY_INTERVAL)
+
+    async def recover(self) -> int:
+        """Take over sagas that made no progress for longer than the lock TTL."""
+        cutoff = time.time() - SAGA_LOCK_TTL
+        candidates = await self.redis.zrangebyscore(INFLIGHT_KEY, "-inf", cutoff, start=0, num=SAGA_RECOVERY_BATCH)
+        recovered = 0
+        for raw_id in candidates:
+            saga_id = raw_id.decode()
+            if not await self.redis.set(_lock_key(saga_id), self.instance_id, nx=True, ex=SAGA_LOCK_TTL):
+                continue
+            stored = await self.redis.hgetall(_saga_key(saga_id))
+            if not stored or stored[b"definition"].decode() not in self.definitions:
+                await self.redis.zrem(INFLIGHT_KEY, saga_id)
+                await self.redis.delete(_lock_key(saga_id))
+                continue
+            saga = {
+                "id": saga_id,
+                "definition": stored[b"definition"].decode(),
+                "phase": stored[b"phase"].decode(),
+                "state": stored[b"state"].decode(),
+                "started": json.loads(stored[b"started"]),
+                "ctx": json.loads(stored[b"ctx"]),
+            }
+            definition = self.definitions[saga["definition"]]
+            logger.warning(f"Recovering saga {saga_id} ({saga['definition']}) from phase {saga['phase']}")
+            if saga["phase"] == "critical":
+                await self._compensate(saga, definition)
+            else:
+                saga["state"] = "running"
+                await self._run_deferred(saga, definition)
+            recovered += 1
+        return recovered
@@ -1,10 +1,11 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 from enum import Enum
 import uuid
 
 class BookingStatus(str, Enum):
+    PENDING = "pending"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
 
@@ -44,6 +45,10 @@ class Booking(BaseModel):
             }
         }
 
+class SeatHold(Booking):
+    status: BookingStatus = BookingStatus.PENDING
+    expires_at: datetime
+
 class BookingResponse(BaseModel):
     id: str
     event_id: str
@@ -64,5 +69,55 @@ class BookingResponse(BaseModel):
     class Config:
         from_attributes = True # Changed from orm_mode for Pydantic v2
 
+class BookingStatusQuery(BaseModel):
+    event_ids: List[str] = Field(min_length=1)
+
+class UserEventBooking(BaseModel):
+    id: str
+    event_id: str
+    status: BookingStatus
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class BookingCreateInternal(BookingBase):
-    user_id: str # User ID is provided directly
\ No newline at end of file
+    user_id: str # User ID is provided directly
+
+
+class WaitingRoomConfig(BaseModel):
+    admission_rate: Optional[float] = Field(default=None, gt=0)
+    burst: Optional[int] = Field(default=None, ge=0)
+
+class QueuePosition(BaseModel):
+    event_id: str
+    position: int
+    admitted: bool
+    estimated_wait_seconds: float
+
+class QueueTicket(QueuePosition):
+    token: str
+
+class WaitlistEntry(BaseModel):
+    event_id: str
+    user_id: str
+    position: int
+
+class LedgerEntry(BaseModel):
+    event_id: str
+    booking_id: str
+    user_id: Optional[str] = None
+    action: str
+    status: BookingStatus
+    recorded_at: datetime
+
+class StatsPeriod(BaseModel):
+    period: str
+    bookings: int
+    cancellations: int
+
+class EventStats(BaseModel):
+    event_id: str
+    bookings: int
+    cancellations: int
+    active: int
+    hourly: List[StatsPeriod]
+    daily: List[StatsPeriod]
@@ -0,0 +1,216 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+
+import redis.asyncio as aioredis
+
+from . import database, ledger
+
+logger = logging.getLogger(__name__)
+
+# How long a booking change is remembered, so a saga replaying its step
+# does not count it twice. Matches the saga retention by default.
+STATS_GUARD_TTL = int(os.getenv("STATS_GUARD_TTL", os.getenv("SAGA_RETENTION", "86400")))
+
+# Set by the first instance that maintains the counters; the backfill only
+# counts changes made before it.
+SINCE_KEY = "stats:since"
+BACKFILLED_KEY = "stats:backfilled"
+
+# The organizer overview reads counters for this many events per pipeline,
+# with at most OVERVIEW_CONCURRENCY pipelines in flight.
+OVERVIEW_CHUNK_SIZE = int(os.getenv("OVERVIEW_CHUNK_SIZE", "100"))
+OVERVIEW_CONCURRENCY = int(os.getenv("OVERVIEW_CONCURRENCY", "4"))
+
+BOOKINGS = "bookings"
+CANCELLATIONS = "cancellations"
+METRICS = (BOOKINGS, CANCELLATIONS)
+
+# Apply one change at most once per guard key: the totals hash and the
+# hourly and daily hash of the metric, all in one call. A compensation passes
+# the guard key of the change it takes back as KEYS[5] and is only applied
+# if that change was counted.
+APPLY_ONCE_LUA = """
+if KEYS[5] and redis.call('EXISTS', KEYS[5]) == 0 then
+    return 0
+end
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    return 0
+end
+redis.call('HINCRBY', KEYS[2], ARGV[2], ARGV[3])
+redis.call('HINCRBY', KEYS[3], ARGV[4], ARGV[3])
+redis.call('HINCRBY', KEYS[4], ARGV[5], ARGV[3])
+return 1
+"""
+
+def _totals_key(event_id: str) -> str:
+    return f"stats:{event_id}"
+
+def _timeline_key(event_id: str, metric: str, period: str) -> str:
+    return f"stats:{event_id}:{metric}:{period}"
+
+def _counter_key(event_id: str) -> str:
+    return f"booking_count:{event_id}"
+
+def hour_of(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:00")
+
+def day_of(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+def _undone_by(action: str):
+    """The action a compensation takes back, or None; see APPLY_ONCE_LUA."""
+    return {ledger.REVERTED: ledger.RESERVED, ledger.RESTORED: ledger.CANCELLED}.get(action)
+
+def _guard_key(booking_id: str, action: str, moment: datetime) -> str:
+    return f"stats:applied:{booking_id}:{action}:{moment.isoformat()}"
+
+def change_for(action: str, booking: dict, at: datetime):
+    """
+    (metric, delta, moment) that a ledger action makes to an event's stats, or
+    None. A compensation takes back the change it undoes, at the moment that
+    change was counted, so the timeline never goes negative.
+    """
+    if action == ledger.RESERVED:
+        return BOOKINGS, 1, booking.get("created_at", at)
+    if action == ledger.REVERTED:
+        return BOOKINGS, -1, booking.get("created_at", at)
+    if action in (ledger.CANCELLED, ledger.EXPIRED):
+        return CANCELLATIONS, 1, at
+    if action == ledger.RESTORED:
+        return CANCELLATIONS, -1, booking.get("cancelled_at", at)
+    return None
+
+
+async def record(action: str, booking: dict, at: datetime, redis_client: aioredis.Redis = None):
+    """
+    Count a recorded booking change in the event's counters. Best effort: the
+    ledger is the record, and a change missed here is put right by the
+    backfill, so a Redis failure is logged rather than raised.
+    """
+    change = change_for(action, booking, at)
+    if change is None:
+        return
+    metric, delta, moment = change
+    event_id = booking["event_id"]
+    redis_client = redis_client or database.get_redis_client()
+    keys = [
+        _guard_key(booking["id"], action, moment),
+        _totals_key(event_id),
+        _timeline_key(event_id, metric, "hourly"),
+        _timeline_key(event_id, metric, "daily"),
+    ]
+    undone = _undone_by(action)
+    if undone:
+        # Same moment as the change it undoes; see change_for.
+        keys.append(_guard_key(booking["id"], undone, moment))
+    script = redis_client.register_script(APPLY_ONCE_LUA)
+    try:
+        await script(
+            keys=keys,
+            args=[STATS_GUARD_TTL, metric, delta, hour_of(moment), day_of(moment)],
+        )
+    except Exception as e:
+        logger.error(f"Failed to count {action} of booking {booking['id']} in event {event_id} stats: {e}")
+
+async def mark_since(redis_client: aioredis.Redis):
+    """Note when counting started, unless an earlier instance already did."""
+    await redis_client.set(SINCE_KEY, datetime.utcnow().isoformat(), nx=True)
+
+
+def _timeline(hashes: dict[str, dict]) -> list[dict]:
+    periods = sorted({period for counts in hashes.values() for period in counts})
+    return [
+        {"period": period, **{metric: int(hashes[metric].get(period, 0)) for metric in METRICS}}
+        for period in periods
+    ]
+
+async def read(redis_client: aioredis.Redis, event_id: str) -> dict:
+    """An event's counters in one pipelined round trip; the size of the event does not matter."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(_totals_key(event_id))
+    for metric in METRICS:
+        pipe.hgetall(_timeline_key(event_id, metric, "hourly"))
+        pipe.hgetall(_timeline_key(event_id, metric, "daily"))
+    totals, *timelines = await pipe.execute()
+    decoded = [{k.decode(): int(v) for k, v in counts.items()} for counts in (totals, *timelines)]
+    totals = decoded[0]
+    hourly = {metric: decoded[1 + 2 * i] for i, metric in enumerate(METRICS)}
+    daily = {metric: decoded[2 + 2 * i] for i, metric in enumerate(METRICS)}
+    bookings, cancellations = totals.get(BOOKINGS, 0), totals.get(CANCELLATIONS, 0)
+    return {
+        "event_id": event_id,
+        "bookings": bookings,
+        "cancellations": cancellations,
+        "active": bookings - cancellations,
+        "hourly": _timeline(hourly),
+        "daily": _timeline(daily),
+    }
+
+async def totals(redis_client: aioredis.Redis, event_ids: list[str]) -> list[dict]:
+    """Totals and current seat count of each event, in order, in one pipelined round trip."""
+    pipe = redis_client.pipeline(transaction=False)
+    for event_id in event_ids:
+        pipe.hgetall(_totals_key(event_id))
+        pipe.get(_counter_key(event_id))
+    replies = await pipe.execute()
+    result = []
+    for counts, booked in zip(replies[::2], replies[1::2]):
+        bookings, cancellations = int(counts.get(BOOKINGS.encode(), 0)), int(counts.get(CANCELLATIONS.encode(), 0))
+        result.append({
+            "booked": int(booked or 0),
+            "bookings": bookings,
+            "cancellations": cancellations,
+            "active": bookings - cancellations,
+        })
+    return result
+
+async def overview(redis_client: aioredis.Redis, events: list[dict]):
+    """
+    One JSON line per event of an organizer's catalog summary, with its
+    counters, in the order given. Chunks are read concurrently up to
+    OVERVIEW_CONCURRENCY, and each line goes out as soon as its chunk is in.
+    """
+    semaphore = asyncio.Semaphore(OVERVIEW_CONCURRENCY)
+
+    async def load(chunk):
+        async with semaphore:
+            return await totals(redis_client, [event["_id"] for event in chunk])
+
+    chunks = [events[i:i + OVERVIEW_CHUNK_SIZE] for i in range(0, len(events), OVERVIEW_CHUNK_SIZE)]
+    tasks = [asyncio.create_task(load(chunk)) for chunk in chunks]
+    try:
+        for chunk, task in zip(chunks, tasks):
+            for event, counts in zip(chunk, await task):
+                capacity = event.get("capacity")
+                yield json.dumps({
+                    "event_id": event["_id"],
+                    "title": event.get("title"),
+                    "start_time": event.get("start_time"),
+                    "end_time": event.get("end_time"),
+                    "is_active": event.get("is_active", True),
+                    "capacity": capacity,
+                    "available": None if capacity is None else max(capacity - counts["booked"], 0),
+                    **counts,
+                }) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def add(redis_client: aioredis.Redis, event_id: str, counts: dict):
+    """
+    Add backfilled counts, {metric: {"hourly": {period: n}, "daily": {period: n}}},
+    to an event's counters in one transaction.
+    """
+    pipe = redis_client.pipeline(transaction=True)
+    for metric, timelines in counts.items():
+        total = sum(timelines["daily"].values())
+        if total:
+            pipe.hincrby(_totals_key(event_id), metric, total)
+        for period, periods in timelines.items():
+            for bucket, n in periods.items():
+                pipe.hincrby(_timeline_key(event_id, metric, period), bucket, n)
+    await pipe.execute()
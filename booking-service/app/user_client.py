@@ -0,0 +1,31 @@
+import os
+import logging
+
+import httpx
+
+from .metrics import HTTPX_EVENT_HOOKS
+from .resilience import UpstreamUnavailable, UPSTREAM_TIMEOUT
+# Shares its circuit breaker and bulkhead with the get_current_user dependency.
+from .auth import auth_upstream
+
+AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
+INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secure-api-key")
+
+async def get_user_info(user_id: str):
+    """Fetch a user's profile from the auth service via the internal API."""
+    try:
+        async with auth_upstream.call():
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                resp = await client.get(
+                    f"{AUTH_SERVICE_URL}/users/{user_id}",
+                    headers={"X-Internal-API-Key": INTERNAL_API_KEY}
+                )
+            if resp.status_code >= 500:
+                raise UpstreamUnavailable(f"GET /users/{user_id} → {resp.status_code}")
+    except (UpstreamUnavailable, httpx.RequestError) as e:
+        logging.error(f"Could not reach auth service for user {user_id}: {e}")
+        return None
+    if resp.status_code == 200:
+        return resp.json()
+    logging.warning(f"GET /users/{user_id} → {resp.status_code}")
+    return None
@@ -0,0 +1,164 @@
+import os
+import time
+import uuid
+import logging
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from fastapi import Depends, HTTPException, Request, status
+
+from .database import get_redis
+
+logger = logging.getLogger(__name__)
+
+WAITING_ROOM_ADMISSION_RATE = float(os.getenv("WAITING_ROOM_ADMISSION_RATE", "50"))  # tickets admitted per second
+WAITING_ROOM_BURST = int(os.getenv("WAITING_ROOM_BURST", "100"))  # tickets admitted as soon as the room opens
+WAITING_ROOM_TOKEN_TTL = int(os.getenv("WAITING_ROOM_TOKEN_TTL", "3600"))
+SOLD_OUT_LOCAL_TTL = float(os.getenv("SOLD_OUT_LOCAL_TTL", "1.0"))
+
+# event_id -> monotonic deadline; lets repeated requests for a sold-out event
+# fail without touching Redis at all
+_sold_out_cache: dict[str, float] = {}
+
+
+def _room_key(event_id: str) -> str:
+    return f"waiting_room:{event_id}"
+
+def _seq_key(event_id: str) -> str:
+    return f"waiting_room:{event_id}:seq"
+
+def _tickets_key(event_id: str) -> str:
+    return f"waiting_room:{event_id}:tickets"
+
+def _sold_out_key(event_id: str) -> str:
+    return f"sold_out:{event_id}"
+
+
+async def open_room(redis_client: aioredis.Redis, event_id: str, admission_rate: float, burst: int):
+    """Enable the waiting room for an event, starting the admission clock now."""
+    await redis_client.hset(_room_key(event_id), mapping={
+        "opened_at": time.time(),
+        "rate": admission_rate,
+        "burst": burst,
+    })
+    logger.info(f"Waiting room opened for event {event_id} (rate={admission_rate}/s, burst={burst})")
+
+async def close_room(redis_client: aioredis.Redis, event_id: str):
+    """Disable the waiting room and drop all outstanding tickets."""
+    await redis_client.delete(_room_key(event_id), _seq_key(event_id), _tickets_key(event_id))
+    logger.info(f"Waiting room closed for event {event_id}")
+
+def _admitted_upto(room: dict, now: float) -> int:
+    # The admission watermark is derived from the clock instead of being moved
+    # by a worker: every ticket number at or below it may proceed to booking.
+    opened_at = float(room[b"opened_at"])
+    rate = float(room[b"rate"])
+    burst = int(room[b"burst"])
+    return burst + int(max(0.0, now - opened_at) * rate)
+
+def _position(room: dict, ticket: int, now: float) -> dict:
+    admitted_upto = _admitted_upto(room, now)
+    position = max(0, ticket - admitted_upto)
+    rate = float(room[b"rate"])
+    return {
+        "position": position,
+        "admitted": position == 0,
+        "estimated_wait_seconds": round(position / rate, 1) if rate > 0 and position else 0.0,
+    }
+
+async def join(redis_client: aioredis.Redis, event_id: str, user_id: str):
+    """
+    Hand out a position token for the event's waiting room.
+    Returns None when no waiting room is open for the event.
+    """
+    room = await redis_client.hgetall(_room_key(event_id))
+    if not room:
+        return None
+
+    ticket = await redis_client.incr(_seq_key(event_id))
+    token = str(uuid.uuid4())
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(_tickets_key(event_id), token, f"{ticket}:{user_id}")
+    pipe.expire(_tickets_key(event_id), WAITING_ROOM_TOKEN_TTL)
+    await pipe.execute()
+
+    return {"event_id": event_id, "token": token, **_position(room, ticket, time.time())}
+
+async def get_position(redis_client: aioredis.Redis, event_id: str, token: str):
+    """Current queue position for a token; None if the room or token is unknown."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(_room_key(event_id))
+    pipe.hget(_tickets_key(event_id), token)
+    room, entry = await pipe.execute()
+    if not room or entry is None:
+        return None
+    ticket = int(entry.split(b":", 1)[0])
+    return {"event_id": event_id, **_position(room, ticket, time.time())}
+
+async def admit(redis_client: aioredis.Redis, event_id: str, user_id: str, token: str | None):
+    """
+    Gate a booking attempt behind the waiting room. No-op when the event has
+    no open room; otherwise the token must belong to the user and be admitted.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(_room_key(event_id))
+    pipe.hget(_tickets_key(event_id), token or "")
+    room, entry = await pipe.execute()
+    if not room:
+        return
+
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Waiting room is active for this event; join the queue first"
+        )
+    ticket, owner = entry.decode().split(":", 1)
+    if owner != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Queue token belongs to another user")
+
+    position = _position(room, int(ticket), time.time())
+    if not position["admitted"]:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Not admitted yet; queue position {position['position']}",
+            headers={"Retry-After": str(max(1, int(position["estimated_wait_seconds"])))},
+        )
+
+def consume_token(pipe: Pipeline, event_id: str, token: str | None):
+    """Queue burning a token that was used for a successful booking onto a pipeline."""
+    if token:
+        pipe.hdel(_tickets_key(event_id), token)
+
+
+async def mark_sold_out(redis_client: aioredis.Redis, event_id: str):
+    await redis_client.set(_sold_out_key(event_id), 1)
+    _sold_out_cache[event_id] = time.monotonic() + SOLD_OUT_LOCAL_TTL
+
+async def clear_sold_out(redis_client: aioredis.Redis, event_id: str):
+    await redis_client.delete(_sold_out_key(event_id))
+    _sold_out_cache.pop(event_id, None)
+
+async def is_sold_out(redis_client: aioredis.Redis, event_id: str) -> bool:
+    deadline = _sold_out_cache.get(event_id)
+    if deadline is not None:
+        if deadline > time.monotonic():
+            return True
+        del _sold_out_cache[event_id]
+    if await redis_client.exists(_sold_out_key(event_id)):
+        _sold_out_cache[event_id] = time.monotonic() + SOLD_OUT_LOCAL_TTL
+        return True
+    return False
+
+async def reject_if_sold_out(request: Request, redis_client: aioredis.Redis = Depends(get_redis)):
+    """
+    Dependency declared ahead of authentication on the booking path so that
+    requests for a sold-out event are rejected before the auth round-trip,
+    the catalog fetch and the counter INCR/DECR.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        return
+    event_id = body.get("event_id") if isinstance(body, dict) else None
+    if event_id and await is_sold_out(redis_client, str(event_id)):
+        raise HTTPException(status_code=400, detail="Event is full")
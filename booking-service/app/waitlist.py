@@ -0,0 +1,243 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+
+from . import schemas, waiting_room, ledger, availability
+from .database import get_redis_client, get_cassandra_session
+from .capacity_sync import publish_capacity_delta
+from .event_client import get_event_details
+from .notification import send_booking_notifications
+from .user_client import get_user_info
+
+logger = logging.getLogger(__name__)
+
+PROMOTION_BATCH_SIZE = int(os.getenv("WAITLIST_PROMOTION_BATCH_SIZE", "500"))
+PROMOTION_POLL_INTERVAL = float(os.getenv("WAITLIST_PROMOTION_POLL_INTERVAL", "0.5"))
+# User lookups for a batch's notifications run concurrently, this many at a
+# time, so a large batch stays inside the auth bulkhead.
+PROMOTION_LOOKUP_CONCURRENCY = int(os.getenv("WAITLIST_PROMOTION_LOOKUP_CONCURRENCY", "20"))
+
+PROMOTIONS_KEY = "waitlist:promotions"
+
+def _waitlist_key(event_id: str) -> str:
+    return f"waitlist:{event_id}"
+
+def _counter_key(event_id: str) -> str:
+    return f"booking_count:{event_id}"
+
+# Hand a freed seat to the waitlist if anyone is waiting, otherwise give it
+# back to the counter. Running both branches in one script means a concurrent
+# create_booking can never grab a seat that the waitlist is entitled to.
+# The optional KEYS[4] guard makes the release happen at most once per caller.
+RELEASE_SEAT_LUA = """
+if KEYS[4] and not redis.call('SET', KEYS[4], 1, 'NX', 'EX', ARGV[2]) then
+    return -1
+end
+if redis.call('ZCARD', KEYS[1]) > 0 then
+    redis.call('RPUSH', KEYS[3], ARGV[1])
+    return 1
+end
+redis.call('PUBLISH', ARGV[3], redis.call('DECR', KEYS[2]))
+return 0
+"""
+
+# RELEASE_SEAT_LUA for ARGV[2] seats of one event at once: as many as there
+# are people waiting go to the waitlist, the rest back to the counter.
+# Returns {seats handed to the waitlist, seats returned to the counter}.
+RELEASE_SEATS_LUA = """
+local seats = tonumber(ARGV[2])
+local waitlisted = math.min(seats, redis.call('ZCARD', KEYS[1]))
+for _ = 1, waitlisted do
+    redis.call('RPUSH', KEYS[3], ARGV[1])
+end
+local returned = seats - waitlisted
+if returned > 0 then
+    redis.call('PUBLISH', ARGV[3], redis.call('DECRBY', KEYS[2], returned))
+end
+return {waitlisted, returned}
+"""
+
+# Pop up to ARGV[1] heads of the waitlist for seats already held on their
+# behalf; seats nobody is left to claim go back to the counter.
+PROMOTE_LUA = """
+local wanted = tonumber(ARGV[1])
+local popped = redis.call('ZPOPMIN', KEYS[1], wanted)
+local unclaimed = wanted - (#popped / 2)
+if unclaimed > 0 then
+    redis.call('PUBLISH', ARGV[2], redis.call('DECRBY', KEYS[2], unclaimed))
+end
+return popped
+"""
+
+
+async def join(redis_client: aioredis.Redis, event_id: str, user_id: str) -> int:
+    """Add the user to the event's waitlist (idempotent) and return their 1-based position."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zadd(_waitlist_key(event_id), {user_id: time.time()}, nx=True)
+    pipe.zrank(_waitlist_key(event_id), user_id)
+    _, rank = await pipe.execute()
+    return rank + 1
+
+async def leave(redis_client: aioredis.Redis, event_id: str, user_id: str) -> bool:
+    return await redis_client.zrem(_waitlist_key(event_id), user_id) > 0
+
+def discard(pipe: Pipeline, event_id: str, user_id: str):
+    """Queue removing the user from the waitlist onto a pipeline."""
+    pipe.zrem(_waitlist_key(event_id), user_id)
+
+async def get_position(redis_client: aioredis.Redis, event_id: str, user_id: str):
+    rank = await redis_client.zrank(_waitlist_key(event_id), user_id)
+    return None if rank is None else rank + 1
+
+async def release_seat(redis_client: aioredis.Redis, event_id: str, guard_key: str = None, guard_ttl: int = 86400):
+    """
+    Release one seat of a cancelled booking. Returns 1 when the seat was
+    transferred to the waitlist, in which case the counter and the catalog
+    are left untouched and the promotion worker takes it from here, and 0 when
+    it went back to the counter. With a guard key, a repeated call for the
+    same release is a no-op that returns -1.
+    """
+    script = redis_client.register_script(RELEASE_SEAT_LUA)
+    keys = [_waitlist_key(event_id), _counter_key(event_id), PROMOTIONS_KEY]
+    if guard_key:
+        keys.append(guard_key)
+    return await script(keys=keys, args=[event_id, guard_ttl, availability.channel(event_id)])
+
+async def release_seats(redis_client: aioredis.Redis, event_id: str, seats: int) -> tuple[int, int]:
+    """
+    Release several seats of one event in one call. Returns how many were
+    handed to the waitlist and how many went back to the counter.
+    """
+    script = redis_client.register_script(RELEASE_SEATS_LUA)
+    waitlisted, returned = await script(
+        keys=[_waitlist_key(event_id), _counter_key(event_id), PROMOTIONS_KEY],
+        args=[event_id, seats, availability.channel(event_id)],
+    )
+    return int(waitlisted), int(returned)
+
+
+class PromotionWorker:
+    """
+    Background task that turns freed seats into confirmed bookings for the
+    head of each event's waitlist. Seats released by a burst of cancellations
+    are drained from the promotions list in one go and grouped per event, so
+    each event costs one script call and one concurrent Cassandra write.
+    """
+
+    def __init__(self):
+        self._task = None
+        self._redis = None
+        self._session = None
+
+    def start(self):
+        self._redis = get_redis_client()
+        self._session = get_cassandra_session()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Waitlist promotion worker started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Waitlist promotion worker stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Waitlist promotion batch failed: {e}")
+                processed = 0
+            if processed < PROMOTION_BATCH_SIZE:
+                await asyncio.sleep(PROMOTION_POLL_INTERVAL)
+
+    async def process_batch(self) -> int:
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.lrange(PROMOTIONS_KEY, 0, PROMOTION_BATCH_SIZE - 1)
+        pipe.ltrim(PROMOTIONS_KEY, PROMOTION_BATCH_SIZE, -1)
+        released, _ = await pipe.execute()
+        if not released:
+            return 0
+
+        for event_id, seats in Counter(e.decode() for e in released).items():
+            await self._promote(event_id, seats)
+        return len(released)
+
+    async def _promote(self, event_id: str, seats: int):
+        script = self._redis.register_script(PROMOTE_LUA)
+        popped = await script(
+            keys=[_waitlist_key(event_id), _counter_key(event_id)], args=[seats, availability.channel(event_id)]
+        )
+        heads = [(popped[i].decode(), float(popped[i + 1])) for i in range(0, len(popped), 2)]
+
+        unclaimed = seats - len(heads)
+        if unclaimed:
+            await waiting_room.clear_sold_out(self._redis, event_id)
+            await publish_capacity_delta(self._redis, event_id, unclaimed)
+        if not heads:
+            return
+
+        now = datetime.utcnow()
+        bookings = [
+            {
+                "id": str(uuid.uuid4()),
+                "event_id": event_id,
+                "user_id": user_id,
+                "status": schemas.BookingStatus.CONFIRMED.value,
+                "created_at": now,
+                "joined_at": joined_at,
+            }
+            for user_id, joined_at in heads
+        ]
+        results = await ledger.record_many(self._session, ledger.RESERVED, bookings, now)
+
+        confirmed = []
+        failed = []
+        for booking, (success, _) in zip(bookings, results):
+            (confirmed if success else failed).append(booking)
+
+        if failed:
+            # Put the users back at their original place and re-queue the
+            # seats so the next batch retries them.
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.zadd(_waitlist_key(event_id), {b["user_id"]: b["joined_at"] for b in failed})
+            pipe.rpush(PROMOTIONS_KEY, *([event_id] * len(failed)))
+            await pipe.execute()
+            logger.error(f"Failed to promote {len(failed)} waitlisted users for event {event_id}; re-queued")
+
+        if not confirmed:
+            return
+        logger.info(f"Promoted {len(confirmed)} waitlisted users to confirmed bookings for event {event_id}")
+
+        event = await get_event_details(event_id)
+        event_title = event.get("title") if event else ""
+        semaphore = asyncio.Semaphore(PROMOTION_LOOKUP_CONCURRENCY)
+
+        async def lookup(user_id):
+            async with semaphore:
+                return await get_user_info(user_id)
+
+        users = await asyncio.gather(*(lookup(booking["user_id"]) for booking in confirmed), return_exceptions=True)
+        notifications = []
+        for booking, user_info in zip(confirmed, users):
+            if isinstance(user_info, BaseException):
+                logger.warning(f"Could not look up user {booking['user_id']} for booking {booking['id']}: {user_info}")
+                user_info = None
+            notifications.append((
+                user_info["email"] if user_info else booking["user_id"],
+                user_info.get("full_name") if user_info else "",
+                event_title,
+                booking["id"],
+                "confirmed",
+            ))
+        await send_booking_notifications(notifications)
@@ -0,0 +1,133 @@
+"""
+Fixtures for the booking-service handler microbenchmarks. Cassandra and the
+services booking-service calls are replaced with in-memory fakes, so the
+numbers cover routing, dependency resolution, response validation and JSON
+serialization inside the service and nothing else.
+"""
+import os
+import sys
+import asyncio
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("OTEL_TRACES_EXPORTER", "none")
+
+from app import main  # noqa: E402
+from app.auth import get_current_user  # noqa: E402
+from app.database import get_cassandra, get_redis  # noqa: E402
+
+ROW_COUNTS = [10, 1_000, 100_000]
+USER = {"id": "bench-user", "username": "bench", "email": "bench@example.com", "full_name": "Bench User"}
+
+Row = namedtuple("Row", "id event_id user_id status created_at updated_at")
+
+EVENT = {
+    "_id": "bench-event",
+    "title": "Benchmark event",
+    "description": "Fixture event for handler benchmarks",
+    "location": "Online",
+    "start_time": "2030-01-01T10:00:00",
+    "end_time": "2030-01-01T12:00:00",
+    "capacity": 100_000,
+    "price": 0.0,
+    "organizer_id": USER["id"],
+    "is_active": True,
+    "created_at": "2029-12-01T00:00:00",
+}
+
+
+class FakeResult(list):
+    def one(self):
+        return self[0] if self else None
+
+class FakeSession:
+    """Returns the same rows for every query, like a table holding only them."""
+
+    def __init__(self, rows):
+        self.rows = FakeResult(rows)
+
+    async def execute(self, query, parameters=None, consistency_level=None):
+        return self.rows
+
+
+def make_rows(n: int) -> list[Row]:
+    created = datetime(2030, 1, 1)
+    return [
+        Row(f"booking-{i}", EVENT["_id"], USER["id"], "confirmed", created + timedelta(seconds=i), created + timedelta(seconds=i))
+        for i in range(n)
+    ]
+
+
+def asgi_get(app, path: str, query: str = ""):
+    """Build a coroutine factory that sends one GET straight into the ASGI app."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"authorization", b"Bearer bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def call():
+        response = {"status": None, "body": []}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await app(dict(scope), receive, send)
+        return response["status"], b"".join(response["body"])
+
+    return call
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+def booking_app(monkeypatch):
+    """The real app with its backends swapped for fakes; call .rows(n) to size the table."""
+
+    async def get_event_details(event_id, stale_ok=False):
+        return dict(EVENT)
+
+    monkeypatch.setattr(main, "get_event_details", get_event_details)
+    main.app.dependency_overrides[get_current_user] = lambda: USER
+    main.app.dependency_overrides[get_redis] = lambda: None
+
+    def rows(n: int):
+        session = FakeSession(make_rows(n))
+        main.app.dependency_overrides[get_cassandra] = lambda: session
+        return main.app
+
+    yield rows
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture
+def run(loop):
+    """Run a request coroutine factory once, asserting it succeeded."""
+
+    def run_once(call):
+        status, body = loop.run_until_complete(call())
+        assert status == 200, body[:500]
+        return body
+
+    return run_once
@@ -0,0 +1,20 @@
+import pytest
+
+from conftest import ROW_COUNTS, USER, EVENT, asgi_get
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_get_user_bookings(benchmark, booking_app, run, rows):
+    call = asgi_get(booking_app(rows), f"/bookings/user/{USER['id']}")
+    body = benchmark(run, call)
+    assert body.count(b'"event_details"') == rows
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_get_event_bookings(benchmark, booking_app, run, rows):
+    call = asgi_get(booking_app(rows), f"/bookings/event/{EVENT['_id']}")
+    body = benchmark(run, call)
+    assert body.count(b'"event_details"') == rows
+
+def test_check_user_booking_for_event(benchmark, booking_app, run):
+    call = asgi_get(booking_app(1), f"/bookings/user/{USER['id']}/event/{EVENT['_id']}")
+    benchmark(run, call)
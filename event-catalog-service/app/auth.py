@@ -4,14 +4,11 @@ import logging
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import httpx
-from dotenv import load_dotenv
 from jose import JWTError
 from .consul_client import ConsulClient
+from .metrics import HTTPX_EVENT_HOOKS
+from .resilience import get_upstream, UpstreamUnavailable, CircuitOpenError, BulkheadFullError, UPSTREAM_TIMEOUT
 
-load_dotenv()
-
-# ——— Logging setup ———
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger("auth-dep")
 
 # JWT Configuration
@@ -21,35 +18,42 @@ AUTH_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=AUTH_URL+"/auth/login")
 consul_client = ConsulClient()
+auth_upstream = get_upstream("auth-service")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     auth_service_name = "auth-service"
-    auth_service = consul_client.get_service(auth_service_name)
-    if not auth_service:
-        logger.error(f"{auth_service_name} not found in Consul.")
+    try:
+        async with auth_upstream.call():
+            auth_service = consul_client.get_service(auth_service_name)
+            if not auth_service:
+                logger.error(f"{auth_service_name} not found in Consul.")
+                raise UpstreamUnavailable(f"{auth_service_name} is not available")
+
+            validate_url = f"http://{auth_service['host']}:{auth_service['port']}/users/me"
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                response = await client.get(
+                    validate_url,
+                    headers={"Authorization": f"Bearer {token}"}
+                )
+            if response.status_code >= 500:
+                raise UpstreamUnavailable(f"Auth service returned {response.status_code}")
+    except (CircuitOpenError, BulkheadFullError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(auth_upstream.breaker.retry_after())},
+        )
+    except (UpstreamUnavailable, httpx.RequestError):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"{auth_service_name} is not available"
+            detail="Could not connect to auth service"
         )
-    
-    validate_url = f"http://{auth_service['host']}:{auth_service['port']}/users/me"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                validate_url,
-                headers={"Authorization": f"Bearer {token}"}
-            )
-            if response.status_code == 200:
-                return response.json()
-            logger.warning(f"Auth service validation failed with status {response.status_code}: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        except httpx.RequestError:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Could not connect to auth service"
-            )
+
+    if response.status_code == 200:
+        return response.json()
+    logger.warning(f"Auth service validation failed with status {response.status_code}: {response.text}")
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
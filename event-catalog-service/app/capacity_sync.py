@@ -0,0 +1,135 @@
+import os
+import socket
+import asyncio
+import logging
+from collections import defaultdict
+
+import redis.asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from . import crud
+from .config import settings
+from .database import get_db
+from .invalidation import publish_invalidation
+
+logger = logging.getLogger(__name__)
+
+# Entries a crashed consumer read but never acknowledged are claimed by a live
+# one after this long.
+STALE_PENDING_MS = 60_000
+
+class CapacitySyncConsumer:
+    """
+    Consumes the seat-count deltas booking-service publishes to a Redis stream.
+    Deltas arriving within one window are summed per event and applied with a
+    single bulk write, so a hot on-sale costs one Mongo update per event per
+    window instead of one per booking. Delivery is at-least-once: entries are
+    acknowledged only after the bulk write succeeds. Each event's update
+    records the entry ids it applied, so a redelivered entry is applied
+    only once.
+    """
+
+    def __init__(self):
+        self.db = None
+        self.consumer = None
+        self._redis = None
+        self._task = None
+
+    async def start(self):
+        # Named here rather than in __init__ so each forked worker gets its own.
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.db = get_db()
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        try:
+            await self._redis.xgroup_create(settings.CAPACITY_STREAM, settings.CAPACITY_SYNC_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Capacity sync consumer {self.consumer} started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            await self._redis.close()
+        logger.info("Capacity sync consumer stopped")
+
+    async def _run(self):
+        # Anything this consumer name read before a restart comes first.
+        try:
+            while pending := await self._read("0", block_ms=None):
+                await self._apply(pending)
+        except Exception as e:
+            logger.error(f"Replaying pending capacity deltas failed: {e}")
+        while True:
+            try:
+                await self._apply(await self._claim_stale())
+                await self._apply(await self._collect_window())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Capacity sync batch failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _read(self, stream_id: str, block_ms, count: int = None):
+        response = await self._redis.xreadgroup(
+            settings.CAPACITY_SYNC_GROUP,
+            self.consumer,
+            {settings.CAPACITY_STREAM: stream_id},
+            count=count or settings.CAPACITY_SYNC_BATCH,
+            block=block_ms,
+        )
+        return response[0][1] if response else []
+
+    async def _collect_window(self):
+        # Block until the first delta arrives, then keep reading until the
+        # coalescing window closes or the batch is full.
+        entries = await self._read(">", block_ms=settings.CAPACITY_SYNC_WINDOW_MS)
+        if not entries:
+            return entries
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CAPACITY_SYNC_WINDOW_MS / 1000
+        while len(entries) < settings.CAPACITY_SYNC_BATCH:
+            remaining_ms = int((deadline - loop.time()) * 1000)
+            if remaining_ms <= 0:
+                break
+            more = await self._read(">", block_ms=remaining_ms, count=settings.CAPACITY_SYNC_BATCH - len(entries))
+            if not more:
+                break
+            entries.extend(more)
+        return entries
+
+    async def _claim_stale(self):
+        response = await self._redis.xautoclaim(
+            settings.CAPACITY_STREAM,
+            settings.CAPACITY_SYNC_GROUP,
+            self.consumer,
+            min_idle_time=STALE_PENDING_MS,
+            count=settings.CAPACITY_SYNC_BATCH,
+        )
+        return response[1]
+
+    async def _apply(self, entries):
+        if not entries:
+            return
+        deltas = defaultdict(list)
+        for entry_id, fields in entries:
+            if fields and "event_id" in fields:
+                deltas[fields["event_id"]].append((entry_id, int(fields["delta"])))
+        # Idempotent per entry: if we die before the ack, the redelivered
+        # entries are recognised and skipped rather than counted again.
+        modified = await crud.apply_capacity_deltas(self.db, deltas)
+        await self._redis.xack(settings.CAPACITY_STREAM, settings.CAPACITY_SYNC_GROUP, *[entry_id for entry_id, _ in entries])
+        await publish_invalidation(*deltas)
+        try:
+            await crud.clear_applied_deltas(self.db, deltas)
+        except Exception as e:
+            # Only leaves a few ids on the events; they are never redelivered.
+            logger.warning(f"Failed to clear applied capacity delta ids: {e}")
+        logger.info(f"Applied {len(entries)} capacity deltas as {modified} event updates")
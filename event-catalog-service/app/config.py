@@ -8,6 +8,23 @@ class Settings(BaseSettings):
     AUTH_SERVICE_URL: str = "http://auth-service:8000"
     BOOKING_SERVICE_URL: str = "http://booking-service:8002"
     MONGODB_URL: str = os.getenv("MONGO_DETAILS", "mongodb://mongo_event:27017/eventcatalogdb")
+    REDIS_URL: str = f"redis://{os.getenv('REDIS_HOST', 'redis_booking')}:{os.getenv('REDIS_PORT', '6379')}/0"
+    CAPACITY_STREAM: str = "catalog:capacity_deltas"
+    CAPACITY_SYNC_GROUP: str = "event-catalog-service"
+    CAPACITY_SYNC_WINDOW_MS: int = 200
+    CAPACITY_SYNC_BATCH: int = 5000
+    # Serve list endpoints through app/responses.py instead of response_model
+    FAST_JSON_RESPONSES: bool = False
+    # Publish changed event ids so api-gateway can purge its response cache
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_CHANNEL: str = "catalog:invalidations"
+    # Per-worker cache of single-event lookups; writes invalidate it at once,
+    # the TTL bounds staleness if another worker's invalidation is lost
+    EVENT_CACHE_ENABLED: bool = True
+    EVENT_CACHE_TTL_MS: int = 1000
+    EVENT_CACHE_MAX_ENTRIES: int = 10000
+    # Most events GET /events/organizer/{id}/summary returns
+    ORGANIZER_SUMMARY_LIMIT: int = 5000
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,18 @@
 import consul
 import os
-from dotenv import load_dotenv
+import socket
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from .tracing import tracer
+
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+def _default_address() -> str:
+    """This container's own IP, so replicas of one service get distinct entries."""
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return os.getenv("SERVICE_NAME", socket.gethostname())
 
 class ConsulClient:
     def __init__(self):
@@ -15,6 +20,11 @@ class ConsulClient:
         self.consul_port = int(os.getenv("CONSUL_PORT", "8500"))
         self.service_name = os.getenv("SERVICE_NAME", "event-catalog-service")
         self.service_port = int(os.getenv("SERVICE_PORT", "8001"))
+        self.service_address = os.getenv("SERVICE_ADDRESS") or _default_address()
+        # One entry per running instance (container), whatever its worker count.
+        self.service_id = os.getenv("SERVICE_ID", f"{self.service_name}-{socket.gethostname()}-{self.service_port}")
+        # gunicorn.conf.py registers once from the master process and turns this off for its workers.
+        self.register_in_app = os.getenv("CONSUL_REGISTER_IN_APP", "true").lower() in ("1", "true", "yes")
         self.consul = consul.Consul(host=self.consul_host, port=self.consul_port)
 
     def register_service(self):
@@ -22,17 +32,33 @@ class ConsulClient:
         try:
             self.consul.agent.service.register(
                 name=self.service_name,
-                service_id=f"{self.service_name}-{self.service_port}",
-                address=self.service_name,
+                service_id=self.service_id,
+                address=self.service_address,
                 port=self.service_port,
                 tags=["api", "events"],
+                # Liveness only fails when the process is gone, so only it may
+                # drop the instance: one that died without deregistering.
+                check={
+                    "http": f"http://{self.service_address}:{self.service_port}/health/live",
+                    "interval": "10s",
+                    "timeout": "5s",
+                    "DeregisterCriticalServiceAfter": "1m"
+                }
+            )
+            # Readiness decides routing (lookups ask for passing instances) and
+            # never deregisters, so an instance that loses a backend for a
+            # while is back in rotation as soon as it recovers.
+            self.consul.agent.check.register(
+                f"{self.service_name} ready",
+                check_id=f"{self.service_id}:ready",
+                service_id=self.service_id,
                 check={
-                    "http": f"http://{self.service_name}:{self.service_port}/health",
+                    "http": f"http://{self.service_address}:{self.service_port}/health/ready",
                     "interval": "10s",
                     "timeout": "5s"
                 }
             )
-            logger.info(f"Successfully registered {self.service_name} with Consul")
+            logger.info(f"Successfully registered {self.service_name} with Consul as {self.service_id}")
         except Exception as e:
             logger.error(f"Failed to register service with Consul: {str(e)}")
             raise
@@ -40,7 +66,9 @@ class ConsulClient:
     def get_service(self, service_name: str):
         """Get service details from Consul"""
         try:
-            _, services = self.consul.health.service(service_name, passing=True)
+            with tracer.start_as_current_span("consul lookup") as span:
+                span.set_attribute("consul.service", service_name)
+                _, services = self.consul.health.service(service_name, passing=True)
             if services:
                 service = services[0]
                 return {
@@ -55,7 +83,7 @@ class ConsulClient:
     def deregister_service(self):
         """Deregister the service from Consul"""
         try:
-            self.consul.agent.service.deregister(f"{self.service_name}-{self.service_port}")
+            self.consul.agent.service.deregister(self.service_id)
             logger.info(f"Successfully deregistered {self.service_name} from Consul")
         except Exception as e:
             logger.error(f"Failed to deregister service from Consul: {str(e)}")
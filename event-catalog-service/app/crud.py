@@ -1,9 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
 from . import models, schemas
+from .event_cache import event_cache
 from datetime import datetime
 from bson import ObjectId
 
 async def get_event(db: AsyncIOMotorDatabase, event_id: str):
+    # Identical lookups share one query and its result for a moment; see app/event_cache.py.
+    return await event_cache.get(event_id, lambda: _find_event(db, event_id))
+
+async def _find_event(db: AsyncIOMotorDatabase, event_id: str):
     # Convert event_id to ObjectId if possible
     query_id = event_id
     try:
@@ -54,10 +60,12 @@ async def update_event(db: AsyncIOMotorDatabase, event_id: str, event: schemas.E
             {"_id": event_id},
             {"$set": update_data}
         )
+        event_cache.invalidate(event_id)
     return await get_event(db, event_id)
 
 async def delete_event(db: AsyncIOMotorDatabase, event_id: str):
     result = await db.events.delete_one({"_id": event_id})
+    event_cache.invalidate(event_id)
     return result.deleted_count > 0
 
 async def search_events(db: AsyncIOMotorDatabase, query: str):
@@ -80,6 +88,83 @@ async def update_event_capacity(db: AsyncIOMotorDatabase, event_id: str, increme
         {"$inc": {"capacity": 1 if increment else -1}},
         return_document=True
     )
+    event_cache.invalidate(event_id)
     if result and "_id" in result and not isinstance(result["_id"], str):
         result["_id"] = str(result["_id"])
     return result
+
+# Stream entry ids of capacity deltas applied to an event but not yet
+# acknowledged; see apply_capacity_deltas.
+APPLIED_DELTAS_FIELD = "capacity_sync_applied"
+
+def _event_query_id(event_id: str):
+    try:
+        return ObjectId(event_id)
+    except Exception:
+        return event_id
+
+async def apply_capacity_deltas(db: AsyncIOMotorDatabase, deltas: dict[str, list[tuple[str, int]]]):
+    """
+    Apply coalesced per-event capacity changes with a single unordered bulk
+    write. `deltas` maps each event to its (stream entry id, delta) pairs.
+    Each event's update adds only the entries whose ids it has not applied
+    yet and records those ids in the same atomic update, so a redelivered
+    entry is never counted twice. Clear the ids with clear_applied_deltas
+    once the entries are acknowledged.
+    """
+    operations = []
+    for event_id, entries in deltas.items():
+        if not entries:
+            continue
+        applied = {"$ifNull": [f"${APPLIED_DELTAS_FIELD}", []]}
+        new = {"$filter": {
+            "input": {"$literal": [{"id": entry_id, "delta": delta} for entry_id, delta in entries]},
+            "cond": {"$not": [{"$in": ["$$this.id", applied]}]},
+        }}
+        operations.append(UpdateOne({"_id": _event_query_id(event_id)}, [
+            {"$set": {"_capacity_sync_new": new}},
+            {"$set": {
+                "capacity": {"$add": [{"$ifNull": ["$capacity", 0]}, {"$sum": "$_capacity_sync_new.delta"}]},
+                APPLIED_DELTAS_FIELD: {"$concatArrays": [applied, "$_capacity_sync_new.id"]},
+            }},
+            {"$unset": "_capacity_sync_new"},
+        ]))
+    if not operations:
+        return 0
+    result = await db.events.bulk_write(operations, ordered=False)
+    event_cache.invalidate(*deltas)
+    return result.modified_count
+
+async def clear_applied_deltas(db: AsyncIOMotorDatabase, deltas: dict[str, list[tuple[str, int]]]):
+    """Forget the entry ids apply_capacity_deltas recorded, once they can no longer be redelivered."""
+    operations = [
+        UpdateOne({"_id": _event_query_id(event_id)}, {"$pull": {APPLIED_DELTAS_FIELD: {"$in": [entry_id for entry_id, _ in entries]}}})
+        for event_id, entries in deltas.items()
+        if entries
+    ]
+    if operations:
+        await db.events.bulk_write(operations, ordered=False)
+
+async def get_organizer_summary(db: AsyncIOMotorDatabase, organizer_id: str, is_active: bool = None, limit: int = 5000):
+    """
+    The organizer's events, soonest first, cut down to the fields an overview
+    needs. Filtering, sorting and projecting all run inside Mongo, so only the
+    small documents cross the wire and no _id needs converting here.
+    """
+    match = {"organizer_id": organizer_id}
+    if is_active is not None:
+        match["is_active"] = is_active
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"start_time": 1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": {"$toString": "$_id"},
+            "title": 1,
+            "start_time": 1,
+            "end_time": 1,
+            "capacity": 1,
+            "is_active": 1,
+        }},
+    ]
+    return await db.events.aggregate(pipeline).to_list(length=limit)
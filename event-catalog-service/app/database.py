@@ -1,11 +1,32 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .metrics import MongoCommandMetrics
 
-client = AsyncIOMotorClient(settings.MONGODB_URL)
-db = client[settings.MONGODB_URL.split("/")[-1]]
+# Created on first use, inside the worker process, rather than at import.
+_client = None
+
+def get_db():
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[MongoCommandMetrics()])
+    return _client[settings.MONGODB_URL.split("/")[-1]]
+
+async def ping_database():
+    await get_db().command("ping")
+
+async def ensure_indexes():
+    # Serves the organizer filter of GET /events/ and the organizer summary,
+    # which also sorts by start time.
+    await get_db().events.create_index([("organizer_id", 1), ("start_time", 1)])
+
+def close_database():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
 
 async def get_database():
     try:
-        yield db
+        yield get_db()
     finally:
         pass
\ No newline at end of file
@@ -0,0 +1,135 @@
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+import redis.asyncio as aioredis
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventCache:
+    """
+    Per-worker cache of single-event lookups. Concurrent misses for the same
+    event share one load (single flight), and a loaded event, or its absence,
+    is kept for EVENT_CACHE_TTL_MS so a burst of reads during an on-sale
+    costs one Mongo query per worker per TTL rather than one per request.
+
+    Writes in this worker invalidate synchronously. Each load in flight is a
+    version of its key: invalidating detaches it, so callers that were
+    already waiting still get its answer but it is never stored, and the
+    next caller starts a fresh load that sees the write. Writes in other
+    workers and instances arrive over the invalidation channel; the TTL
+    bounds how stale a read can be if one of those messages is lost.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple] = OrderedDict()  # event_id -> (expires_at, event)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get(self, event_id: str, loader):
+        if not settings.EVENT_CACHE_ENABLED:
+            return await loader()
+        entry = self._entries.get(event_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(event_id)
+            return _copy(entry[1])
+
+        flight = self._inflight.get(event_id)
+        if flight is None:
+            flight = asyncio.create_task(self._load(event_id, loader))
+            # Every waiter may be gone by the time a load fails.
+            flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._inflight[event_id] = flight
+        # A caller going away must not cancel the load for everyone else.
+        return _copy(await asyncio.shield(flight))
+
+    async def _load(self, event_id: str, loader):
+        flight = asyncio.current_task()
+        try:
+            event = await loader()
+            if self._inflight.get(event_id) is flight:
+                self._put(event_id, event)
+            return event
+        finally:
+            if self._inflight.get(event_id) is flight:
+                del self._inflight[event_id]
+
+    def _put(self, event_id: str, event):
+        self._entries[event_id] = (time.monotonic() + settings.EVENT_CACHE_TTL_MS / 1000, event)
+        self._entries.move_to_end(event_id)
+        while len(self._entries) > settings.EVENT_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *event_ids: str):
+        for event_id in event_ids:
+            self._entries.pop(event_id, None)
+            self._inflight.pop(event_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+
+def _copy(event):
+    # Callers may add to or change what they get; the cached dict stays as loaded.
+    return dict(event) if event is not None else None
+
+event_cache = EventCache()
+
+
+class EventCacheListener:
+    """
+    Applies the invalidations every catalog worker publishes after a write
+    to this worker's cache, so a write served by one worker is seen by the
+    others without waiting for the TTL.
+    """
+
+    def __init__(self, cache: EventCache):
+        self.cache = cache
+        self._redis = None
+        self._task = None
+
+    async def start(self):
+        if not (settings.EVENT_CACHE_ENABLED and settings.CACHE_INVALIDATION_ENABLED):
+            return
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Event cache listening for invalidations on {settings.CACHE_INVALIDATION_CHANNEL}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            await self._redis.close()
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                    # Anything published while we were not subscribed is lost.
+                    self.cache.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event cache invalidation listener failed: {e}; retrying")
+                await asyncio.sleep(1)
+
+    def handle(self, data: str):
+        payload = json.loads(data)
+        if payload.get("all"):
+            self.cache.clear()
+            return
+        self.cache.invalidate(*payload.get("event_ids", []))
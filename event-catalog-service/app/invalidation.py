@@ -0,0 +1,35 @@
+import json
+import logging
+
+import redis.asyncio as aioredis
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+async def publish_invalidation(*event_ids: str):
+    """
+    Tell gateway caches that these events (and any list or search page that
+    may include them) changed. Best effort: a lost message only means an entry
+    lives out its TTL.
+    """
+    if not settings.CACHE_INVALIDATION_ENABLED or not event_ids:
+        return
+    try:
+        await _get_redis().publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps({"event_ids": list(event_ids)}))
+    except Exception as e:
+        logger.warning(f"Failed to publish cache invalidation for {len(event_ids)} events: {e}")
+
+async def close_invalidation():
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
@@ -1,35 +1,65 @@
 import http
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from . import crud, schemas, auth
-from .database import get_database, db as default_db
+from .database import get_database, ping_database, ensure_indexes, close_database
+from .config import settings
 from typing import List, Optional, Annotated
 import logging
 from .consul_client import ConsulClient
+from .capacity_sync import CapacitySyncConsumer
+from .metrics import instrument_app
+from .responses import fast_json
+from .invalidation import publish_invalidation, close_invalidation
+from .tracing import setup_tracing
+from .readiness import Readiness
+from .compression import CompressionMiddleware
+from .event_cache import EventCacheListener, event_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Event Catalog Service")
+instrument_app(app)
+setup_tracing(app, "event-catalog-service")
 
 consul_client = ConsulClient()
+capacity_sync_consumer = CapacitySyncConsumer()
+readiness = Readiness()
+event_cache_listener = EventCacheListener(event_cache)
 
 @app.on_event("startup")
 async def startup_event():
-    try:
-        consul_client.register_service()
-        logger.info("Service registered with Consul")
-    except Exception as e:
-        logger.error(f"Failed to register service with Consul: {str(e)}")
+    if consul_client.register_in_app:
+        try:
+            consul_client.register_service()
+            logger.info("Service registered with Consul")
+        except Exception as e:
+            logger.error(f"Failed to register service with Consul: {str(e)}")
+    # Mongo and Redis are connected in the background; /health/ready reports when they are warm.
+    readiness.start([
+        ("mongo", ping_database),
+        ("indexes", ensure_indexes),
+        ("capacity_sync", capacity_sync_consumer.start),
+        ("event_cache", event_cache_listener.start),
+    ], checks=[
+        ("mongo", ping_database),
+    ])
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    try:
-        consul_client.deregister_service()
-        logger.info("Service deregistered from Consul")
-    except Exception as e:
-        logger.error(f"Failed to deregister service from Consul: {str(e)}")
+    await readiness.stop()
+    await capacity_sync_consumer.stop()
+    await event_cache_listener.stop()
+    await close_invalidation()
+    close_database()
+    if consul_client.register_in_app:
+        try:
+            consul_client.deregister_service()
+            logger.info("Service deregistered from Consul")
+        except Exception as e:
+            logger.error(f"Failed to deregister service from Consul: {str(e)}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,12 +68,25 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for Consul"""
+    """Basic health check; Consul uses /health/ready"""
     return {"status": "healthy"}
 
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and its event loop is answering; says nothing about backends."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Consul's health check: 503 until startup has finished and while any backend ping fails."""
+    if not await readiness.check():
+        response.status_code = 503
+    return readiness.status()
+
 @app.get("/events/", response_model=List[schemas.Event])
 async def read_events(
     skip: int = 0,
@@ -53,7 +96,19 @@ async def read_events(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     events = await crud.get_events(db, skip=skip, limit=limit, organizer_id=organizer_id, is_active=is_active)
-    return events
+    return fast_json(events, List[schemas.Event])
+
+@app.get("/events/organizer/{organizer_id}/summary", response_model=List[schemas.EventSummary])
+async def read_organizer_summary(
+    organizer_id: str,
+    is_active: Optional[bool] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """The organizer's events with only the fields needed for an overview, soonest first."""
+    events = await crud.get_organizer_summary(
+        db, organizer_id, is_active=is_active, limit=settings.ORGANIZER_SUMMARY_LIMIT
+    )
+    return fast_json(events, List[schemas.EventSummary])
 
 @app.get("/events/{event_id}", response_model=schemas.Event)
 async def read_event(event_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
@@ -68,7 +123,9 @@ async def create_event(
     db: AsyncIOMotorDatabase = Depends(get_database),
     current_user: dict = Depends(auth.get_current_user)
 ):
-    return await crud.create_event(db=db, event=event, organizer_id=current_user["id"])
+    created = await crud.create_event(db=db, event=event, organizer_id=current_user["id"])
+    await publish_invalidation(str(created["_id"]))
+    return created
 
 @app.get("/events/search", response_model=List[schemas.Event])
 async def search_events(
@@ -76,7 +133,7 @@ async def search_events(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     events = await crud.search_events(db, query)
-    return events
+    return fast_json(events, List[schemas.Event])
 
 @app.put("/events/{event_id}/capacity", response_model=schemas.Event)
 async def update_event_capacity(
@@ -91,6 +148,7 @@ async def update_event_capacity(
     updated_event = await crud.update_event_capacity(db, event_id, increment=capacity_update.increment)
     if updated_event is None:
         raise HTTPException(status_code=400, detail="Could not update event capacity or event not found")
+    await publish_invalidation(event_id)
     return updated_event
 
 
@@ -109,6 +167,7 @@ async def update_event(
     updated_event = await crud.update_event(db=db, event_id=event_id, event=event)
     if updated_event is None:
         raise HTTPException(status_code=404, detail="Event not found or update failed")
+    await publish_invalidation(event_id)
     return updated_event
 
 @app.delete("/events/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -125,3 +184,4 @@ async def delete_event(
     success = await crud.delete_event(db=db, event_id=event_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete event")
+    await publish_invalidation(event_id)
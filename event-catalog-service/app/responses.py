@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+from .config import settings
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+def fast_json(content, model=None):
+    """
+    Serialize `content` for the fast path, or hand it back untouched so the
+    response_model applies as usual. Without `model` the content must already
+    match the response schema and is written straight out with orjson; with
+    `model` it is validated once through a cached TypeAdapter and dumped by
+    pydantic-core, which also drops fields the schema does not declare.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    if model is None:
+        return ORJSONResponse(content)
+    adapter = type_adapter(model)
+    return Response(adapter.dump_json(adapter.validate_python(content), by_alias=True), media_type="application/json")
@@ -3,7 +3,6 @@ from typing import Optional, Any
 from pydantic import BaseModel, Field
 
 
-
 class EventBase(BaseModel):
     title: str
     description: str
@@ -61,4 +60,16 @@ class Event(BaseModel):
     model_config = {
         "populate_by_name": True,
         "arbitrary_types_allowed": True,
+    }
+
+class EventSummary(BaseModel):
+    id: str = Field(alias="_id")
+    title: str
+    start_time: datetime
+    end_time: datetime
+    capacity: int
+    is_active: bool = True
+
+    model_config = {
+        "populate_by_name": True,
     }
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Fixtures for the event-catalog-service handler microbenchmarks. Mongo is
+replaced with an in-memory collection, so the numbers cover routing,
+response validation and JSON serialization inside the service and nothing
+else.
+"""
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("OTEL_TRACES_EXPORTER", "none")
+
+from app import main  # noqa: E402
+from app.database import get_database  # noqa: E402
+
+ROW_COUNTS = [10, 1_000, 100_000]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self._skip = 0
+        self._limit = 0
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        end = self._skip + self._limit if self._limit else None
+        return [dict(doc) for doc in self.docs[self._skip:end]]
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query=None, *args, **kwargs):
+        return FakeCursor(self.docs)
+
+    async def find_one(self, query=None, *args, **kwargs):
+        return dict(self.docs[0]) if self.docs else None
+
+class FakeDatabase:
+    def __init__(self, docs):
+        self.events = FakeCollection(docs)
+
+
+def make_events(n: int) -> list[dict]:
+    start = datetime(2030, 1, 1, 10)
+    return [
+        {
+            "_id": f"{i:024x}",
+            "title": f"Event {i}",
+            "description": "Fixture event for handler benchmarks",
+            "location": "Online",
+            "start_time": start + timedelta(days=i % 365),
+            "end_time": start + timedelta(days=i % 365, hours=2),
+            "capacity": 100,
+            "price": 10.0,
+            "organizer_id": f"organizer-{i % 50}",
+            "is_active": True,
+            "created_at": start - timedelta(days=30),
+            "updated_at": start - timedelta(days=30),
+        }
+        for i in range(n)
+    ]
+
+
+def asgi_get(app, path: str, query: str = ""):
+    """Build a coroutine factory that sends one GET straight into the ASGI app."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def call():
+        response = {"status": None, "body": []}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await app(dict(scope), receive, send)
+        return response["status"], b"".join(response["body"])
+
+    return call
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+def catalog_app():
+    """The real app backed by an in-memory events collection; call it with a row count."""
+
+    def rows(n: int):
+        db = FakeDatabase(make_events(n))
+        main.app.dependency_overrides[get_database] = lambda: db
+        return main.app
+
+    yield rows
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture
+def run(loop):
+    """Run a request coroutine factory once, asserting it succeeded."""
+
+    def run_once(call):
+        status, body = loop.run_until_complete(call())
+        assert status == 200, body[:500]
+        return body
+
+    return run_once
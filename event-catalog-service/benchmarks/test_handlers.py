@@ -0,0 +1,14 @@
+import pytest
+
+from conftest import ROW_COUNTS, asgi_get
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_read_events(benchmark, catalog_app, run, rows):
+    call = asgi_get(catalog_app(rows), "/events/", f"limit={rows}")
+    body = benchmark(run, call)
+    assert body.count(b'"organizer_id"') == rows
+
+def test_read_event(benchmark, catalog_app, run):
+    call = asgi_get(catalog_app(1), f"/events/{0:024x}")
+    benchmark(run, call)
@@ -0,0 +1,53 @@
+"""
+Production launcher: `gunicorn -c gunicorn.conf.py app.main:app`.
+
+Runs WEB_CONCURRENCY uvicorn workers (default: one per CPU core) on one
+socket. With PRELOAD_APP the app is imported once in the master and the
+workers are forked from it, sharing those pages copy-on-write; connection
+pools are still opened inside each worker, after the fork, and shared by
+all requests that worker serves. The master process registers the instance
+in Consul once and deregisters it on exit.
+"""
+import os
+import shutil
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('SERVICE_PORT', '8001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Set to recycle workers after this many requests; the jitter keeps them
+# from all restarting at once.
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+
+# app/metrics.py aggregates the workers' samples from this directory.
+# Cleared on every start so counters from a previous run do not leak in.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# The master registers this instance once; workers must not, or a worker
+# restart would deregister the whole instance.
+os.environ["CONSUL_REGISTER_IN_APP"] = "false"
+
+def when_ready(server):
+    from app.consul_client import ConsulClient
+    try:
+        ConsulClient().register_service()
+    except Exception as e:
+        server.log.error(f"Failed to register service with Consul: {str(e)}")
+
+def on_exit(server):
+    from app.consul_client import ConsulClient
+    try:
+        ConsulClient().deregister_service()
+    except Exception as e:
+        server.log.error(f"Failed to deregister service from Consul: {str(e)}")
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
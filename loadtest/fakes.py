@@ -0,0 +1,167 @@
+"""
+In-process stand-ins for the services booking-service talks to besides Redis
+and Cassandra, so the flash-sale benchmark runs on a laptop without the full
+compose stack.
+
+- Consul: just enough of the HTTP API for python-consul2 (register,
+  deregister, passing health lookup).
+- auth-service: accepts any bearer token of the form `loadtest-<user id>`.
+- event-catalog-service: serves the events the harness registers.
+- RabbitMQ: a broker that keeps published notifications in memory; it is
+  swapped in for `send_booking_notification` rather than spoken to over AMQP.
+"""
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+
+TOKEN_PREFIX = "loadtest-"
+
+def token_for(user_id: str) -> str:
+    return f"{TOKEN_PREFIX}{user_id}"
+
+def _user(user_id: str) -> dict:
+    return {
+        "id": user_id,
+        "username": f"user{user_id}",
+        "email": f"user{user_id}@loadtest.local",
+        "full_name": f"Load Test {user_id}",
+        "is_active": True,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+class FakeConsul:
+    def __init__(self):
+        self.services: dict[str, dict] = {}
+        self.app = FastAPI()
+
+        @self.app.put("/v1/agent/service/register")
+        async def register(request: Request):
+            # python-consul2 sends lowercase keys; Consul itself accepts either.
+            body = {k.lower(): v for k, v in (await request.json()).items()}
+            self.services[body.get("id", body["name"])] = body
+            return Response(status_code=200)
+
+        @self.app.put("/v1/agent/service/deregister/{service_id}")
+        async def deregister(service_id: str):
+            self.services.pop(service_id, None)
+            return Response(status_code=200)
+
+        @self.app.get("/v1/health/service/{name}")
+        async def health(name: str, response: Response):
+            response.headers["X-Consul-Index"] = "1"
+            return [
+                {"Service": {"ID": service_id, "Service": s["name"], "Address": s["address"], "Port": s["port"]}}
+                for service_id, s in self.services.items() if s["name"] == name
+            ]
+
+    def add(self, name: str, port: int):
+        self.services[name] = {"name": name, "address": "127.0.0.1", "port": port}
+
+
+class FakeAuth:
+    def __init__(self):
+        self.app = FastAPI()
+
+        @self.app.get("/users/me")
+        async def me(authorization: str = Header("")):
+            token = authorization.removeprefix("Bearer ")
+            if not token.startswith(TOKEN_PREFIX):
+                raise HTTPException(status_code=401, detail="Could not validate credentials")
+            return _user(token[len(TOKEN_PREFIX):])
+
+        @self.app.get("/users/{user_id}")
+        async def get_user(user_id: str):
+            return _user(user_id)
+
+
+class FakeCatalog:
+    def __init__(self):
+        self.events: dict[str, dict] = {}
+        self.app = FastAPI()
+
+        @self.app.get("/events/{event_id}")
+        async def get_event(event_id: str):
+            event = self.events.get(event_id)
+            if not event:
+                raise HTTPException(status_code=404, detail="Event not found")
+            return event
+
+    def add_event(self, event_id: str, capacity: int, organizer_id: str = "organizer") -> dict:
+        start = datetime.utcnow() + timedelta(days=30)
+        self.events[event_id] = {
+            "_id": event_id,
+            "title": f"Flash sale {event_id[:8]}",
+            "description": "Load test event",
+            "location": "Online",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=2)).isoformat(),
+            "capacity": capacity,
+            "price": 0,
+            "organizer_id": organizer_id,
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        return self.events[event_id]
+
+
+class FakeBroker:
+    """Collects booking notifications instead of publishing them to RabbitMQ."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+
+    async def send_booking_notification(self, user_email, user_full_name, event_title, booking_id, booking_status):
+        self.messages.append({
+            "user_email": user_email,
+            "type": f"booking_{booking_status}",
+            "booking_id": booking_id,
+            "event_title": event_title,
+        })
+        return True
+
+
+class ServerThread:
+    """
+    Serves a set of ASGI apps on localhost from one background event loop, so
+    the blocking Redis and Cassandra calls inside booking-service do not stall
+    the load generator.
+    """
+
+    def __init__(self):
+        self._servers: list[uvicorn.Server] = []
+        self._running = []
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="loadtest-servers", daemon=True)
+
+    def add(self, app, port: int, lifespan: str = "off"):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, lifespan=lifespan, log_level="warning")
+        self._servers.append(uvicorn.Server(config))
+
+    def start(self, timeout: float = 30.0):
+        self._thread.start()
+        self._running = [asyncio.run_coroutine_threadsafe(s.serve(), self._loop) for s in self._servers]
+        deadline = time.monotonic() + timeout
+        while not all(s.started for s in self._servers):
+            failed = [f for f in self._running if f.done()]
+            if failed:
+                failed[0].result()
+                raise RuntimeError("An in-process server exited during startup")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out starting in-process servers")
+            time.sleep(0.05)
+
+    def stop(self, timeout: float = 30.0):
+        for server in self._servers:
+            server.should_exit = True
+        for running in self._running:
+            try:
+                running.result(timeout)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,299 @@
+"""
+Flash-sale benchmark for the booking hot path.
+
+Many users try to book the same event at once through `POST /bookings`. The
+run reports throughput and latency percentiles and then checks that the
+event was not oversold: no more bookings than seats, the Redis seat counter
+agreeing with the rows in Cassandra, one booking per user, and (once the
+deferred saga steps have drained) one catalog capacity delta and one
+notification per booking.
+
+By default booking-service runs in this process against in-process fakes for
+Consul, auth-service, event-catalog-service and RabbitMQ; only Redis and
+Cassandra are real:
+
+    docker compose up -d redis_booking cassandra_booking
+    python loadtest/flash_sale.py --users 5000 --capacity 200 --concurrency 500
+
+With --target the same scenario runs against a deployed stack through the
+API gateway, registering real users first:
+
+    python loadtest/flash_sale.py --target http://localhost:8080 --users 500 --capacity 50
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+import redis
+from cassandra.cluster import Cluster
+
+from fakes import FakeConsul, FakeAuth, FakeCatalog, FakeBroker, ServerThread, token_for
+
+BOOKING_SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "booking-service")
+CAPACITY_STREAM = os.getenv("CAPACITY_STREAM", "catalog:capacity_deltas")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Flash-sale load test for POST /bookings")
+    parser.add_argument("--target", help="Base URL of a running gateway or booking-service; omit to run in-process")
+    parser.add_argument("--users", type=int, default=2000, help="Users competing for the event")
+    parser.add_argument("--capacity", type=int, default=100, help="Seats on sale")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight at once")
+    parser.add_argument("--attempts-per-user", type=int, default=1, help="Booking requests each user sends")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which users arrive; 0 starts all at once")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait for deferred saga steps")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--cassandra-hosts", default=os.getenv("CASSANDRA_HOSTS", "localhost"))
+    parser.add_argument("--cassandra-keyspace", default=os.getenv("CASSANDRA_KEYSPACE", "bookingkeyspace"))
+    parser.add_argument("--port-base", type=int, default=18500, help="First local port used by the in-process servers")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this file")
+    return parser.parse_args()
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LocalStack:
+    """booking-service served from this process, wired to the fakes."""
+
+    def __init__(self, args):
+        self.consul, self.auth, self.catalog, self.broker = FakeConsul(), FakeAuth(), FakeCatalog(), FakeBroker()
+        consul_port, auth_port, catalog_port, self.booking_port = range(args.port_base, args.port_base + 4)
+
+        # booking-service reads its configuration at import time.
+        os.environ.update({
+            "CONSUL_HOST": "127.0.0.1",
+            "CONSUL_PORT": str(consul_port),
+            "AUTH_SERVICE_URL": f"http://127.0.0.1:{auth_port}",
+            "SERVICE_PORT": str(self.booking_port),
+            "REDIS_URL": args.redis_url,
+            "CASSANDRA_HOSTS": args.cassandra_hosts,
+            "CASSANDRA_KEYSPACE": args.cassandra_keyspace,
+        })
+        os.environ.setdefault("OTEL_TRACES_EXPORTER", "none")
+        self.consul.add("auth-service", auth_port)
+        self.consul.add("event-catalog-service", catalog_port)
+
+        sys.path.insert(0, os.path.abspath(BOOKING_SERVICE_DIR))
+        from app import main as booking_main
+        for name, module in list(sys.modules.items()):
+            if name.startswith("app.") and hasattr(module, "send_booking_notification"):
+                module.send_booking_notification = self.broker.send_booking_notification
+
+        self.servers = ServerThread()
+        self.servers.add(self.consul.app, consul_port)
+        self.servers.add(self.auth.app, auth_port)
+        self.servers.add(self.catalog.app, catalog_port)
+        self.servers.add(booking_main.app, self.booking_port, lifespan="on")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.booking_port}"
+
+    def start(self):
+        self.servers.start()
+
+    def stop(self):
+        self.servers.stop()
+
+    async def prepare(self, args):
+        event_id = str(uuid.uuid4())
+        self.catalog.add_event(event_id, args.capacity)
+        return event_id, [token_for(f"lt-{i}") for i in range(args.users)]
+
+
+class RemoteStack:
+    """A deployed stack reached through its gateway; users are registered for real."""
+
+    broker = None
+
+    def __init__(self, args):
+        self.base_url = args.target.rstrip("/")
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    async def prepare(self, args):
+        run_id = uuid.uuid4().hex[:8]
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=args.timeout, limits=limits) as client:
+            semaphore = asyncio.Semaphore(min(args.concurrency, 50))
+
+            async def login(username: str) -> str:
+                async with semaphore:
+                    await client.post("/auth/register", json={
+                        "username": username,
+                        "email": f"{username}@loadtest.local",
+                        "password": "loadtest",
+                    })
+                    r = await client.post("/auth/login", data={"username": username, "password": "loadtest"})
+                    r.raise_for_status()
+                    return r.json()["access_token"]
+
+            organizer = await login(f"lt{run_id}org")
+            r = await client.post("/events", headers={"Authorization": f"Bearer {organizer}"}, json={
+                "title": f"Flash sale {run_id}",
+                "description": "Load test event",
+                "start_time": "2030-01-01T10:00:00Z",
+                "end_time": "2030-01-01T12:00:00Z",
+                "location": "Online",
+                "capacity": args.capacity,
+                "price": 0,
+            })
+            r.raise_for_status()
+            event_id = r.json()["id"]
+            print(f"Registering {args.users} users...")
+            tokens = await asyncio.gather(*(login(f"lt{run_id}u{i}") for i in range(args.users)))
+        return event_id, list(tokens)
+
+
+async def run_sale(base_url: str, event_id: str, tokens: list[str], args) -> dict:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    transport_errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        async def attempt(token: str, delay: float):
+            nonlocal transport_errors
+            if delay:
+                await asyncio.sleep(delay)
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    r = await client.post(
+                        "/bookings", json={"event_id": event_id}, headers={"Authorization": f"Bearer {token}"}
+                    )
+                    statuses[str(r.status_code)] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                    transport_errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        attempts = [(token, random.uniform(0, args.ramp)) for token in tokens for _ in range(args.attempts_per_user)]
+        random.shuffle(attempts)
+        started = time.perf_counter()
+        await asyncio.gather(*(attempt(token, delay) for token, delay in attempts))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "statuses": dict(statuses),
+        "succeeded": statuses.get("200", 0),
+        "transport_errors": transport_errors,
+    }
+
+
+def wait_for_sagas(redis_client: redis.Redis, timeout: float) -> bool:
+    """Wait until no saga is in flight, i.e. every deferred step has run."""
+    deadline = time.monotonic() + timeout
+    while redis_client.zcard("saga:inflight"):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.2)
+    return True
+
+
+def check_invariants(args, event_id: str, sale: dict, stream_start: str, broker) -> list[dict]:
+    redis_client = redis.from_url(args.redis_url)
+    cluster = Cluster(args.cassandra_hosts.split(","))
+    session = cluster.connect(args.cassandra_keyspace)
+    try:
+        rows = list(session.execute("SELECT id, user_id FROM bookings WHERE event_id = %s", (event_id,)))
+        counter = int(redis_client.get(f"booking_count:{event_id}") or 0)
+        booked = len(rows)
+
+        checks = [
+            ("bookings <= capacity", booked <= args.capacity, f"{booked} bookings for {args.capacity} seats"),
+            ("redis counter == cassandra rows", counter == booked, f"counter {counter}, rows {booked}"),
+            ("one booking per user", len({row.user_id for row in rows}) == booked,
+             f"{len({row.user_id for row in rows})} distinct users over {booked} rows"),
+            # A request that timed out on the client may still have booked.
+            ("successful responses match rows",
+             sale["succeeded"] <= booked <= sale["succeeded"] + sale["transport_errors"],
+             f"{sale['succeeded']} x 200, {booked} rows, {sale['transport_errors']} transport errors"),
+        ]
+        if args.users >= args.capacity and not sale["transport_errors"]:
+            checks.append(("sold out", booked == args.capacity, f"{booked} of {args.capacity} seats sold"))
+
+        drained = wait_for_sagas(redis_client, args.drain_timeout)
+        checks.append(("deferred saga steps drained", drained, "saga:inflight is empty" if drained else "timed out"))
+        deltas = sum(
+            int(fields[b"delta"])
+            for _, fields in redis_client.xrange(CAPACITY_STREAM, min=stream_start)
+            if fields.get(b"event_id", b"").decode() == event_id
+        )
+        checks.append(("catalog deltas == -bookings", deltas == -booked, f"sum of deltas {deltas}"))
+        if broker is not None:
+            sent = sum(1 for m in broker.messages if m["type"] == "booking_confirmed")
+            checks.append(("one notification per booking", sent == booked, f"{sent} notifications"))
+    finally:
+        cluster.shutdown()
+        redis_client.close()
+
+    return [{"name": name, "passed": bool(passed), "detail": detail} for name, passed, detail in checks]
+
+
+def print_report(args, sale: dict, invariants: list[dict]):
+    latency = sale["latency_ms"]
+    print(f"Flash sale: {args.users} users x {args.attempts_per_user} attempts, "
+          f"capacity {args.capacity}, concurrency {args.concurrency}")
+    print(f"Requests:   {sale['requests']} in {sale['elapsed_s']}s ({sale['rps']} req/s)")
+    print(f"Latency:    p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  max {latency['max']}ms")
+    print("Statuses:   " + "  ".join(f"{status}={count}" for status, count in sorted(sale["statuses"].items())))
+    print("Invariants:")
+    for check in invariants:
+        print(f"  [{'PASS' if check['passed'] else 'FAIL'}] {check['name']}: {check['detail']}")
+
+
+async def main():
+    args = parse_args()
+
+    # Fail fast if the real backends are not reachable.
+    redis.from_url(args.redis_url).ping()
+
+    stack = RemoteStack(args) if args.target else LocalStack(args)
+    stack.start()
+    try:
+        event_id, tokens = await stack.prepare(args)
+        stream_start = f"{int(time.time() * 1000)}-0"
+        sale = await run_sale(stack.base_url, event_id, tokens, args)
+        invariants = await asyncio.to_thread(check_invariants, args, event_id, sale, stream_start, stack.broker)
+    finally:
+        stack.stop()
+
+    print_report(args, sale, invariants)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"event_id": event_id, "config": vars(args), "sale": sale, "invariants": invariants}, f, indent=2)
+    return 0 if all(check["passed"] for check in invariants) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
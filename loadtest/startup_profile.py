@@ -0,0 +1,92 @@
+"""
+Import-time profile of a service's cold start.
+
+Runs `python -X importtime -c "import app.main"` inside a service directory
+and summarises the result: the total import time, the self time of every
+top-level package (fastapi, opentelemetry, cassandra, ...), and the
+cumulative time of the service's own `app.*` modules. Nothing is connected:
+since the backends are opened after startup, importing `app.main` is the
+part of a cold start that runs before the server can answer `/health`.
+
+    python loadtest/startup_profile.py booking-service
+    python loadtest/startup_profile.py event-catalog-service --top 15 --json profile.json
+
+Run it with the service's own requirements installed. Tracing is switched
+off (OTEL_TRACES_EXPORTER=none) so no exporter is set up.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import-time profile of a service's app.main")
+    parser.add_argument("service", help="Service directory, e.g. booking-service")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=10, help="Rows to show per table")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this file")
+    return parser.parse_args()
+
+
+def run_importtime(service_dir: str, module: str) -> list[tuple[str, int, int]]:
+    """Return (module, self µs, cumulative µs) for every import, in import order."""
+    env = dict(os.environ, OTEL_TRACES_EXPORTER="none", PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=service_dir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"Importing {module} failed:\n{tail[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarise(rows, top: int) -> dict:
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    own = [(name, cumulative) for name, _, cumulative in rows if name == "app" or name.startswith("app.")]
+    return {
+        "total_seconds": round(sum(self_us for _, self_us, _ in rows) / 1e6, 3),
+        "modules": len(rows),
+        "packages": [
+            {"package": package, "seconds": round(us / 1e6, 3)}
+            for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "app_modules": [
+            {"module": name, "cumulative_seconds": round(us / 1e6, 3)}
+            for name, us in sorted(own, key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    args = parse_args()
+    report = summarise(run_importtime(args.service, args.module), args.top)
+    report["service"] = os.path.basename(os.path.abspath(args.service))
+
+    print(f"{report['service']}: import {args.module} took {report['total_seconds']:.3f}s ({report['modules']} modules)")
+    print("\nSelf time by top-level package:")
+    for row in report["packages"]:
+        print(f"  {row['seconds']:8.3f}s  {row['package']}")
+    print("\nCumulative time of the service's own modules:")
+    for row in report["app_modules"]:
+        print(f"  {row['cumulative_seconds']:8.3f}s  {row['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
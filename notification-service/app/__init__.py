@@ -0,0 +1,9 @@
+import time
+
+from dotenv import load_dotenv
+
+# Reference point for the startup profile in readiness.py.
+STARTED_AT = time.monotonic()
+
+# Read .env once, before any module of the app reads settings from the environment.
+load_dotenv()
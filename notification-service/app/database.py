@@ -1,13 +1,19 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi import Depends
+from .metrics import MongoCommandMetrics
 
 MONGODB_URL   = os.getenv("MONGODB_URL", "mongodb://notification-db:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "notification_db")
 
-_client = AsyncIOMotorClient(MONGODB_URL)
+# connect=False: nothing is opened until first use, so the client is safe to
+# create before gunicorn forks its workers.
+_client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[MongoCommandMetrics()], connect=False)
 _db     = _client[DATABASE_NAME]
 
+async def ping_database():
+    await _db.command("ping")
+
 async def get_database():
     """
     FastAPI dependency that returns a Motor (async) MongoDB handle.
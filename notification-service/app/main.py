@@ -1,21 +1,30 @@
 import os
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Response
 import httpx
-import pika
 import json
 import logging
 import threading
 import asyncio
 from .consul_client import ConsulClient
-from .database import get_database
+from .database import get_database, ping_database
 from .notification_processor import process_notification
 from .schemas import NotificationCreate, NotificationResponse, NotificationType, NotificationStatus
+from .metrics import instrument_app, HTTPX_EVENT_HOOKS, QUEUE_LAG
+from .tracing import setup_tracing, tracer
+from .resilience import get_upstream, UpstreamUnavailable, CircuitOpenError, BulkheadFullError, UPSTREAM_TIMEOUT
+from .readiness import Readiness
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
 from datetime import datetime
 
 app = FastAPI()
+instrument_app(app)
+setup_tracing(app, "notification-service")
 logging.basicConfig(level=logging.INFO)
 consul_client = ConsulClient()
-
+auth_upstream = get_upstream("auth-service")
+readiness = Readiness()
+consumer_thread = None
 
 INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "super-secure-api-key")
 
@@ -23,27 +32,47 @@ async def verify_user_id(user_id: str) -> bool:
     """
     Verifies that the user ID exists by calling the Auth Service.
     """
-    auth_service = consul_client.get_service("auth-service")
-    if not auth_service:
+    try:
+        async with auth_upstream.call():
+            auth_service = consul_client.get_service("auth-service")
+            if not auth_service:
+                raise UpstreamUnavailable("Auth Service unavailable")
+
+            url = f"http://{auth_service['host']}:{auth_service['port']}/users/{user_id}"
+            headers = {"X-Internal-API-Key": INTERNAL_API_KEY}
+            async with httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS, timeout=UPSTREAM_TIMEOUT) as client:
+                response = await client.get(url, headers=headers)
+            if response.status_code >= 500:
+                raise UpstreamUnavailable(f"Auth Service returned {response.status_code}")
+    except (CircuitOpenError, BulkheadFullError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(auth_upstream.breaker.retry_after())})
+    except (UpstreamUnavailable, httpx.RequestError):
         raise HTTPException(status_code=503, detail="Auth Service unavailable")
 
-    url = f"http://{auth_service['host']}:{auth_service['port']}/users/{user_id}"
-    headers = {"X-Internal-API-Key": INTERNAL_API_KEY}
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        if response.status_code == 200:
-            user_data = response.json()
-            global user_email
-            user_email = user_data.get("email")
-            logging.info(f"User ID {user_id} verified with email {user_email}")
-            return True
-        return False
+    if response.status_code == 200:
+        user_data = response.json()
+        global user_email
+        user_email = user_data.get("email")
+        logging.info(f"User ID {user_id} verified with email {user_email}")
+        return True
+    return False
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and its event loop is answering; says nothing about backends."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Consul's health check: 503 until startup has finished and while any backend ping fails."""
+    if not await readiness.check():
+        response.status_code = 503
+    return readiness.status()
+
 @app.post("/notifications/send", response_model=NotificationResponse)
 async def send_notification(
     notification: NotificationCreate, 
@@ -65,28 +94,64 @@ async def send_notification(
     background_tasks.add_task(process_notification, notification_data)
     return notification_data
 
-def start_rabbitmq_consumer():
-    connection = pika.BlockingConnection(pika.ConnectionParameters(host='rabbitmq'))
+def connect_rabbitmq():
+    # Imported here rather than at module level; only the consumer needs it.
+    import pika
+    return pika.BlockingConnection(pika.ConnectionParameters(host='rabbitmq'))
+
+def start_rabbitmq_consumer(connection):
     channel = connection.channel()
     channel.queue_declare(queue="notifications", durable=True)
     logging.info("Connected to RabbitMQ")
 
     def callback(ch, method, properties, body):
         notification = json.loads(body)
-        asyncio.run(process_notification(notification))
+        if notification.get("created_at"):
+            try:
+                enqueued_at = datetime.fromisoformat(notification["created_at"])
+                QUEUE_LAG.observe(max(0.0, (datetime.utcnow() - enqueued_at).total_seconds()))
+            except ValueError:
+                pass
+        # Continue the trace of whoever published the message.
+        parent = propagate.extract(properties.headers or {})
+        with tracer.start_as_current_span("notifications process", context=parent, kind=SpanKind.CONSUMER) as span:
+            span.set_attribute("messaging.system", "rabbitmq")
+            span.set_attribute("messaging.destination.name", "notifications")
+            span.set_attribute("notification.type", notification.get("type", ""))
+            asyncio.run(process_notification(notification))
         ch.basic_ack(delivery_tag=method.delivery_tag)
 
     channel.basic_consume(queue="notifications", on_message_callback=callback)
     logging.info("Notification Service is now consuming notifications...")
     channel.start_consuming()
 
-@app.on_event("startup")
-async def startup_event():
+async def _start_consumer():
+    # Connect here, so a broker that is not up yet is retried by readiness
+    # instead of silently killing the consumer thread.
+    global consumer_thread
+    connection = await asyncio.to_thread(connect_rabbitmq)
     # Run the RabbitMQ consumer in a separate thread
-    consumer_thread = threading.Thread(target=start_rabbitmq_consumer, daemon=True)
+    consumer_thread = threading.Thread(target=start_rabbitmq_consumer, args=(connection,), daemon=True)
     consumer_thread.start()
     logging.info("RabbitMQ consumer thread started")
 
+async def _check_consumer():
+    # The consumer thread exits when its RabbitMQ connection is lost.
+    if consumer_thread is None or not consumer_thread.is_alive():
+        raise RuntimeError("RabbitMQ consumer is not running")
+
+@app.on_event("startup")
+async def startup_event():
+    # Backends are connected in the background; /health/ready reports when they are warm.
+    readiness.start([
+        ("mongo", ping_database),
+        ("rabbitmq", _start_consumer),
+    ], checks=[
+        ("mongo", ping_database),
+        ("rabbitmq", _check_consumer),
+    ])
+
 @app.on_event("shutdown")
 async def shutdown_event():
+    await readiness.stop()
     logging.info("Notification Service is shutting down")
@@ -1,11 +1,13 @@
 import logging
 import asyncio
 import os
+import time
 import aiosmtplib
 import httpx
 from .consul_client import ConsulClient
+from .metrics import observe, SEND_LATENCY
+from .tracing import tracer
 
-logging.basicConfig(level=logging.INFO)
 consul_client = ConsulClient()
 
 async def send_email(to_email: str, subject: str, body: str):
@@ -14,20 +16,24 @@ async def send_email(to_email: str, subject: str, body: str):
     message += f"Subject: {subject}\r\n"
     message += "\r\n"
     message += body
-    await aiosmtplib.send(
-        message,
-        hostname="smtp.gmail.com",
-        port=587,
-        username=os.getenv("SMTP_USER"),
-        password=os.getenv("SMTP_PASS"),
-        sender=os.getenv("SMTP_USER"),
-        recipients=[to_email],
-        use_tls=False
-    )
+    with tracer.start_as_current_span("smtp send"), observe("smtp", "send"):
+        await aiosmtplib.send(
+            message,
+            hostname="smtp.gmail.com",
+            port=587,
+            username=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASS"),
+            sender=os.getenv("SMTP_USER"),
+            recipients=[to_email],
+            use_tls=False
+        )
 
 async def process_notification(notification):
+    start = time.perf_counter()
     try:
         await send_email(notification["user_email"], "Notification", notification["content"])
+        SEND_LATENCY.labels("sent").observe(time.perf_counter() - start)
         logging.info(f"Notification sent: {notification['type']} to {notification['user_id']}")
     except Exception as e:
+        SEND_LATENCY.labels("failed").observe(time.perf_counter() - start)
         logging.error(f"Failed to send notification: {str(e)}")
@@ -76,6 +76,16 @@ def list_events():
         events = resp.json()
         user_id = st.session_state.user.get("id") or st.session_state.user.get("_id") if st.session_state.user else None
         headers = {"Authorization": f"Bearer {st.session_state.token}"} if st.session_state.token else {}
+        # The user's bookings for all listed events, in batches rather than one request per event
+        user_bookings = {}
+        event_ids = [ev.get("id") or ev.get("_id") for ev in events]
+        event_ids = [eid for eid in event_ids if eid and ObjectId.is_valid(eid)]
+        if st.session_state.token and user_id:
+            # The service takes up to 200 event ids per request
+            for i in range(0, len(event_ids), 200):
+                status_resp = requests.post(f"{API_URL}/bookings/user/{user_id}/status", json={"event_ids": event_ids[i:i + 200]}, headers=headers)
+                if status_resp.status_code == 200:
+                    user_bookings.update(status_resp.json())
         for ev in events:
             event_id = ev.get("id") or ev.get("_id") or ""
             capacity = ev.get("capacity", 0)
@@ -87,9 +97,8 @@ def list_events():
                 st.write(f"**Organizer:** {ev.get('organizer_id', 'N/A')}")
                 if st.session_state.token and event_id and ObjectId.is_valid(event_id) and user_id:
                     # Check if user already booked this event
-                    booking_resp = requests.get(f"{API_URL}/bookings/user/{user_id}/event/{event_id}", headers=headers)
-                    if booking_resp.status_code == 200 and booking_resp.json():
-                        booking = booking_resp.json()
+                    booking = user_bookings.get(event_id)
+                    if booking:
                         st.success("You have already booked this event.")
                         if st.button(f"Cancel Booking", key=f"cancel_{event_id}"):
                             booking_id = booking.get("id") or booking.get("_id")